@@ -2,7 +2,23 @@ from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import math
-import random
+import os
+import sys
+import time
+
+from pacman.sim import *
+from pacman import net, replay
+from pacman.snapshot import MazeMirror, SimThread, SnapshotBuffer
+from pacman.clock import FixedStepClock, FrameLimiter, lerp
+from pacman.profiler import Profiler
+from pacman.gfx.capture import FORMATS as CAPTURE_FORMATS
+from pacman.gfx.capture import FrameCapture, FrameWriter
+from pacman.gfx.chunks import MazeChunks
+from pacman.gfx.cubes import draw_cube
+from pacman.gfx.frustum import CullStats, Frustum
+from pacman.gfx.lod import SPHERE_LODS, LodSelector
+from pacman.gfx.spheres import SphereRenderer
+from pacman.gfx.text import TextCache
 
 # =====================
 # global variables
@@ -13,15 +29,12 @@ GRID_LENGTH = 600
 rand_var = 423
 
 # =====================
-#game state
+#render settings
 # =====================
 WIN_W, WIN_H = 1000, 800
-TILE = 40.0
 OUTER_WALL_H = 60.0
 INNER_WALL_H = 40.0
 
-W, H = 21, 21  # grid cells
-
 # colors
 GREEN = (0.0, 0.6, 0.0)
 LIGHT_GREEN = (0.6, 0.9, 0.6)
@@ -32,11 +45,18 @@ DARK_RED = (0.4, 0.0, 0.0)
 DARK_GRAY = (0.25, 0.25, 0.25)
 LIGHT_BLUE = (0.7, 0.9, 1.0)
 YELLOW = (1.0, 1.0, 0.0)
+BLACK = (0.0, 0.0, 0.0)
+
+hud_text = TextCache(WIN_W, WIN_H, GLUT_BITMAP_HELVETICA_18)
+# rebuilt by setupCamera() every frame; drawing skips what it rejects
+frustum = None
+cull_stats = CullStats()
+show_cull_stats = False
 
-# camera modes
-CAM_TOP = 0
-CAM_THIRD = 1
-CAM_FIRST = 2
+# projection
+CAM_FOV = 60.0
+CAM_NEAR = 0.1
+CAM_FAR = 2000.0
 
 #adjustable camera parameters
 cam_top_height = 600.0
@@ -44,452 +64,181 @@ cam_third_dist = 120.0
 cam_third_height = 90.0
 cam_orbit_angle = 0.0  # degrees, adjusted by left/right arrows
 
+# named timing scopes around each phase of a tick and of a frame (F shows them)
+profiler = Profiler()
+show_profile = False
+profile_lines = []
+profile_refreshed = 0.0
+PROFILE_REFRESH = 0.25  # seconds
+trace_path = None
 
-MOVE_STEP = 3.0          # Pac-Man forward/back per frame
-TURN_STEP = 2.5          # degrees per frame
-ENEMY_STEP = 2.2         # per frame
-BULLET_STEP = 9.0
-BULLET_RADIUS = 3.0
-ENEMY_RADIUS = 10.0
-PAC_RADIUS = 10.0
-POWER_RADIUS = 6.0
-
-BULLET_LIFE_FRAMES = 120
-ENEMY_SPAWN_FRAMES = 240
-POWER_SPAWN_FRAMES = 420
-OBSTACLE_SPAWN_FRAMES = 300  # 5 seconds at 60fps
-AUTO_SHOOT_RATE_FRAMES = 18
-
-SPEED_BOOST_FRAMES = 300  # 5 seconds
-AUTO_SHOOT_FRAMES = 300   # 5 seconds
-SPEED_COOLDOWN_FRAMES = 600
-AUTO_COOLDOWN_FRAMES = 720
-
-# =====================
-# Maze and State
-# =====================
-maze = [[0 for _ in range(W)] for __ in range(H)]
-wall_segments = []
-
-def build_cross_maze():
-
-    # Clear maze
-    for r in range(H):
-        for c in range(W):
-            maze[r][c] = 0
-    
-    #outer borders (walls)
-    for r in range(H):
-        maze[r][0] = 1
-        maze[r][W-1] = 1
-    for c in range(W):
-        maze[0][c] = 1
-        maze[H-1][c] = 1
-    
-    #cross pattern
-    mr, mc = H//2, W//2
-    for r in range(1, H-1):
-        maze[r][mc] = 1
-    for c in range(1, W-1):
-        maze[mr][c] = 1
-    
-    #openings in the cross
-    for d in (-2, 2):
-        if 0 < mc+d < W-1:
-            maze[mr][mc+d] = 0
-        if 0 < mr+d < H-1:
-            maze[mr+d][mc] = 0
-    
-    #inner blocks for complexity
-    for r in range(3, H-3, 4):
-        for c in range(3, W-3, 6):
-            if maze[r][c] == 0:
-                maze[r][c] = 1
-                if c+1 < W-1:
-                    maze[r][c+1] = 1
-
-def rebuild_walls():
-
-    wall_segments.clear()
-    for r in range(H):
-        for c in range(W):
-            if maze[r][c] == 1:
-                is_outer = (r in (0, H-1) or c in (0, W-1))
-                wall_segments.append((r, c, is_outer))
-
-def grid_to_world(rc):
-
-    r, c = rc
-    x = (c - W/2.0) * TILE + TILE/2.0
-    y = (r - H/2.0) * TILE + TILE/2.0
-    return x, y
+game = Game()
+game.profiler = profiler
 
-def world_to_grid(x, y):
+# what frames draw: the game itself, or with --threads/--connect the latest
+# RenderState published by the simulation thread or the network client (world)
+# and the maze rebuilt from those snapshots (world_maze)
+world = game
+world_maze = game
+sim_thread = None
+snapshots = None
 
-    c = int(round(x / TILE + W/2.0 - 0.5))
-    r = int(round(y / TILE + H/2.0 - 0.5))
-    return r, c
+# fixed 60 Hz logic; frames are drawn between ticks using render_alpha
+clock = FixedStepClock()
+limiter = FrameLimiter()
+render_alpha = 1.0
 
-def passable(x, y):
+# --record: every input event also goes to recorder; --replay: player drives the game
+recorder = None
+record_path = None
+player = None
+render_times = []
 
-    r, c = world_to_grid(x, y)
-    if 0 <= r < H and 0 <= c < W:
-        return maze[r][c] == 0
-    return False
+# --capture: frames are drawn offscreen and read back asynchronously to disk
+capture = None
 
-def collide2d(x1, y1, r1, x2, y2, r2):
+# set once shutdown() has saved and stopped everything
+shut_down = False
 
-    return (x1-x2)**2 + (y1-y2)**2 <= (r1+r2)**2
+def lerp_xy(o):
+    return lerp(o.prev_x, o.x, render_alpha), lerp(o.prev_y, o.y, render_alpha)
 
 # =====================
-#game Classes
+# Entity drawing
 # =====================
-class PacMan:
-    def __init__(self):
-        self.x, self.y = grid_to_world((H-2, 1))
-        self.z = PAC_RADIUS
-        self.yaw = 0.0
-        self.mv = 0     # -1 back, 0 idle, +1 forward
-        self.turn = 0   # -1 left, 0 idle, +1 right
-
-    def update(self):
-        # Turning
-        self.yaw += self.turn * TURN_STEP
-        
-        # Forward vector (XY plane, Z is up)
-        rad = math.radians(self.yaw)
-        fx, fy = math.cos(rad), math.sin(rad)
-        
-        # Speed boost multiplier
-        speed_mult = 1.75 if game.speed_boost_active else 1.0
-        step = MOVE_STEP * speed_mult
-        
-        # Calculate new position
-        nx = self.x + fx * step * self.mv
-        ny = self.y + fy * step * self.mv
-        
-        # Collision detection
-        if passable(nx, self.y): 
-            self.x = nx
-        if passable(self.x, ny): 
-            self.y = ny
-
-    def draw(self):
-        glColor3f(*ORANGE)
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glRotatef(90, 1, 0, 0)  # orient sphere upwards
-        glutSolidSphere(PAC_RADIUS, 20, 16)
-        
-        # Add eyes to show direction
-        glColor3f(0, 0, 0)  # Black eyes
-        eye_offset = PAC_RADIUS * 0.6
-        
-        # Left eye
-        glPushMatrix()
-        glTranslatef(eye_offset, PAC_RADIUS * 0.3, PAC_RADIUS * 0.4)
-        glutSolidSphere(2, 8, 6)
-        glPopMatrix()
-        
-        # Right eye
-        glPushMatrix()
-        glTranslatef(eye_offset, -PAC_RADIUS * 0.3, PAC_RADIUS * 0.4)
-        glutSolidSphere(2, 8, 6)
-        glPopMatrix()
-        
-        glPopMatrix()
-
-    def fire(self, target=None):
-
-        rad = math.radians(self.yaw)
-        dx, dy = math.cos(rad), math.sin(rad)
-        
-        if target is not None:
-            tx, ty = target
-            L = math.hypot(tx, ty) + 1e-6
-            dx, dy = tx / L, ty / L
-        
-        bx = self.x + dx * (PAC_RADIUS + 4)
-        by = self.y + dy * (PAC_RADIUS + 4)
-        game.bullets.append(Bullet(bx, by, dx, dy))
-
-class Bullet:
-    def __init__(self, x, y, dx, dy):
-        self.x, self.y = x, y
-        self.z = PAC_RADIUS
-        self.dx, self.dy = dx, dy
-        self.life = BULLET_LIFE_FRAMES
-        self.alive = True
-
-    def update(self):
-        if not self.alive: 
-            return
-            
-        self.x += self.dx * BULLET_STEP
-        self.y += self.dy * BULLET_STEP
-        
-        if not passable(self.x, self.y):
-            self.alive = False
-            
-        self.life -= 1
-        if self.life <= 0 and self.alive:
-            self.alive = False
-            game.bullets_missed += 1
-
-    def draw(self):
-        if not self.alive: 
-            return
-        glColor3f(*YELLOW)
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glRotatef(90, 1, 0, 0)
-        glutSolidSphere(BULLET_RADIUS, 12, 8)
-        glPopMatrix()
-
-class Enemy:
-    def __init__(self, r, c):
-        self.x, self.y = grid_to_world((r, c))
-        self.z = ENEMY_RADIUS
-        self.alive = True
-
-    def update(self):
-        if not self.alive: 
-            return
-            
-        #chasing Pac-Man
-        dx = game.pac.x - self.x
-        dy = game.pac.y - self.y
-        L = math.hypot(dx, dy) + 1e-6
-        vx = (dx / L) * ENEMY_STEP
-        vy = (dy / L) * ENEMY_STEP
-        
-        nx, ny = self.x + vx, self.y + vy
-        if passable(nx, self.y): 
-            self.x = nx
-        if passable(self.x, ny): 
-            self.y = ny
-
-    def draw(self):
-        if not self.alive: 
-            return
-        glColor3f(*PURPLE)
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glRotatef(90, 1, 0, 0)
-        glutSolidSphere(ENEMY_RADIUS, 20, 16)
-        glPopMatrix()
-
-class PowerUp:
-    def __init__(self, r, c):
-        self.r, self.c = r, c
-        self.x, self.y = grid_to_world((r, c))
-
-    def update(self):
-        pass  
-
-    def draw(self):
-
-        s = 1.0 + 0.25 * math.sin(game.frame * 0.2)
-        glPushMatrix()
-        glColor3f(*CYAN)
-        glTranslatef(self.x, self.y, POWER_RADIUS + 2)
-        glScalef(s, s, s)
-        glRotatef(90, 1, 0, 0)
-        glutSolidSphere(POWER_RADIUS, 18, 14)
-        glPopMatrix()
-
-class FallingObstacle:
-    def __init__(self, r, c):
-        self.r, self.c = r, c
-        self.x, self.y = grid_to_world((r, c))
-        self.z = 220.0
-        self.vz = 0.0
-        self.landed = False
-
-    def update(self):
-        if self.landed: 
-            return
-            
-
-        self.vz -= 2.5
-        self.z += self.vz
-        
-        if self.z <= 0.0:
-            self.z = 0.0
-            self.landed = True
-
-            if maze[self.r][self.c] == 0:
-                maze[self.r][self.c] = -1
-
-    def draw(self):
-        glColor3f(*DARK_RED)
-        glPushMatrix()
-        glTranslatef(self.x, self.y, max(self.z, 8.0))
-        glutSolidCube(16.0)
-        glPopMatrix()
+# spheres are queued by the draw_* functions and drawn per mesh in one
+# instanced call each by spheres.flush(); the *_MESH tessellations are the
+# finest each kind uses, lod picks coarser ones by on-screen size
+spheres = SphereRenderer()
+lod = LodSelector(SPHERE_LODS, CAM_FOV, WIN_H)
+PAC_MESH = (20, 16)
+EYE_MESH = (8, 6)
+BULLET_MESH = (12, 8)
+ENEMY_MESH = (20, 16)
+POWER_MESH = (18, 14)
+
+def add_sphere(finest, x, y, z, radius, colour):
+    spheres.add(lod.pick(x, y, z, radius, finest), x, y, z, radius, colour)
+
+def draw_pacman(p):
+    x, y = lerp_xy(p)
+    add_sphere(PAC_MESH, x, y, p.z, PAC_RADIUS, ORANGE)
+
+    # Add eyes to show direction (offsets of the old rotated-sphere frame)
+    eye_offset = PAC_RADIUS * 0.6
+    add_sphere(EYE_MESH, x + eye_offset, y - PAC_RADIUS * 0.4, p.z + PAC_RADIUS * 0.3, 2, BLACK)
+    add_sphere(EYE_MESH, x + eye_offset, y - PAC_RADIUS * 0.4, p.z - PAC_RADIUS * 0.3, 2, BLACK)
+
+def draw_bullet(b):
+    if not b.alive:
+        return
+    x, y = lerp_xy(b)
+    add_sphere(BULLET_MESH, x, y, b.z, BULLET_RADIUS, YELLOW)
 
-# =====================
-#spawning 
-# =====================
-def random_floor_cell():
-
-    tries = 0
-    while tries < 500:
-        r = random.randint(1, H-2)
-        c = random.randint(1, W-2)
-        if maze[r][c] == 0:
-            px, py = game.pac.x, game.pac.y
-            gx, gy = grid_to_world((r, c))
-            if (px-gx)**2 + (py-gy)**2 > (TILE*2.0)**2:
-                return (r, c)
-        tries += 1
-    return (1, 1)
-
-def spawn_enemy():
-    r, c = random_floor_cell()
-    game.enemies.append(Enemy(r, c))
-
-def spawn_power():
-    r, c = random_floor_cell()
-    game.powerups.append(PowerUp(r, c))
-
-def spawn_obstacle():
-    r, c = random_floor_cell()
-    game.obstacles.append(FallingObstacle(r, c))
+def draw_enemy(e):
+    if not e.alive:
+        return
+    x, y = lerp_xy(e)
+    add_sphere(ENEMY_MESH, x, y, e.z, ENEMY_RADIUS, PURPLE)
 
-# =====================
-# Game State
-# =====================
-class Game:
-    def __init__(self):
-        self.reset()
-
-    def reset(self):
-        self.lives = 3
-        self.score = 0
-        self.bullets_missed = 0
-        self.paused = False
-        self.game_over = False
-        self.camera_mode = CAM_THIRD
-
-        self.pac = PacMan()
-        self.bullets = []
-        self.enemies = []
-        self.powerups = []
-        self.obstacles = []
-
-        self.frame = 0
-        self.enemy_spawn_cnt = 0
-        self.power_spawn_cnt = 0
-        self.obstacle_spawn_cnt = 0
-
-        # Special Abilities
-        self.speed_boost_active = False
-        self.speed_frames_left = 0
-        self.speed_cd_left = 0
-
-        self.auto_shoot_active = False
-        self.auto_frames_left = 0
-        self.auto_cd_left = 0
-        self.auto_tick = 0
-
-        # Rebuild maze
-        build_cross_maze()
-        rebuild_walls()
+def draw_power(p):
 
-game = Game()
+    s = 1.0 + 0.25 * math.sin(world.frame * 0.2)
+    add_sphere(POWER_MESH, p.x, p.y, POWER_RADIUS + 2, POWER_RADIUS * s, CYAN)
 
+OBSTACLE_SIZE = 16.0
 
-def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
+# walls, rubble and landed obstacles, baked per 16x16-cell chunk as chunks come into view
+maze_chunks = MazeChunks((OUTER_WALL_H, GREEN), (INNER_WALL_H, LIGHT_GREEN), shades=(0.85, 0.65),
+                         rubble=DARK_GRAY, obstacle=DARK_RED, obstacle_size=OBSTACLE_SIZE)
 
-    glColor3f(1.0, 1.0, 1.0)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
+def draw_obstacle(o):
+    glColor3f(*DARK_RED)
+    draw_cube(o.x, o.y, max(lerp(o.prev_z, o.z, render_alpha), 8.0), OBSTACLE_SIZE)
 
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
+def draw_text(x, y, text):
 
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    # must run between hud_text.begin() and hud_text.end(); the line is only
+    # recompiled when the text at this position changes
+    hud_text.draw(x, y, text)
 
 def draw_maze():
 
-    for (r, c, is_outer) in wall_segments:
-        x, y = grid_to_world((r, c))
-        h = OUTER_WALL_H if is_outer else INNER_WALL_H
-        base = GREEN if is_outer else LIGHT_GREEN
-        
-        # Brick pattern: alternating darkness
-        shade = 0.85 if ((r + c) % 2 == 0) else 0.65
-        col = (min(1, base[0]*shade), min(1, base[1]*shade), min(1, base[2]*shade))
-        
-        glColor3f(*col)
-        glPushMatrix()
-        glTranslatef(x, y, h/2.0)
-        glScalef(TILE, TILE, h)
-        glutSolidCube(1.0)
-        glPopMatrix()
-
-
-    glColor3f(*DARK_GRAY)
-    for r in range(H):
-        for c in range(W):
-            if maze[r][c] == -1:
-                x, y = grid_to_world((r, c))
-                s = TILE*0.9
-                glBegin(GL_QUADS)
-                glVertex3f(x - s/2, y - s/2, 1.0)
-                glVertex3f(x + s/2, y - s/2, 1.0)
-                glVertex3f(x + s/2, y + s/2, 1.0)
-                glVertex3f(x - s/2, y + s/2, 1.0)
-                glEnd()
+    # only chunks inside the view frustum are drawn; a chunk's walls are baked
+    # once per reset, its rubble and landed obstacles again when one of its cells
+    # changes. Brick pattern (alternating darkness) comes from a checker texture
+    maze_chunks.sync(world_maze)
+    maze_chunks.draw(frustum, cull_stats)
 
 def draw_hud():
 
-    cam_name = {CAM_TOP: "Top", CAM_THIRD: "Third", CAM_FIRST: "First"}[game.camera_mode]
-    draw_text(10, 770, f"Lives: {game.lives}  Score: {game.score}  Missed: {game.bullets_missed}  Cam: {cam_name}")
+    hud_text.begin()
+    cam_name = {CAM_TOP: "Top", CAM_THIRD: "Third", CAM_FIRST: "First"}[world.camera_mode]
+    draw_text(10, 770, f"Lives: {world.lives}  Score: {world.score}  Missed: {world.bullets_missed}  Cam: {cam_name}")
     
-    if game.paused: 
+    if world.paused: 
         draw_text(10, 740, "Paused (P)")
-    if game.game_over: 
+    if world.game_over: 
         draw_text(10, 710, "GAME OVER (R to Restart)")
-    if game.speed_boost_active: 
-        draw_text(10, 680, f"Speed Boost ACTIVE ({game.speed_frames_left}f)")
-    if game.auto_shoot_active: 
-        draw_text(10, 650, f"Auto Shoot ACTIVE ({game.auto_frames_left}f)")
-    if game.speed_cd_left > 0: 
-        draw_text(10, 620, f"Speed CD: {game.speed_cd_left}f")
-    if game.auto_cd_left > 0: 
-        draw_text(10, 590, f"Auto CD: {game.auto_cd_left}f")
+    if world.speed_boost_active: 
+        draw_text(10, 680, f"Speed Boost ACTIVE ({world.speed_frames_left}f)")
+    if world.auto_shoot_active: 
+        los = "  line of sight" if world.auto_shoot_los else ""
+        draw_text(10, 650, f"Auto Shoot ACTIVE ({world.auto_frames_left}f){los}")
+    if world.speed_cd_left > 0: 
+        draw_text(10, 620, f"Speed CD: {world.speed_cd_left}f")
+    if world.auto_cd_left > 0: 
+        draw_text(10, 590, f"Auto CD: {world.auto_cd_left}f")
+    if show_cull_stats:
+        draw_text(10, 20, f"Cull: {cull_stats}  tris {spheres.triangles}")
+    if show_profile:
+        # refreshed a few times a second so the cached text is not recompiled every frame
+        global profile_lines, profile_refreshed
+        now = time.perf_counter()
+        if now - profile_refreshed >= PROFILE_REFRESH:
+            profile_lines = profiler.report_lines()
+            profile_refreshed = now
+        for i, line in enumerate(profile_lines):
+            draw_text(560, 770 - 22 * i, line)
+    hud_text.end()
+
+def in_view(x, y, z, radius):
+
+    if frustum.sphere_visible(x, y, z, radius):
+        cull_stats.drawn += 1
+        return True
+    cull_stats.culled += 1
+    return False
 
 def draw_shapes():
 
-    draw_maze()
-    
+    cull_stats.reset()
+    with profiler.scope("maze"):
+        draw_maze()
 
-    for o in game.obstacles: 
-        o.draw()
-    for p in game.powerups: 
-        p.draw()
-    for e in game.enemies: 
-        e.draw()
-    for b in game.bullets: 
-        b.draw()
-    
+    with profiler.scope("entities"):
+        for o in world.obstacles: 
+            if in_view(o.x, o.y, max(o.z, 8.0), 14.0):
+                draw_obstacle(o)
 
-    game.pac.draw()
+        spheres.begin()
+        for p in world.powerups: 
+            if in_view(p.x, p.y, POWER_RADIUS + 2, POWER_RADIUS * 1.25):
+                draw_power(p)
+        for e in world.enemies: 
+            if e.alive and in_view(e.x, e.y, e.z, ENEMY_RADIUS + ENEMY_STEP):
+                draw_enemy(e)
+        for b in world.bullets: 
+            if b.alive and in_view(b.x, b.y, b.z, BULLET_RADIUS + BULLET_STEP):
+                draw_bullet(b)
+
+
+        draw_pacman(world.pac)
+        spheres.flush()
 
 def draw_floor_plane():
 
-    size = max(W, H) * TILE
+    size = max(world_maze.maze.w, world_maze.maze.h) * TILE
     glColor3f(0.05, 0.05, 0.05)
     glBegin(GL_QUADS)
     glVertex3f(-size/2, -size/2, 0)
@@ -501,83 +250,54 @@ def draw_floor_plane():
 # =====================
 # Input handlers 
 # =====================
-def keyboardListener(key, x, y):
-
-    if game.game_over:
-        if key in (b'r', b'R'):
-            game.reset()
+def view_input(kind, code):
+
+    # camera and overlay keys never reach the game; True if it was one of them
+    global show_cull_stats, show_profile
+    if kind == replay.SPECIAL:
+        camera_key(code)
+    elif kind == replay.KEY_DOWN and code in b'vV' and not world.game_over:
+        # show drawn/culled counters for tuning
+        show_cull_stats = not show_cull_stats
+    elif kind == replay.KEY_DOWN and code in b'fF' and not world.game_over:
+        # per-phase frame timings overlay
+        show_profile = not show_profile
+    else:
+        return False
+    return True
+
+def handle_input(kind, code):
+
+    # everything except the camera keys belongs to the game (Game.key_down etc.)
+    if not view_input(kind, code):
+        replay.apply_event(game, kind, code)
+
+def input_event(kind, code):
+
+    if sim_thread is not None:
+        # recorded and applied on the simulation thread (or the server) between
+        # ticks; the game ignores the camera/overlay keys, so it can be sent everything
+        sim_thread.send(kind, code)
+        view_input(kind, code)
         return
+    if recorder is not None:
+        recorder.event(kind, code)
+    handle_input(kind, code)
 
-    # Pac-Man movement controls
-    if key in (b'w', b'W'):
-        game.pac.mv = 1
-    elif key in (b's', b'S'):
-        game.pac.mv = -1
-    elif key in (b'a', b'A'):
-        game.pac.turn = -1
-    elif key in (b'd', b'D'):
-        game.pac.turn = 1
-    
-    # Game controls
-    elif key in (b'p', b'P'):
-        game.paused = not game.paused
-    elif key in (b'1',):
-        game.camera_mode = CAM_TOP
-    elif key in (b'2',):
-        game.camera_mode = CAM_THIRD
-    
-    # Special abilities
-    elif key == b' ':  # Space for speed boost
-        if (not game.speed_boost_active) and game.speed_cd_left == 0:
-            game.speed_boost_active = True
-            game.speed_frames_left = SPEED_BOOST_FRAMES
-    elif key in (b'c', b'C'):  # C for auto shoot
-        if (not game.auto_shoot_active) and game.auto_cd_left == 0:
-            game.auto_shoot_active = True
-            game.auto_frames_left = AUTO_SHOOT_FRAMES
-            game.auto_tick = 0
-    
-    # Restart
-    elif key in (b'r', b'R'):
-        game.reset()
-
-    # Cheats
-    elif key in (b'l', b'L'):
-        game.lives = min(9, game.lives + 1)
-    elif key in (b'k', b'K'):
-        # eliminate all enemies
-        for e in game.enemies:
-            e.alive = False
-    elif key in (b'g', b'G'):
-        # toggle god mode (no life loss)
-        game.god_mode = not getattr(game, 'god_mode', False)
-    elif key in (b'+',):
-        game.score += 50
-    elif key in (b'e', b'E'):
-        spawn_enemy()
-    elif key in (b'u', b'U'):
-        spawn_power()
-    elif key in (b'o', b'O'):
-        spawn_obstacle()
-    elif key in (b'c',):
-
-        pass
-    elif key in (b'x', b'X'):
-        # clear destroyed paths
-        for r in range(H):
-            for c in range(W):
-                if maze[r][c] == -1:
-                    maze[r][c] = 0
+def keyboardListener(key, x, y):
+
+    input_event(replay.KEY_DOWN, key[0])
 
 def keyboardListenerUp(key, x, y):
 
-    if key in (b'w', b'W', b's', b'S'):
-        game.pac.mv = 0
-    if key in (b'a', b'A', b'd', b'D'):
-        game.pac.turn = 0
+    input_event(replay.KEY_UP, key[0])
 
 def specialKeyListener(key, x, y):
 
+    input_event(replay.SPECIAL, key)
+
+def camera_key(key):
+
     global cam_top_height, cam_third_height, cam_third_dist
     global cam_orbit_angle
     if key == GLUT_KEY_LEFT:
@@ -585,172 +305,186 @@ def specialKeyListener(key, x, y):
     elif key == GLUT_KEY_RIGHT:
         cam_orbit_angle = (cam_orbit_angle + 4.0) % 360.0
     elif key == GLUT_KEY_UP:
-        if game.camera_mode == CAM_TOP:
+        if world.camera_mode == CAM_TOP:
             cam_top_height = min(1500.0, cam_top_height + 30.0)
-        elif game.camera_mode == CAM_THIRD:
+        elif world.camera_mode == CAM_THIRD:
             cam_third_height = min(220.0, cam_third_height + 6.0)
             cam_third_dist = min(300.0, cam_third_dist + 8.0)
     elif key == GLUT_KEY_DOWN:
-        if game.camera_mode == CAM_TOP:
+        if world.camera_mode == CAM_TOP:
             cam_top_height = max(200.0, cam_top_height - 30.0)
-        elif game.camera_mode == CAM_THIRD:
+        elif world.camera_mode == CAM_THIRD:
             cam_third_height = max(30.0, cam_third_height - 6.0)
             cam_third_dist = max(60.0, cam_third_dist - 8.0)
 
 def mouseListener(button, state_btn, x, y):
 
-    if button == GLUT_LEFT_BUTTON and state_btn == GLUT_DOWN:
-        game.pac.fire(None)
-    
-    # Right mouse button cycles to first-person view
-    if button == GLUT_RIGHT_BUTTON and state_btn == GLUT_DOWN:
-        game.camera_mode = CAM_FIRST
+    # left fires, right switches to first-person view (Game.mouse_down)
+    if state_btn == GLUT_DOWN:
+        input_event(replay.MOUSE_DOWN, button)
 
 # =====================
 # Camera system 
 # =====================
 def setupCamera():
 
+    global frustum
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(60.0, WIN_W/float(WIN_H), 0.1, 2000.0)
+    gluPerspective(CAM_FOV, WIN_W/float(WIN_H), CAM_NEAR, CAM_FAR)
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
-    #eye/center based on camera mode
-    if game.camera_mode == CAM_TOP:
-        # Top-down view (adjustable height)
-        ex, ey, ez = game.pac.x, game.pac.y, cam_top_height
-        cx, cy, cz = game.pac.x, game.pac.y, 0.0
-    elif game.camera_mode == CAM_FIRST:
+    #eye/center based on camera mode, following the interpolated Pac-Man
+    px, py = lerp_xy(world.pac)
+    yaw = lerp(world.pac.prev_yaw, world.pac.yaw, render_alpha)
+    up = (0, 0, 1)
+    if world.camera_mode == CAM_TOP:
+        # Top-down view (adjustable height); looking straight down, so +y is "up" on screen
+        ex, ey, ez = px, py, cam_top_height
+        cx, cy, cz = px, py, 0.0
+        up = (0, 1, 0)
+    elif world.camera_mode == CAM_FIRST:
         #FPV
-        rad = math.radians(game.pac.yaw)
+        rad = math.radians(yaw)
         dx, dy = math.cos(rad), math.sin(rad)
-        ex, ey, ez = game.pac.x + dx*10.0, game.pac.y + dy*10.0, PAC_RADIUS*1.6
+        ex, ey, ez = px + dx*10.0, py + dy*10.0, PAC_RADIUS*1.6
         cx, cy, cz = ex + dx*30.0, ey + dy*30.0, PAC_RADIUS*1.6
     else:  # CAM_THIRD
         #TPV
-        rad = math.radians(game.pac.yaw + cam_orbit_angle)
+        rad = math.radians(yaw + cam_orbit_angle)
         dx, dy = math.cos(rad), math.sin(rad)
-        ex, ey, ez = game.pac.x - dx*cam_third_dist, game.pac.y - dy*cam_third_dist, cam_third_height
-        cx, cy, cz = game.pac.x, game.pac.y, PAC_RADIUS
-
-    gluLookAt(ex, ey, ez,  cx, cy, cz,  0, 0, 1)
-
-
-def idle():
-
-    if not game.paused and not game.game_over:
-        # Spawning system
-        game.enemy_spawn_cnt += 1
-        game.power_spawn_cnt += 1
-        game.obstacle_spawn_cnt += 1
-        
-        if game.enemy_spawn_cnt >= ENEMY_SPAWN_FRAMES:
-            spawn_enemy()
-            game.enemy_spawn_cnt = 0
-        if game.power_spawn_cnt >= POWER_SPAWN_FRAMES:
-            spawn_power()
-            game.power_spawn_cnt = 0
-        if game.obstacle_spawn_cnt >= OBSTACLE_SPAWN_FRAMES:
-            spawn_obstacle()
-            game.obstacle_spawn_cnt = 0
-
-        # Special abilities management
-        if game.speed_boost_active:
-            game.speed_frames_left -= 1
-            if game.speed_frames_left <= 0:
-                game.speed_boost_active = False
-                game.speed_cd_left = SPEED_COOLDOWN_FRAMES
-        elif game.speed_cd_left > 0:
-            game.speed_cd_left -= 1
-
-        if game.auto_shoot_active:
-            game.auto_frames_left -= 1
-            game.auto_tick -= 1
-            if game.auto_tick <= 0:
-                # auto shoot toward nearest enemy
-                target_dir = None
-                if game.enemies:
-                    alive_enemies = [e for e in game.enemies if e.alive]
-                    if alive_enemies:
-                        nearest = min(alive_enemies, key=lambda e: (game.pac.x-e.x)**2 + (game.pac.y-e.y)**2)
-                        target_dir = (nearest.x - game.pac.x, nearest.y - game.pac.y)
-                game.pac.fire(target_dir)
-                game.auto_tick = AUTO_SHOOT_RATE_FRAMES
-            if game.auto_frames_left <= 0:
-                game.auto_shoot_active = False
-                game.auto_cd_left = AUTO_COOLDOWN_FRAMES
-        elif game.auto_cd_left > 0:
-            game.auto_cd_left -= 1
-
-        # Update all game objects
-        game.pac.update()
-        
-        for b in game.bullets: 
-            b.update()
-        game.bullets = [b for b in game.bullets if b.alive]
-        
-        for e in game.enemies: 
-            e.update()
-        for p in game.powerups: 
-            p.update()
-        for o in game.obstacles: 
-            o.update()
-
-        # Collision detection
-        # Bullets vs enemies
-        for b in game.bullets:
-            if not b.alive: 
-                continue
-            for e in game.enemies:
-                if not e.alive: 
-                    continue
-                if collide2d(b.x, b.y, BULLET_RADIUS, e.x, e.y, ENEMY_RADIUS):
-                    b.alive = False
-                    e.alive = False
-                    game.score += 10
-
-        # Pac-Man vs enemies
-        for e in game.enemies:
-            if not e.alive: 
-                continue
-            if collide2d(game.pac.x, game.pac.y, PAC_RADIUS, e.x, e.y, ENEMY_RADIUS):
-                e.alive = False
-                if not getattr(game, 'god_mode', False):
-                    game.lives -= 1
-                if game.lives <= 0:
-                    game.game_over = True
-
-        # Pac-Man vs power-ups
-        for p in game.powerups[:]:
-            if collide2d(game.pac.x, game.pac.y, PAC_RADIUS, p.x, p.y, POWER_RADIUS + 2):
-                game.lives = min(5, game.lives + 1)
-                game.powerups.remove(p)
-
-        game.frame += 1
+        ex, ey, ez = px - dx*cam_third_dist, py - dy*cam_third_dist, cam_third_height
+        cx, cy, cz = px, py, PAC_RADIUS
 
+    gluLookAt(ex, ey, ez,  cx, cy, cz,  *up)
+    frustum = Frustum((ex, ey, ez), (cx, cy, cz), up, CAM_FOV, WIN_W/float(WIN_H), CAM_NEAR, CAM_FAR)
+    lod.set_eye((ex, ey, ez))
+
+
+def timer_tick(value):
+
+    global render_alpha
+    with profiler.scope("sim"):
+        ran = game.step(clock.advance())
+    if recorder is not None:
+        recorder.advance(ran)
+    # nothing moves while paused, so don't blend towards the last tick
+    render_alpha = 1.0 if (game.paused or game.game_over) else clock.alpha
+    glutPostRedisplay()
+
+    # sleep until the next frame is due instead of spinning in glutIdleFunc
+    glutTimerFunc(int(limiter.delay() * 1000), timer_tick, 0)
+
+
+def frame_tick(value):
+
+    # --threads/--connect: the simulation ticks elsewhere; just pick up its latest snapshot
+    global world, render_alpha
+    state = snapshots.take()
+    if state is not None:
+        world_maze.apply(state)
+        world = state
+    if world.paused or world.game_over:
+        render_alpha = 1.0
+    else:
+        # blend towards the newest tick by the time since it was published
+        render_alpha = min(1.0, (time.perf_counter() - world.time) / clock.dt)
     glutPostRedisplay()
+    glutTimerFunc(int(limiter.delay() * 1000), frame_tick, 0)
 
 
 def showScreen():
 
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glLoadIdentity()
-    glViewport(0, 0, 1000, 800)
+    # scopes time CPU-side submission; GPU work mostly shows up in "swap"
+    with profiler.scope("frame"):
+        if capture is not None:
+            capture.begin()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        glViewport(0, 0, 1000, 800)
+
+        with profiler.scope("camera"):
+            setupCamera()
 
-    setupCamera()
+        # Draw large floor plane for visibility
+        draw_floor_plane()
 
-    # Draw large floor plane for visibility
-    draw_floor_plane()
+        # Draw game world
+        draw_shapes()
+        with profiler.scope("hud"):
+            draw_hud()
 
-    # Draw game world
-    draw_shapes()
-    draw_hud()
+        if capture is not None:
+            with profiler.scope("capture"):
+                capture.end()
 
-    glutSwapBuffers()
+        with profiler.scope("swap"):
+            glutSwapBuffers()
 
 
+def replay_tick(value):
+
+    # replays run flat out: one tick, then one timed frame
+    global render_alpha
+    if not player.advance():
+        finish_replay()
+        return
+    render_alpha = 1.0
+    t0 = time.perf_counter()
+    showScreen()
+    glFinish()
+    render_times.append(time.perf_counter() - t0)
+    glutTimerFunc(0, replay_tick, 0)
+
+def finish_replay():
+
+    print(f"replayed {player.ticks} ticks, seed {player.recording.seed}")
+    print(replay.format_summary("sim", player.sim_times))
+    print(replay.format_summary("render", render_times))
+    print(f"score={game.score} lives={game.lives} missed={game.bullets_missed}")
+    sys.stdout.flush()
+    # the window (and its GL context) is still up here; it is not after the loop ends
+    shutdown()
+    if bool(glutLeaveMainLoop):
+        glutLeaveMainLoop()
+    else:
+        # no way back out of glutMainLoop
+        os._exit(0)
+
+def shutdown(gl_alive=True):
+
+    # GLUT ends the process with C exit(), which skips Python's atexit
+    # handlers, so everything that must happen on the way out is done here:
+    # from the close callback or before leaving the loop while the window is
+    # still there, and once more (a no-op by then) after glutMainLoop returns
+    global shut_down
+    if shut_down:
+        return
+    shut_down = True
+    if sim_thread is not None:
+        # the simulation thread (or network client) first: it may still be recording
+        sim_thread.stop()
+    if capture is not None:
+        finish_capture(gl_alive)
+    if recorder is not None:
+        recorder.save(record_path)
+        print(f"recording saved to {record_path}")
+    save_trace()
+
+def finish_capture(gl_alive=True):
+
+    # reading back the frames still in flight needs the GL context
+    capture.close(drain=gl_alive)
+    print(f"captured {capture.frames - capture.lost} frames to {capture.writer.out_dir} "
+          f"({capture.stalls} readback stalls, {capture.writer.waits} writer waits)")
+
+def save_trace():
+
+    if trace_path is not None:
+        profiler.save_trace(trace_path)
+        print(f"trace written to {trace_path}")
+
 def run_game():
 
     glutInit()
@@ -769,8 +503,83 @@ def run_game():
     glutKeyboardUpFunc(keyboardListenerUp)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    if bool(glutSetOption):
+        # freeglut: let closing the window return from glutMainLoop instead of exit()ing
+        glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+    if bool(glutCloseFunc):
+        glutCloseFunc(shutdown)
+    if player is not None:
+        glutTimerFunc(0, replay_tick, 0)
+    elif sim_thread is not None:
+        sim_thread.start()
+        glutTimerFunc(0, frame_tick, 0)
+    else:
+        glutTimerFunc(0, timer_tick, 0)
 
     glutMainLoop()
-
-run_game()
+    # freeglut has destroyed the window by now
+    shutdown(gl_alive=False)
+
+def main(argv=None):
+
+    import argparse
+    global game, world, world_maze, recorder, record_path, player, trace_path, sim_thread, snapshots, capture
+
+    ap = argparse.ArgumentParser(description="3D Pac-Man")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--size", type=parse_size, default=None, metavar="WxH", help="maze size, e.g. 201x201")
+    ap.add_argument("--record", metavar="FILE", help="save this session's input for --replay")
+    ap.add_argument("--replay", metavar="FILE", help="replay a recorded session at full speed and print timings")
+    ap.add_argument("--trace", metavar="FILE", help="write a Chrome trace-event JSON of every frame's phases on exit")
+    ap.add_argument("--threads", action="store_true",
+                    help="tick the simulation on its own thread; frames draw its latest snapshot")
+    ap.add_argument("--connect", metavar="HOST:PORT",
+                    help="draw a game hosted with 'python -m pacman.net serve' instead of running one")
+    ap.add_argument("--capture", metavar="DIR", help="record every frame into DIR (see pacman/gfx/capture.py)")
+    ap.add_argument("--capture-format", choices=CAPTURE_FORMATS, default="raw",
+                    help="one raw RGBA stream, or a PNG per frame")
+    args = ap.parse_args(argv)
+    if args.connect and (args.record or args.replay or args.threads):
+        ap.error("--connect cannot be combined with --record, --replay or --threads")
+
+    if args.connect:
+        # thin client: the server owns the game, this process only draws it
+        snapshots = SnapshotBuffer()
+        try:
+            sim_thread = net.Client(*net.parse_address(args.connect), buffer=snapshots)
+            sim_thread.wait()
+        except (OSError, net.NetError) as exc:
+            sys.exit(f"{args.connect}: {exc}")
+        world_maze = MazeMirror()
+        world = snapshots.take()
+        world_maze.apply(world)
+    else:
+        if args.replay:
+            player = replay.Player(replay.Recording.load(args.replay), handle_input)
+            game = player.game
+        else:
+            game = Game(args.seed, size=args.size)
+            if args.record:
+                recorder = replay.Recorder(game)
+                record_path = args.record
+                print(f"recording seed {game.seed} to {args.record}")
+        game.profiler = profiler
+        world = world_maze = game
+        if args.threads and player is None:
+            # replays stay single-threaded: they time each tick and frame in turn
+            snapshots = SnapshotBuffer()
+            sim_thread = SimThread(game, snapshots, clock, recorder=recorder)
+            world_maze = MazeMirror()
+            world = snapshots.take()
+            world_maze.apply(world)
+    if args.trace:
+        trace_path = args.trace
+        profiler.start_trace()
+    if args.capture:
+        writer = FrameWriter(args.capture, WIN_W, WIN_H, args.capture_format)
+        writer.start()
+        capture = FrameCapture(writer, WIN_W, WIN_H)
+    run_game()
+
+if __name__ == "__main__":
+    main()
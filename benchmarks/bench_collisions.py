@@ -0,0 +1,85 @@
+"""Broadphase scaling benchmark: brute-force vs spatial-hash collisions.
+
+    python -m benchmarks.bench_collisions [--max-bullets 10000 --max-enemies 5000]
+
+Bullets and enemies are scattered over the floor cells of the standard
+maze and one collision pass is timed for each size.  The brute-force pass
+is the old nested loop and is skipped once it would take too long.
+"""
+import argparse
+import time
+
+from pacman import sim
+
+BRUTE_LIMIT = 5_000_000  # bullet*enemy pairs before brute force is skipped
+SIZES = [(100, 50), (1000, 500), (2500, 1250), (5000, 2500), (10000, 5000)]
+
+
+def populate(game, n_bullets, n_enemies):
+    rng = game.rng
+    floor = game.maze.find(sim.FLOOR)
+
+    def jitter(rc):
+        x, y = sim.grid_to_world(rc)
+        j = sim.TILE * 0.45
+        return x + rng.uniform(-j, j), y + rng.uniform(-j, j)
+
+    game.bullets = []
+    for _ in range(n_bullets):
+        x, y = jitter(rng.choice(floor))
+        game.bullets.append(sim.Bullet(x, y, 1.0, 0.0))
+    game.enemies = []
+    for _ in range(n_enemies):
+        e = sim.Enemy(0, 0)
+        e.x, e.y = jitter(rng.choice(floor))
+        game.enemies.append(e)
+
+
+def brute_force(game):
+    for b in game.bullets:
+        if not b.alive:
+            continue
+        for e in game.enemies:
+            if not e.alive:
+                continue
+            if sim.collide2d(b.x, b.y, sim.BULLET_RADIUS, e.x, e.y, sim.ENEMY_RADIUS):
+                b.alive = False
+                e.alive = False
+                game.score += 10
+
+
+def time_pass(fn, game, n_bullets, n_enemies, seed):
+    game.rng.seed(seed)
+    populate(game, n_bullets, n_enemies)
+    game.score = 0
+    t0 = time.perf_counter()
+    fn(game)
+    return time.perf_counter() - t0, game.score
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--max-bullets", type=int, default=10000)
+    ap.add_argument("--max-enemies", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    game = sim.Game(args.seed)
+    game.god_mode = True
+    sizes = [(b, e) for b, e in SIZES if b <= args.max_bullets and e <= args.max_enemies]
+
+    print(f"{'bullets':>8} {'enemies':>8} {'brute ms':>10} {'hash ms':>10} {'speedup':>8}")
+    for nb, ne in sizes:
+        t_hash, s_hash = time_pass(sim.Game.collide, game, nb, ne, args.seed)
+        if nb * ne <= BRUTE_LIMIT:
+            t_brute, s_brute = time_pass(brute_force, game, nb, ne, args.seed)
+            assert s_brute == s_hash, (s_brute, s_hash)
+            brute = f"{t_brute * 1e3:10.2f}"
+            speedup = f"{t_brute / t_hash:7.1f}x"
+        else:
+            brute, speedup = f"{'skipped':>10}", f"{'-':>8}"
+        print(f"{nb:8d} {ne:8d} {brute} {t_hash * 1e3:10.2f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
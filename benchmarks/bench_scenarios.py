@@ -0,0 +1,163 @@
+"""Scenario benchmark suite: headless ticks/s and offscreen frames/s.
+
+    python -m benchmarks.bench_scenarios [--scenario chase_1k ...] [--render]
+                                         [--out results.json] [--compare old.json]
+
+Every scenario in :mod:`benchmarks.scenarios` is warmed up and then
+ticked ``--ticks`` times with only ``Game.tick`` on the clock.  With
+``--render`` the same scenario is also drawn ``--frames`` times through
+``Project``'s drawing code into an EGL pbuffer (no window needed); each
+frame ends with ``glFinish`` so GPU time is included.  HUD text needs a
+GLUT window and is left out.  Results go to a JSON file that
+``--compare`` can diff against a later run.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from pacman import sim
+from pacman.replay import summarize
+
+from .scenarios import SCENARIOS
+
+WIDTH, HEIGHT = 1000, 800
+
+
+def bench_sim(scenario, ticks, warmup, seed, backend):
+    game = scenario.make_game(seed, backend)
+    for _ in range(warmup):
+        scenario.prepare_tick(game)
+        game.tick()
+    times = []
+    clock = time.perf_counter
+    for _ in range(ticks):
+        scenario.prepare_tick(game)
+        t0 = clock()
+        game.tick()
+        times.append(clock() - t0)
+    st = summarize(times)
+    st["ticks_per_s"] = ticks / max(sum(times), 1e-12)
+    st["bullets"] = len(game.bullets)
+    st["enemies"] = sum(1 for e in game.enemies if e.alive)
+    return st
+
+
+def bench_render(scenario, frames, warmup, seed, backend, camera_mode):
+    import Project as P
+    from OpenGL.GL import (GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST,
+                           glClear, glClearColor, glEnable, glFinish, glLoadIdentity, glViewport)
+
+    game = scenario.make_game(seed, backend)
+    P.game = P.world = P.world_maze = game
+    game.camera_mode = camera_mode
+    glClearColor(0.02, 0.02, 0.05, 1.0)
+    glEnable(GL_DEPTH_TEST)
+
+    def frame():
+        # Project.showScreen without the HUD and the buffer swap
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        glViewport(0, 0, WIDTH, HEIGHT)
+        P.setupCamera()
+        P.draw_floor_plane()
+        P.draw_shapes()
+        glFinish()
+
+    times = []
+    clock = time.perf_counter
+    for i in range(warmup + frames):
+        scenario.prepare_tick(game)
+        game.tick()
+        P.render_alpha = 1.0
+        t0 = clock()
+        frame()
+        if i >= warmup:
+            times.append(clock() - t0)
+    st = summarize(times)
+    st["fps"] = frames / max(sum(times), 1e-12)
+    st["camera"] = {sim.CAM_TOP: "top", sim.CAM_THIRD: "third", sim.CAM_FIRST: "first"}[camera_mode]
+    return st
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results, baseline):
+    print(f"\n{'scenario':<18} {'metric':<12} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, now in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        for section, key in (("sim", "ticks_per_s"), ("render", "fps")):
+            if section in now and section in old:
+                a, b = old[section][key], now[section][key]
+                print(f"{name:<18} {key:<12} {a:10.1f} {b:10.1f} {(b / a - 1) * 100:+7.1f}%")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                    help="run only these (repeatable); default: all")
+    ap.add_argument("--ticks", type=int, default=600)
+    ap.add_argument("--frames", type=int, default=120)
+    ap.add_argument("--warmup", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--backend", choices=sim.ENTITY_BACKENDS, default="objects")
+    ap.add_argument("--render", action="store_true", help="also measure offscreen frames/s")
+    ap.add_argument("--camera", choices=("top", "third", "first"), default="top")
+    ap.add_argument("--out", metavar="FILE", help="write results as JSON")
+    ap.add_argument("--compare", metavar="FILE", help="print changes against an earlier --out file")
+    args = ap.parse_args(argv)
+
+    if args.render:
+        from . import offscreen
+        offscreen.use_egl()
+        offscreen.make_context(WIDTH, HEIGHT)
+    camera = {"top": sim.CAM_TOP, "third": sim.CAM_THIRD, "first": sim.CAM_FIRST}[args.camera]
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        scenario = SCENARIOS[name]
+        res = results[name] = {"description": scenario.description}
+        res["sim"] = st = bench_sim(scenario, args.ticks, args.warmup, args.seed, args.backend)
+        print(f"{name:<18} sim    {st['ticks_per_s']:10.1f} ticks/s  p50 {st['p50']:.3f}  "
+              f"p95 {st['p95']:.3f}  p99 {st['p99']:.3f} ms  "
+              f"({st['enemies']} enemies, {st['bullets']} bullets)")
+        if args.render:
+            res["render"] = st = bench_render(scenario, args.frames, min(args.warmup, 10),
+                                              args.seed, args.backend, camera)
+            print(f"{name:<18} render {st['fps']:10.1f} fps      p50 {st['p50']:.3f}  "
+                  f"p95 {st['p95']:.3f}  p99 {st['p99']:.3f} ms")
+
+    doc = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "seed": args.seed,
+            "ticks": args.ticks,
+            "frames": args.frames if args.render else 0,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(doc, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Windowless GL context for render benchmarks.
+
+Creates an EGL pbuffer surface with a desktop OpenGL (compatibility)
+context, so ``Project``'s drawing code can run without GLUT or a display
+(e.g. on Mesa's surfaceless platform).  PyOpenGL picks its platform when
+first imported, so :func:`use_egl` must run before anything imports
+``OpenGL``.
+"""
+import ctypes
+import os
+
+
+def use_egl():
+    os.environ["PYOPENGL_PLATFORM"] = "egl"
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+
+class OffscreenError(RuntimeError):
+    pass
+
+
+def make_context(width, height):
+    """Create and make current a ``width`` x ``height`` context; returns (display, surface, context)."""
+    from OpenGL import EGL
+
+    dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if dpy == EGL.EGL_NO_DISPLAY or not EGL.eglInitialize(dpy, None, None):
+        raise OffscreenError("no EGL display available")
+
+    attrs = (EGL.EGLint * 13)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_DEPTH_SIZE, 24,
+        EGL.EGL_NONE)
+    cfg = EGL.EGLConfig()
+    n = EGL.EGLint()
+    if not EGL.eglChooseConfig(dpy, attrs, ctypes.pointer(cfg), 1, ctypes.pointer(n)) or n.value < 1:
+        raise OffscreenError("no EGL config with desktop OpenGL and a pbuffer")
+
+    surf = EGL.eglCreatePbufferSurface(
+        dpy, cfg, (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+    if not EGL.eglBindAPI(EGL.EGL_OPENGL_API):
+        raise OffscreenError("EGL cannot bind the desktop OpenGL API")
+    ctx = EGL.eglCreateContext(dpy, cfg, EGL.EGL_NO_CONTEXT, None)
+    if ctx == EGL.EGL_NO_CONTEXT or not EGL.eglMakeCurrent(dpy, surf, surf, ctx):
+        raise OffscreenError("could not create an EGL OpenGL context")
+    return dpy, surf, ctx
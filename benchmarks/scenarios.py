@@ -0,0 +1,112 @@
+"""Scripted game scenarios for the benchmark suite.
+
+Each scenario seeds a game, fills it through the normal spawn functions
+(``spawn_enemy``/``spawn_power``/``spawn_obstacle``) and optionally
+pokes it before every tick to keep the load steady.  Pac-Man follows a
+fixed movement script and god mode is on, so every run of a scenario
+does the same work for as long as it is measured.
+"""
+import math
+
+from pacman import sim
+
+
+class Scenario:
+    def __init__(self, name, description, setup, before_tick=None, size=None):
+        self.name = name
+        self.description = description
+        self.setup = setup                # setup(game), once after creation
+        self.before_tick = before_tick    # before_tick(game), untimed, before every tick
+        self.size = size                  # maze (w, h); None for the default
+
+    def make_game(self, seed=1, backend="objects"):
+        game = sim.Game(seed, backend, self.size)
+        game.god_mode = True
+        self.setup(game)
+        return game
+
+    def prepare_tick(self, game):
+        drive(game)
+        if self.before_tick is not None:
+            self.before_tick(game)
+
+
+def drive(game):
+    """Fixed movement script: forward/back with periodic turns."""
+    t = game.frame
+    game.pac.mv = 1 if (t // 200) % 3 else -1
+    game.pac.turn = 1 if (t // 90) % 4 == 0 else 0
+
+
+def fill(spawn, game, n):
+    for _ in range(n):
+        if spawn(game) is None:
+            break
+
+
+# --- baseline: the game as it plays by itself ---
+
+def setup_baseline(game):
+    game.activate_auto_shoot()
+
+
+def rearm_auto_shoot(game):
+    game.activate_auto_shoot()
+
+
+# --- 1k enemies chasing Pac-Man ---
+
+def setup_chase(game):
+    fill(sim.spawn_enemy, game, 1000)
+    fill(sim.spawn_power, game, 20)
+
+
+# --- 10k bullets in flight, auto-shoot on top ---
+
+STORM_BULLETS = 10_000
+
+
+def setup_storm(game):
+    fill(sim.spawn_enemy, game, 200)
+    refill_storm(game)
+
+
+def refill_storm(game):
+    game.activate_auto_shoot()
+    # a spiral of shots keeps the bullet count topped up
+    n = len(game.bullets)
+    pac = game.pac
+    for k in range(STORM_BULLETS - n):
+        a = (game.frame * 37 + k) * 0.61803398875 * 2.0 * math.pi
+        pac.fire(game, (math.cos(a), math.sin(a)))
+
+
+# --- every floor cell of a large maze churned by obstacles ---
+
+CHURN_PERIOD = 30   # ticks between clearing the rubble and dropping a new wave
+CHURN_SIZE = (200, 200)
+
+
+def setup_churn(game):
+    drop_wave(game)
+
+
+def drop_wave(game):
+    fill(sim.spawn_obstacle, game, game.maze.w * game.maze.h)
+
+
+def churn(game):
+    if game.frame % CHURN_PERIOD == 0:
+        game.key_down(b'x')      # the clear-rubble cheat, through set_cell
+        drop_wave(game)
+    if game.frame % 120 == 0:
+        fill(sim.spawn_enemy, game, 20)
+
+
+SCENARIOS = {s.name: s for s in (
+    Scenario("baseline", "default game with auto-shoot kept on", setup_baseline, rearm_auto_shoot),
+    Scenario("chase_1k", "1000 enemies chasing along the flow field", setup_chase),
+    Scenario("bullet_storm_10k", "10k bullets kept in flight against 200 enemies", setup_storm, refill_storm),
+    Scenario("obstacle_churn", "obstacles dropped on every free cell of a 200x200 maze, rubble "
+             f"cleared every {CHURN_PERIOD} ticks", setup_churn, churn, CHURN_SIZE),
+)}
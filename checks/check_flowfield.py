@@ -0,0 +1,66 @@
+"""Check that the flow field's in-place patches match a full rebuild.
+
+    python -m checks.check_flowfield [--trials 40] [--edits 60]
+
+Each trial points a game's flow field at a random cell, then applies a
+random sequence of maze edits through ``Game.set_cell`` -- floor to rubble
+and wall, rubble and wall back to floor -- with the occasional retarget
+in between.  After every edit the patched distances must equal those of
+a fresh :class:`~pacman.flowfield.FlowField` rebuilt from scratch with
+the same target and radius.  Exits non-zero on any mismatch.
+"""
+import argparse
+import random
+import sys
+
+from pacman.flowfield import FlowField
+from pacman.grid import FLOOR, RUBBLE, WALL
+from pacman.sim import Game
+
+# (maze size, search radius): the default maze, a larger one with radii
+# small enough to cut searches short and one too big to matter
+CASES = [(None, None), ((61, 45), 3), ((61, 45), 8), ((61, 45), 20), ((61, 45), 200)]
+
+
+def run(trials, edits, rng):
+    checked = mismatches = 0
+    for size, radius in CASES:
+        for trial in range(trials):
+            game = Game(rng.randrange(1 << 30), size=size)
+            flow, maze = game.flow, game.maze
+            h, w = maze.h, maze.w
+            if radius is not None:
+                flow.radius = radius
+            flow.retarget(rng.randint(1, h - 2), rng.randint(1, w - 2))
+            for k in range(edits):
+                r, c = rng.randint(1, h - 2), rng.randint(1, w - 2)
+                if maze.get(r, c) == FLOOR:
+                    game.set_cell(r, c, rng.choice((RUBBLE, WALL)))
+                else:
+                    game.set_cell(r, c, FLOOR)
+                if rng.random() < 0.05:
+                    flow.retarget(rng.randint(1, h - 2), rng.randint(1, w - 2))
+                ref = FlowField(maze, w, h, flow.radius)
+                ref.retarget(*flow.target)
+                checked += 1
+                if ref.dist != flow.dist:
+                    mismatches += 1
+                    print(f"size {size} radius {radius} trial {trial} edit {k} ({r}, {c}): "
+                          f"{sum(a != b for a, b in zip(ref.dist, flow.dist))} cells differ")
+                    break
+    return checked, mismatches
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--trials", type=int, default=40)
+    ap.add_argument("--edits", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args(argv)
+    checked, mismatches = run(args.trials, args.edits, random.Random(args.seed))
+    print(f"{checked} edits checked, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Check that auto-shoot's hashed nearest-enemy query matches a linear scan.
+
+    python -m checks.check_nearest [--backend numpy] [--ticks 40]
+
+Games of several sizes and enemy densities are ticked with Pac-Man
+turning in circles; after every tick ``Game.nearest_enemy`` is compared
+with ``min()`` over the live enemies, with and without the line-of-sight
+rule.  Exits non-zero on any mismatch.
+"""
+import argparse
+import sys
+
+from pacman.sim import ENTITY_BACKENDS, Game, spawn_enemy
+
+# (maze size, enemies): sparse big mazes, the standard maze, crowds
+CASES = [((501, 501), 10), ((21, 21), 5), ((101, 101), 40), (None, 300), (None, 3000)]
+
+
+def linear_nearest(game):
+    pac = game.pac
+    los = game.maze.line_of_sight
+    live = [e for e in game.enemies
+            if e.alive and (not game.auto_shoot_los or los(pac.x, pac.y, e.x, e.y))]
+    return min(live, key=lambda e: (e.x - pac.x) ** 2 + (e.y - pac.y) ** 2, default=None)
+
+
+def run(backend, ticks, seeds):
+    queries = mismatches = 0
+    for size, enemies in CASES:
+        for seed in range(seeds):
+            game = Game(seed, backend, size)
+            game.god_mode = True
+            for _ in range(enemies):
+                spawn_enemy(game)
+            for _ in range(ticks):
+                game.pac.mv, game.pac.turn = 1, 1
+                game.tick()
+                for los in (False, True):
+                    game.auto_shoot_los = los
+                    got, want = game.nearest_enemy(), linear_nearest(game)
+                    queries += 1
+                    if got is not want and (got is None or want is None
+                                            or (got.x, got.y) != (want.x, want.y)):
+                        mismatches += 1
+                        print(f"size {size} enemies {enemies} seed {seed} frame {game.frame} "
+                              f"los {los}: got {got and (got.x, got.y)}, want {want and (want.x, want.y)}")
+    return queries, mismatches
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--backend", choices=ENTITY_BACKENDS, default="objects")
+    ap.add_argument("--ticks", type=int, default=40)
+    ap.add_argument("--seeds", type=int, default=3)
+    args = ap.parse_args(argv)
+    queries, mismatches = run(args.backend, args.ticks, args.seeds)
+    print(f"{queries} queries, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
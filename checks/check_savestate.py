@@ -0,0 +1,79 @@
+"""Check that a restored save state plays on exactly like the original game.
+
+    python -m checks.check_savestate [--backend numpy] [--games 4] [--ticks 1500]
+
+Each game is played for ``--ticks`` ticks of random input (movement,
+abilities, extra enemies and obstacles) and saved.  The original then
+plays a further ``--ticks`` of scripted input; the same script is played
+on a fresh game the state was restored into, and on the original rewound
+to the save.  All three must end in the same state, and saving right
+after a restore must give back the same bytes.  Exits non-zero on any
+mismatch.
+"""
+import argparse
+import random
+import sys
+
+from checks.check_replay import fingerprint
+from pacman import savestate
+from pacman.sim import ENTITY_BACKENDS, Game, spawn_enemy, spawn_obstacle
+
+
+def make_script(rng, ticks):
+    """One (mv, turn, speed boost, auto-shoot, spawn enemy, spawn obstacle) per tick."""
+    return [(rng.choice((-1, 0, 1, 1)), rng.choice((-1, 0, 0, 1)), rng.random() < 0.01,
+             rng.random() < 0.02, rng.random() < 0.02, rng.random() < 0.01)
+            for _ in range(ticks)]
+
+
+def play(game, script):
+    for mv, turn, boost, shoot, enemy, obstacle in script:
+        game.pac.mv, game.pac.turn = mv, turn
+        if boost:
+            game.activate_speed_boost()
+        if shoot:
+            game.activate_auto_shoot()
+        if enemy:
+            spawn_enemy(game)
+        if obstacle:
+            spawn_obstacle(game)
+        game.tick()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--backend", choices=ENTITY_BACKENDS, default="objects")
+    ap.add_argument("--games", type=int, default=4)
+    ap.add_argument("--ticks", type=int, default=1500)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for k in range(args.games):
+        game = Game(args.seed + k, args.backend)
+        game.god_mode = True
+        play(game, make_script(rng, args.ticks))
+        blob = savestate.save(game)
+        script = make_script(rng, args.ticks)
+        play(game, script)
+        want = fingerprint(game)
+
+        fresh = Game(args.seed + k + 1000, args.backend)
+        savestate.restore(fresh, blob)
+        same_bytes = savestate.save(fresh) == blob
+        play(fresh, script)
+        savestate.restore(game, blob)
+        play(game, script)
+
+        ok = same_bytes and fingerprint(fresh) == want and fingerprint(game) == want
+        mismatches += not ok
+        print(f"game {k}: {len(blob)} bytes, {len(game.enemies)} enemies, "
+              f"{'match' if ok else 'MISMATCH'}"
+              f"{'' if same_bytes else ' (re-save differs)'}")
+    print(f"{args.games} games, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
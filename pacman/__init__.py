@@ -0,0 +1 @@
+"""Game logic for 3D Pac-Man, importable without an OpenGL context."""
@@ -0,0 +1,76 @@
+"""Fixed-timestep clock for driving :class:`pacman.sim.Game`.
+
+The game's speeds (``MOVE_STEP``, ``ENEMY_STEP`` ...) are "per tick", so the
+simulation has to tick at a constant rate no matter how fast frames are
+drawn.  :class:`FixedStepClock` turns wall-clock time into a whole number of
+ticks to run plus an interpolation factor for rendering between the last two
+ticks.
+"""
+import time
+
+TICK_HZ = 60
+RENDER_FPS_CAP = 60          # 0 draws as fast as the timer allows
+MAX_CATCHUP_TICKS = 5        # ticks run per frame before time is dropped
+
+
+class FixedStepClock:
+    def __init__(self, hz=TICK_HZ, max_catchup=MAX_CATCHUP_TICKS, now=time.perf_counter):
+        self.dt = 1.0 / hz
+        self.max_catchup = max_catchup
+        self.now = now
+        self.last = now()
+        self.acc = 0.0
+        self.dropped_ticks = 0
+
+    def advance(self):
+        """Return how many ticks are due since the last call.
+
+        At most ``max_catchup`` ticks are returned; if the machine fell
+        further behind than that the extra time is dropped (and counted in
+        ``dropped_ticks``) so a slow frame cannot snowball into ever longer
+        catch-up frames.
+        """
+        t = self.now()
+        self.acc += t - self.last
+        self.last = t
+
+        n = int(self.acc / self.dt)
+        if n > self.max_catchup:
+            self.dropped_ticks += n - self.max_catchup
+            n = self.max_catchup
+            self.acc = 0.0
+        else:
+            self.acc -= n * self.dt
+        return n
+
+    @property
+    def alpha(self):
+        """Fraction of a tick elapsed since the last tick, for interpolation."""
+        return min(1.0, self.acc / self.dt)
+
+    def time_to_next_tick(self):
+        return max(0.0, self.dt - self.acc - (self.now() - self.last))
+
+
+class FrameLimiter:
+    """Sleeps the caller so frames are not drawn faster than ``fps``."""
+
+    def __init__(self, fps=RENDER_FPS_CAP, now=time.perf_counter):
+        self.period = 1.0 / fps if fps else 0.0
+        self.now = now
+        self.next_frame = now()
+
+    def delay(self):
+        """Seconds until the next frame is due (0 if already late)."""
+        if not self.period:
+            return 0.0
+        t = self.now()
+        if t - self.next_frame > self.period:
+            # fell well behind; resync instead of bursting frames
+            self.next_frame = t
+        self.next_frame += self.period
+        return max(0.0, self.next_frame - t)
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
@@ -0,0 +1,182 @@
+"""Shared distance-to-Pac-Man field for enemy pathfinding.
+
+One breadth-first search from Pac-Man's cell gives every floor cell its
+step distance to him.  An enemy then only has to look at the four cells
+around it and walk towards the smallest distance, so chasing costs the
+same per enemy however many there are, and enemies route around walls
+instead of pushing into them.
+
+The field is rebuilt only when Pac-Man moves to another cell.  Single
+cell edits (an obstacle landing, the ``X`` cheat clearing rubble) are
+patched in place by :meth:`FlowField.cell_changed`.
+
+With a ``radius`` the search stops that many steps out, so on large
+mazes a rebuild only touches the cells near Pac-Man; cells beyond it
+stay at ``INF`` and enemies there head straight for him.
+"""
+import heapq
+from collections import deque
+
+INF = 1 << 30
+
+
+class FlowField:
+    def __init__(self, maze, w, h, radius=None):
+        self.maze = maze       # a grid.MazeGrid; only its passability bitmap is read
+        self.w, self.h = w, h
+        self.radius = INF - 1 if radius is None else radius
+        self.dist = [INF] * (w * h)
+        self.touched = []      # cells given a distance since the last rebuild
+        self.target = None
+        self.version = 0       # bumped whenever any distance changes
+        self.full_rebuilds = 0
+        self.patches = 0
+
+    def _open(self, i):
+        return self.maze.open[i] == 1
+
+    def _neighbours(self, i):
+        w = self.w
+        c = i % w
+        if c > 0:
+            yield i - 1
+        if c < w - 1:
+            yield i + 1
+        if i >= w:
+            yield i - w
+        if i < w * (self.h - 1):
+            yield i + w
+
+    def retarget(self, r, c):
+        """Point the field at cell (r, c); a no-op if it already is."""
+        if (r, c) == self.target:
+            return
+        self.target = (r, c)
+        self.rebuild()
+
+    def rebuild(self):
+        # reset only what the last search reached instead of the whole maze
+        dist = self.dist
+        for i in self.touched:
+            dist[i] = INF
+        touched = self.touched = []
+        self.version += 1
+        self.full_rebuilds += 1
+        if self.target is None:
+            return
+        r, c = self.target
+        if not (0 <= r < self.h and 0 <= c < self.w):
+            return
+
+        src = r * self.w + c
+        dist[src] = 0
+        touched.append(src)
+        q = deque([src])
+        open_ = self.maze.open
+        radius = self.radius
+        while q:
+            i = q.popleft()
+            d = dist[i] + 1
+            if d > radius:
+                continue
+            for j in self._neighbours(i):
+                if dist[j] > d and open_[j]:
+                    dist[j] = d
+                    touched.append(j)
+                    q.append(j)
+
+    def cell_changed(self, r, c):
+        """Patch the field after cell (r, c) of the maze was edited."""
+        if self.target is None:
+            return
+        if (r, c) == self.target:
+            self.rebuild()
+            return
+        i = r * self.w + c
+        self.patches += 1
+        self.version += 1
+        if self._open(i):
+            self._opened(i)
+        else:
+            self._blocked(i)
+
+    def _opened(self, i):
+        # distances can only shrink: relax outwards from the new cell
+        dist = self.dist
+        best = min((dist[j] for j in self._neighbours(i)), default=INF)
+        if best >= self.radius:
+            return
+        dist[i] = best + 1
+        self.touched.append(i)
+        self._relax([(dist[i], i)])
+
+    def _blocked(self, i):
+        dist = self.dist
+        d0 = dist[i]
+        dist[i] = INF
+        if d0 >= INF:
+            return
+
+        # cells that lose their only route lie "downhill" of the blocked
+        # cell; walk them in distance order and keep those with no other
+        # neighbour one step closer to the target
+        lost = {i}
+        frontier = [i]
+        while frontier:
+            nxt = []
+            for k in frontier:
+                dk = d0 if k == i else dist[k]
+                for j in self._neighbours(k):
+                    if j in lost or dist[j] != dk + 1:
+                        continue
+                    dj = dist[j]
+                    if any(dist[m] == dj - 1 and m not in lost for m in self._neighbours(j)):
+                        continue
+                    lost.add(j)
+                    nxt.append(j)
+            frontier = nxt
+        lost.discard(i)
+
+        for j in lost:
+            dist[j] = INF
+        seeds = []
+        for j in lost:
+            best = min((dist[m] for m in self._neighbours(j)), default=INF)
+            if best < self.radius:
+                dist[j] = best + 1
+                seeds.append((dist[j], j))
+        self._relax(seeds)
+
+    def _relax(self, seeds):
+        dist, open_ = self.dist, self.maze.open
+        touched, radius = self.touched, self.radius
+        heapq.heapify(seeds)
+        while seeds:
+            d, i = heapq.heappop(seeds)
+            if d != dist[i]:
+                continue
+            d += 1
+            if d > radius:
+                continue
+            for j in self._neighbours(i):
+                if dist[j] > d and open_[j]:
+                    dist[j] = d
+                    touched.append(j)
+                    heapq.heappush(seeds, (d, j))
+
+    def next_cell(self, r, c):
+        """Neighbouring cell one step closer to the target, or ``None``.
+
+        ``None`` means (r, c) is the target itself or cannot reach it.
+        """
+        if not (0 <= r < self.h and 0 <= c < self.w):
+            return None
+        i = r * self.w + c
+        dist = self.dist
+        best, best_j = dist[i], None
+        for j in self._neighbours(i):
+            if dist[j] < best:
+                best, best_j = dist[j], j
+        if best_j is None:
+            return None
+        return divmod(best_j, self.w)
@@ -0,0 +1,65 @@
+"""Index of free floor cells for O(1) random spawn placement.
+
+Keeps the flat indices (``r * w + c``) of every floor cell in a dense
+array plus each cell's slot in it, so adding, removing and drawing a
+uniformly random cell are all constant time.  Cells that must not be
+picked this time (e.g. the ones around Pac-Man) are swapped to the end of
+the array before sampling, which keeps the draw exactly uniform over the
+remaining cells without rejection loops.
+"""
+from array import array
+
+
+class FreeCellIndex:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+        self.cells = array("i")
+        self.slot = array("i", [-1]) * (w * h)
+
+    def rebuild(self, maze, value):
+        """Index every cell of ``maze`` (a MazeGrid) holding ``value``."""
+        self.cells = array("i", (i for i, v in enumerate(maze.cells) if v == value))
+        slot = self.slot = array("i", [-1]) * (self.w * self.h)
+        for k, i in enumerate(self.cells):
+            slot[i] = k
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, i):
+        return self.slot[i] >= 0
+
+    def add(self, i):
+        if self.slot[i] >= 0:
+            return
+        self.slot[i] = len(self.cells)
+        self.cells.append(i)
+
+    def discard(self, i):
+        k = self.slot[i]
+        if k < 0:
+            return
+        last = self.cells.pop()
+        if last != i:
+            self.cells[k] = last
+            self.slot[last] = k
+        self.slot[i] = -1
+
+    def _swap(self, a, b):
+        cells, slot = self.cells, self.slot
+        ca, cb = cells[a], cells[b]
+        cells[a], cells[b] = cb, ca
+        slot[cb], slot[ca] = a, b
+
+    def sample(self, rng, exclude=()):
+        """A uniformly random indexed cell not in ``exclude``, or ``None``."""
+        end = len(self.cells)
+        slot = self.slot
+        for i in exclude:
+            k = slot[i]
+            if 0 <= k < end:
+                end -= 1
+                self._swap(k, end)
+        if end == 0:
+            return None
+        return self.cells[rng.randrange(end)]
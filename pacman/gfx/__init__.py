@@ -0,0 +1,5 @@
+"""OpenGL drawing helpers used by ``Project.py``.
+
+Unlike the rest of :mod:`pacman` these modules talk to GL, and their GL
+calls need a current context; building geometry does not.
+"""
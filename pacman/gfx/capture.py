@@ -0,0 +1,261 @@
+"""Recording frames without stalling the pipeline.
+
+``glReadPixels`` straight into client memory makes the CPU wait until the
+GPU has finished the frame.  :class:`FrameCapture` instead has the frame
+drawn into its own framebuffer object, blits that to the window, and
+starts an asynchronous read into one of a ring of pixel buffer objects,
+guarded by a fence.  A few frames later, when the fence reports the copy
+is done, the buffer is mapped and its bytes are handed to a
+:class:`FrameWriter` thread, which flips and encodes them off the render
+thread.  The render thread only waits if every buffer in the ring is
+still in flight (counted in ``stalls``).  Pixels are read as RGBA, the
+layout drivers can copy without converting; the alpha byte means nothing.
+
+:class:`FrameWriter` writes either one raw ``frames.rgb0`` stream
+(top-down, e.g. ``ffmpeg -f rawvideo -pix_fmt rgb0 -s 1000x800 -r 60 -i
+frames.rgb0 out.mp4``) or a ``frame_000000.png`` RGB sequence.
+"""
+import ctypes
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _read_pixels
+
+RING = 3             # pixel buffers in flight
+QUEUE_FRAMES = 8     # frames waiting for the writer before the render thread blocks
+FORMATS = ("raw", "png")
+
+
+# --- encoding ---
+
+def flip_rows(data, width, height, channels=4):
+    """GL's bottom-up rows -> top-down."""
+    stride = width * channels
+    return b"".join(data[i:i + stride] for i in range((height - 1) * stride, -1, -stride))
+
+
+def _chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def strip_alpha(data):
+    """RGBA bytes -> RGB bytes."""
+    rgb = bytearray(len(data) // 4 * 3)
+    for k in range(3):
+        rgb[k::3] = data[k::4]
+    return rgb
+
+
+def encode_png(rows, width, height, level=1):
+    """Top-down RGB24 ``rows`` -> PNG bytes (no filtering; zlib does the work)."""
+    stride = width * 3
+    raw = b"".join(b"\0" + rows[i:i + stride] for i in range(0, height * stride, stride))
+    return (b"\x89PNG\r\n\x1a\n"
+            + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + _chunk(b"IDAT", zlib.compress(raw, level))
+            + _chunk(b"IEND", b""))
+
+
+class FrameWriter(threading.Thread):
+    """Encodes and writes captured frames to ``out_dir`` on its own thread."""
+
+    def __init__(self, out_dir, width, height, fmt="raw", queue_frames=QUEUE_FRAMES):
+        super().__init__(name="frame-writer", daemon=True)
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown capture format {fmt!r}; expected one of {FORMATS}")
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.width, self.height = width, height
+        self.fmt = fmt
+        self.inbox = queue.Queue(queue_frames)
+        self.stream = open(os.path.join(out_dir, "frames.rgb0"), "wb") if fmt == "raw" else None
+        self.written = 0
+        self.write_times = []
+        self.waits = 0           # puts that found the queue full
+
+    def put(self, index, data):
+        """Queue frame ``index`` (bottom-up RGBA bytes); blocks while the queue is full."""
+        try:
+            self.inbox.put_nowait((index, data))
+        except queue.Full:
+            self.waits += 1
+            self.inbox.put((index, data))
+
+    def close(self):
+        self.inbox.put(None)
+        if self.is_alive():
+            self.join()
+        if self.stream is not None:
+            self.stream.close()
+
+    def run(self):
+        w, h = self.width, self.height
+        while True:
+            item = self.inbox.get()
+            if item is None:
+                break
+            index, data = item
+            t0 = time.perf_counter()
+            rows = flip_rows(data, w, h)
+            if self.stream is not None:
+                self.stream.write(rows)
+            else:
+                with open(os.path.join(self.out_dir, f"frame_{index:06d}.png"), "wb") as f:
+                    f.write(encode_png(strip_alpha(rows), w, h))
+            self.written += 1
+            self.write_times.append(time.perf_counter() - t0)
+
+
+# --- readback ---
+
+class _Slot:
+    __slots__ = ("pbo", "fence", "index")
+
+    def __init__(self, pbo):
+        self.pbo = pbo
+        self.fence = None
+        self.index = None
+
+
+class FrameCapture:
+    """Renders frames into an FBO and reads them back through a PBO ring.
+
+    Call :meth:`begin` before drawing a frame and :meth:`end` before
+    swapping buffers; :meth:`close` collects the frames still in flight
+    and waits for the writer, so call it while the window still exists
+    (not from ``atexit``: GLUT leaves through C ``exit()``).  GL objects are
+    created on the first :meth:`begin`.  With ``show`` off, frames are
+    only recorded, not copied to the window.
+    """
+
+    def __init__(self, writer, width, height, ring=RING, show=True):
+        self.writer = writer
+        self.width, self.height = width, height
+        self.size = width * height * 4
+        self.ring = ring
+        self.show = show
+        self.fbo = None
+        self.renderbuffers = ()
+        self.slots = []
+        self.pending = []        # slots with a read in flight, oldest first
+        self.head = 0
+        self.fences = None       # decided on first use, needs a GL context
+        self.frames = 0
+        self.stalls = 0          # frames that had to wait for the oldest read
+        self.lost = 0            # frames still in flight when closed without a context
+        self.end_times = []
+
+    def _init_gl(self):
+        self.fences = bool(glFenceSync) and bool(glClientWaitSync)
+        self.fbo = glGenFramebuffers(1)
+        color, depth = glGenRenderbuffers(2)
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glBindRenderbuffer(GL_RENDERBUFFER, depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"capture framebuffer incomplete (status 0x{status:x})")
+        self.renderbuffers = (color, depth)
+
+        for _ in range(self.ring):
+            pbo = glGenBuffers(1)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+            self.slots.append(_Slot(pbo))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+
+    def begin(self):
+        if self.fences is None:
+            self._init_gl()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+    def end(self):
+        """Show the frame in the window and start reading it back."""
+        t0 = time.perf_counter()
+        w, h = self.width, self.height
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        if self.show:
+            glBlitFramebuffer(0, 0, w, h, 0, 0, w, h, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+
+        slot = self.slots[self.head]
+        if slot.index is not None:
+            # every buffer is still in flight: wait for this one, the oldest
+            self.stalls += 1
+            self._collect(True)
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, slot.pbo)
+        _read_pixels(0, 0, w, h, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if self.fences:
+            slot.fence = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        slot.index = self.frames
+        self.pending.append(slot)
+        self.frames += 1
+        self.head = (self.head + 1) % len(self.slots)
+
+        # hand over whatever has finished, in order
+        while self.pending and self._collect(False):
+            pass
+        self.end_times.append(time.perf_counter() - t0)
+
+    def _collect(self, wait):
+        """Pass the oldest pending frame to the writer; False if it is not ready and ``wait`` is off."""
+        slot = self.pending[0]
+        if slot.fence is not None:
+            result = glClientWaitSync(slot.fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1_000_000_000 if wait else 0)
+            if result == GL_TIMEOUT_EXPIRED and not wait:
+                return False
+            glDeleteSync(slot.fence)
+            slot.fence = None
+        elif not wait:
+            # no fences: only read a buffer once the ring comes back round to it
+            return False
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, slot.pbo)
+        ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.size, GL_MAP_READ_BIT)
+        data = ctypes.string_at(ptr, self.size)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending.pop(0)
+        index, slot.index = slot.index, None
+        self.writer.put(index, data)
+        return True
+
+    def close(self, drain=True):
+        """Hand over the frames still in flight (needs the GL context) and wait for the writer.
+
+        With ``drain`` off, e.g. once the context is gone, those frames
+        are dropped (counted in ``lost``) and only the writer is finished.
+        """
+        if drain:
+            while self.pending:
+                self._collect(True)
+        else:
+            self.lost += len(self.pending)
+            self.pending = []
+        self.writer.close()
+
+    def release(self):
+        for slot in self.slots:
+            if slot.fence is not None:
+                glDeleteSync(slot.fence)
+        if self.slots:
+            glDeleteBuffers(len(self.slots), [slot.pbo for slot in self.slots])
+        if self.fbo is not None:
+            glDeleteFramebuffers(1, [self.fbo])
+            glDeleteRenderbuffers(2, list(self.renderbuffers))
+        self.slots, self.pending, self.fbo, self.renderbuffers = [], [], None, ()
+        self.fences = None
@@ -0,0 +1,194 @@
+"""Maze geometry cut into fixed-size chunks.
+
+Large mazes cannot be baked into one buffer up front, and scanning every
+cell per frame for rubble does not scale either.  :class:`MazeChunks`
+splits the maze into ``CHUNK`` x ``CHUNK`` cell blocks.  Each block gets
+two vertex buffers, built the first time it comes into view:
+
+* walls (``GL_T2F_C3F_V3F``, see :func:`walls.build_wall_quads`), which
+  only change on ``Game.reset()``;
+* the block's rubble tiles and landed obstacle cubes (``GL_C3F_V3F``),
+  rebuilt when the game reports a change to one of its cells through
+  ``game.cell_listeners``.
+
+Each frame only the blocks inside the view frustum are drawn, so frame
+time follows what the camera sees rather than the size of the maze.
+"""
+from array import array
+
+from OpenGL.GL import *
+
+from ..grid import RUBBLE, WALL
+from .cubes import cube_vertices
+from .walls import STRIDE as WALL_STRIDE
+from .walls import build_wall_quads, make_checker_texture, pack_quads
+
+CHUNK = 16           # cells per chunk side
+DYN_STRIDE = 6       # floats per vertex for GL_C3F_V3F
+
+
+class _Chunk:
+    __slots__ = ("walls_vbo", "walls_count", "dyn_vbo", "dyn_count", "dirty")
+
+    def __init__(self):
+        self.walls_vbo = self.dyn_vbo = None
+        self.walls_count = self.dyn_count = 0
+        self.dirty = True
+
+
+def _upload(vbo, data):
+    if vbo is None:
+        vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, len(data) * data.itemsize, data.tobytes(), GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    return vbo
+
+
+class MazeChunks:
+    """``outer``/``inner`` are ``(height, (r, g, b))`` for border and inner walls."""
+
+    def __init__(self, outer, inner, shades=(0.85, 0.65), rubble=(0.25, 0.25, 0.25),
+                 obstacle=(0.4, 0.0, 0.0), obstacle_size=16.0, chunk=CHUNK):
+        self.outer, self.inner, self.shades = outer, inner, shades
+        self.rubble, self.obstacle, self.obstacle_size = rubble, obstacle, obstacle_size
+        self.chunk = chunk
+        self.top = max(outer[0], inner[0], obstacle_size)
+        self.game = None
+        self.version = None
+        self.chunks = {}      # (chunk row, chunk col) -> _Chunk, only those built so far
+        self.texture = None
+        self.built = 0        # chunk buffers (re)built, for tuning
+
+    # --- keeping up with the game ---
+
+    def sync(self, game):
+        """Follow ``game``; forget every chunk after a reset or a new game."""
+        if game is not self.game:
+            if self.game is not None and self._cell_changed in self.game.cell_listeners:
+                self.game.cell_listeners.remove(self._cell_changed)
+            game.cell_listeners.append(self._cell_changed)
+            self.game = game
+            self.version = None
+        if self.version != game.walls_version:
+            self.release_chunks()
+            self.version = game.walls_version
+
+    def _cell_changed(self, r, c):
+        ch = self.chunks.get((r // self.chunk, c // self.chunk))
+        if ch is not None:
+            ch.dirty = True
+
+    # --- baking ---
+
+    def _bounds(self, cr, cc):
+        n, maze = self.chunk, self.game.maze
+        return range(cr * n, min(maze.h, (cr + 1) * n)), range(cc * n, min(maze.w, (cc + 1) * n))
+
+    def _wall_kinds(self, rows, cols):
+        # wall cells of the chunk plus a one-cell border, for face hiding
+        maze = self.game.maze
+        w, h = maze.w, maze.h
+        kinds = {}
+        for r in range(max(0, rows.start - 1), min(h, rows.stop + 1)):
+            for c in range(max(0, cols.start - 1), min(w, cols.stop + 1)):
+                if maze.get(r, c) == WALL:
+                    outer = r in (0, h - 1) or c in (0, w - 1)
+                    kinds[(r, c)] = self.outer if outer else self.inner
+        return kinds
+
+    def _build_walls(self, ch, rows, cols):
+        maze = self.game.maze
+        quads = build_wall_quads(self._wall_kinds(rows, cols), maze.w, maze.h, maze.tile, rows, cols)
+        data = pack_quads(quads)
+        ch.walls_vbo = _upload(ch.walls_vbo, data)
+        ch.walls_count = len(data) // WALL_STRIDE
+
+    def _build_dynamic(self, ch, rows, cols):
+        game = self.game
+        maze = game.maze
+        landed = game.landed_obstacles
+        s = maze.tile * 0.45
+        data = array("f")
+        for r in rows:
+            for c in cols:
+                if maze.get(r, c) == RUBBLE:
+                    x, y = maze.centre(r, c)
+                    for vx, vy in ((x - s, y - s), (x + s, y - s), (x + s, y + s), (x - s, y + s)):
+                        data.extend(self.rubble)
+                        data.extend((vx, vy, 1.0))
+                o = landed.get((r, c))
+                if o is not None:
+                    for v in cube_vertices(o.x, o.y, self.obstacle_size / 2.0, self.obstacle_size):
+                        data.extend(self.obstacle)
+                        data.extend(v)
+        ch.dyn_vbo = _upload(ch.dyn_vbo, data) if data or ch.dyn_vbo is not None else None
+        ch.dyn_count = len(data) // DYN_STRIDE
+        ch.dirty = False
+
+    def _get(self, key):
+        ch = self.chunks.get(key)
+        if ch is None:
+            ch = self.chunks[key] = _Chunk()
+            self._build_walls(ch, *self._bounds(*key))
+            self.built += 1
+        if ch.dirty:
+            self._build_dynamic(ch, *self._bounds(*key))
+            self.built += 1
+        return ch
+
+    # --- drawing ---
+
+    def visible(self, frustum):
+        """Chunk keys whose box may be on screen."""
+        maze = self.game.maze
+        n, tile = self.chunk, maze.tile
+        size = n * tile
+        nx, ny = -(-maze.w // n), -(-maze.h // n)
+        return frustum.visible_cells(-maze.half_w * tile, -maze.half_h * tile, size, size,
+                                     nx, ny, 0.0, self.top)
+
+    def draw(self, frustum, stats=None):
+        chunks = [self._get(key) for key in self.visible(frustum)]
+        if stats is not None:
+            stats.chunks += len(chunks)
+        if self.texture is None:
+            self.texture = make_checker_texture(self.shades)
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glEnable(GL_TEXTURE_2D)
+        for ch in chunks:
+            if ch.walls_count:
+                glBindBuffer(GL_ARRAY_BUFFER, ch.walls_vbo)
+                glInterleavedArrays(GL_T2F_C3F_V3F, 0, None)
+                glDrawArrays(GL_QUADS, 0, ch.walls_count)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        for ch in chunks:
+            if ch.dyn_count:
+                glBindBuffer(GL_ARRAY_BUFFER, ch.dyn_vbo)
+                glInterleavedArrays(GL_C3F_V3F, 0, None)
+                glDrawArrays(GL_QUADS, 0, ch.dyn_count)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # --- cleanup ---
+
+    def release_chunks(self):
+        vbos = [v for ch in self.chunks.values() for v in (ch.walls_vbo, ch.dyn_vbo) if v is not None]
+        if vbos:
+            glDeleteBuffers(len(vbos), vbos)
+        self.chunks = {}
+
+    def release(self):
+        self.release_chunks()
+        if self.texture is not None:
+            glDeleteTextures([self.texture])
+            self.texture = None
+        if self.game is not None and self._cell_changed in self.game.cell_listeners:
+            self.game.cell_listeners.remove(self._cell_changed)
+        self.game = None
+        self.version = None
@@ -0,0 +1,31 @@
+"""Axis-aligned cubes without GLUT.
+
+Landed obstacles never move, so their cubes are baked into the maze's
+chunk buffers from :func:`cube_vertices` (see :mod:`pacman.gfx.chunks`).
+The few obstacles still falling are drawn with :func:`draw_cube`, which
+emits the same six quads in immediate mode.
+"""
+from OpenGL.GL import *
+
+# the four corners of each face as unit offsets from the centre
+_FACES = (
+    ((1, 1, 1), (1, -1, 1), (1, -1, -1), (1, 1, -1)),        # +x
+    ((-1, 1, 1), (-1, 1, -1), (-1, -1, -1), (-1, -1, 1)),    # -x
+    ((1, 1, 1), (1, 1, -1), (-1, 1, -1), (-1, 1, 1)),        # +y
+    ((1, -1, 1), (-1, -1, 1), (-1, -1, -1), (1, -1, -1)),    # -y
+    ((1, 1, 1), (-1, 1, 1), (-1, -1, 1), (1, -1, 1)),        # +z
+    ((1, 1, -1), (1, -1, -1), (-1, -1, -1), (-1, 1, -1)),    # -z
+)
+
+
+def cube_vertices(x, y, z, size):
+    """The 24 quad corners of a cube centred on (x, y, z), like ``glutSolidCube``."""
+    h = size / 2.0
+    return [(x + sx * h, y + sy * h, z + sz * h) for face in _FACES for sx, sy, sz in face]
+
+
+def draw_cube(x, y, z, size):
+    glBegin(GL_QUADS)
+    for v in cube_vertices(x, y, z, size):
+        glVertex3f(*v)
+    glEnd()
@@ -0,0 +1,120 @@
+"""View-frustum culling for the maze grid and entities.
+
+:class:`Frustum` is built from the same eye/center/up that ``setupCamera``
+hands to ``gluLookAt`` plus the ``gluPerspective`` parameters, and answers
+"could this sphere / box be on screen" with six plane tests.
+:meth:`Frustum.visible_cells` narrows a grid of blocks (the maze's
+chunks, see :mod:`pacman.gfx.chunks`) down to those that can be seen, so
+drawing only walks those.
+
+Pure Python; nothing here needs a GL context.
+"""
+import math
+
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _norm(a):
+    L = math.sqrt(_dot(a, a)) or 1.0
+    return (a[0] / L, a[1] / L, a[2] / L)
+
+
+class Frustum:
+    def __init__(self, eye, center, up, fovy, aspect, near, far):
+        f = _norm(_sub(center, eye))
+        s = _norm(_cross(f, up))
+        u = _cross(s, f)
+        tv = math.tan(math.radians(fovy) / 2.0)
+        th = tv * aspect
+
+        def plane(n, point):
+            n = _norm(n)
+            return (n[0], n[1], n[2], -_dot(n, point))
+
+        def along(k):
+            return (eye[0] + f[0] * k, eye[1] + f[1] * k, eye[2] + f[2] * k)
+
+        def comb(a, b, k):
+            return (a[0] + b[0] * k, a[1] + b[1] * k, a[2] + b[2] * k)
+
+        # inward-facing planes: near, far, left, right, bottom, top
+        self.planes = (
+            plane(f, along(near)),
+            plane((-f[0], -f[1], -f[2]), along(far)),
+            plane(comb(s, f, th), eye),
+            plane(comb((-s[0], -s[1], -s[2]), f, th), eye),
+            plane(comb(u, f, tv), eye),
+            plane(comb((-u[0], -u[1], -u[2]), f, tv), eye),
+        )
+
+        # corners, for a conservative footprint on the maze
+        corners = []
+        for k in (near, far):
+            c = along(k)
+            for sx in (-1, 1):
+                for sy in (-1, 1):
+                    corners.append((c[0] + (s[0] * sx * th + u[0] * sy * tv) * k,
+                                    c[1] + (s[1] * sx * th + u[1] * sy * tv) * k,
+                                    c[2] + (s[2] * sx * th + u[2] * sy * tv) * k))
+        self.corners = corners
+
+    def sphere_visible(self, x, y, z, r):
+        for a, b, c, d in self.planes:
+            if a * x + b * y + c * z + d < -r:
+                return False
+        return True
+
+    def box_visible(self, x0, y0, z0, x1, y1, z1):
+        for a, b, c, d in self.planes:
+            # the box corner furthest along the plane normal
+            px = x1 if a >= 0 else x0
+            py = y1 if b >= 0 else y0
+            pz = z1 if c >= 0 else z0
+            if a * px + b * py + c * pz + d < 0:
+                return False
+        return True
+
+    def visible_cells(self, x0, y0, size_x, size_y, nx, ny, z0, z1):
+        """Yield (r, c) for blocks of a grid with origin (x0, y0) and ``nx`` x ``ny``
+        blocks of ``size_x`` x ``size_y`` whose column [z0, z1] may be on screen.
+
+        Only blocks under the frustum's footprint are tested, so the cost
+        follows the view, not the grid size.
+        """
+        xs = [p[0] for p in self.corners]
+        ys = [p[1] for p in self.corners]
+        c0 = max(0, int(math.floor((min(xs) - x0) / size_x)))
+        c1 = min(nx - 1, int(math.floor((max(xs) - x0) / size_x)))
+        r0 = max(0, int(math.floor((min(ys) - y0) / size_y)))
+        r1 = min(ny - 1, int(math.floor((max(ys) - y0) / size_y)))
+        for r in range(r0, r1 + 1):
+            y = y0 + r * size_y
+            for c in range(c0, c1 + 1):
+                x = x0 + c * size_x
+                if self.box_visible(x, y, z0, x + size_x, y + size_y, z1):
+                    yield r, c
+
+
+class CullStats:
+    """Per-frame drawn/culled counters, reset at the start of each frame."""
+
+    def __init__(self):
+        self.drawn = 0
+        self.culled = 0
+        self.chunks = 0
+
+    def reset(self):
+        self.drawn = self.culled = self.chunks = 0
+
+    def __str__(self):
+        return f"drawn {self.drawn}  culled {self.culled}  chunks {self.chunks}"
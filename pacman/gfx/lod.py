@@ -0,0 +1,48 @@
+"""Screen-size based level of detail for sphere meshes.
+
+A sphere of world radius ``r`` at distance ``d`` from the eye covers about
+``r * viewport_h / (2 * tan(fovy / 2)) / d`` pixels of radius.  The
+selector picks the first level whose threshold that projected radius
+meets, so small or distant spheres use coarse meshes and close ones keep
+the full tessellation.
+"""
+import math
+
+# (min projected radius in pixels, slices, stacks), finest first
+SPHERE_LODS = (
+    (30.0, 20, 16),
+    (14.0, 12, 10),
+    (7.0, 8, 6),
+    (0.0, 6, 4),
+)
+
+
+def triangle_count(key):
+    slices, stacks = key
+    return 2 * slices * (stacks - 1)
+
+
+class LodSelector:
+    def __init__(self, levels=SPHERE_LODS, fovy=60.0, viewport_h=800):
+        self.levels = sorted(levels, key=lambda lv: -lv[0])
+        self.pixels_per_unit = viewport_h / (2.0 * math.tan(math.radians(fovy) / 2.0))
+        self.eye = (0.0, 0.0, 0.0)
+
+    def set_eye(self, eye):
+        self.eye = eye
+
+    def projected_radius(self, x, y, z, radius):
+        ex, ey, ez = self.eye
+        d = math.sqrt((x - ex) ** 2 + (y - ey) ** 2 + (z - ez) ** 2)
+        return radius * self.pixels_per_unit / max(d, 1e-3)
+
+    def pick(self, x, y, z, radius, finest=None):
+        """(slices, stacks) for a sphere, never finer than ``finest`` if given."""
+        px = self.projected_radius(x, y, z, radius)
+        for threshold, slices, stacks in self.levels:
+            if px >= threshold:
+                break
+        key = (slices, stacks)
+        if finest is not None and triangle_count(finest) < triangle_count(key):
+            return finest
+        return key
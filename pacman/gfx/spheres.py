@@ -0,0 +1,214 @@
+"""Instanced sphere drawing for Pac-Man, enemies, bullets and power-ups.
+
+``glutSolidSphere`` re-tessellates on the CPU every call.  Here each
+(slices, stacks) mesh is built once into a vertex/index buffer, entities
+are queued into a packed per-instance array (position, scale, colour)
+during the frame, and :meth:`SphereRenderer.flush` draws every queued
+instance of a mesh with one ``glDrawElementsInstanced``.
+
+Drivers without shaders or instanced arrays fall back to replaying a
+per-mesh display list for each instance, which still avoids the
+re-tessellation.
+"""
+import ctypes
+import math
+from array import array
+
+from OpenGL.GL import *
+
+INSTANCE_FLOATS = 7  # x, y, z, scale, r, g, b
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute vec4 inst_pos_scale;
+attribute vec3 inst_color;
+varying vec3 color;
+void main() {
+    vec4 world = vec4(position * inst_pos_scale.w + inst_pos_scale.xyz, 1.0);
+    gl_Position = gl_ModelViewProjectionMatrix * world;
+    color = inst_color;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 color;
+void main() {
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+ATTR_POSITION, ATTR_INST_POS, ATTR_INST_COLOR = 0, 1, 2
+
+
+def sphere_mesh(slices, stacks):
+    """Unit sphere as (vertices, triangle indices), poles on the z axis."""
+    verts = array("f")
+    for i in range(stacks + 1):
+        phi = math.pi * i / stacks
+        z, ring = math.cos(phi), math.sin(phi)
+        for j in range(slices + 1):
+            theta = 2.0 * math.pi * j / slices
+            verts.extend((ring * math.cos(theta), ring * math.sin(theta), z))
+    idx = array("H" if (stacks + 1) * (slices + 1) < 65536 else "I")
+    row = slices + 1
+    for i in range(stacks):
+        for j in range(slices):
+            a = i * row + j
+            b = a + row
+            if i != 0:
+                idx.extend((a, b, a + 1))
+            if i != stacks - 1:
+                idx.extend((a + 1, b, b + 1))
+    return verts, idx
+
+
+def _compile(kind, source):
+    shader = glCreateShader(kind)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        raise RuntimeError(glGetShaderInfoLog(shader).decode(errors="replace"))
+    return shader
+
+
+def build_program():
+    vs = _compile(GL_VERTEX_SHADER, VERTEX_SHADER)
+    fs = _compile(GL_FRAGMENT_SHADER, FRAGMENT_SHADER)
+    prog = glCreateProgram()
+    glAttachShader(prog, vs)
+    glAttachShader(prog, fs)
+    # generic attribute 0 must carry the vertex position in compatibility profiles
+    glBindAttribLocation(prog, ATTR_POSITION, "position")
+    glBindAttribLocation(prog, ATTR_INST_POS, "inst_pos_scale")
+    glBindAttribLocation(prog, ATTR_INST_COLOR, "inst_color")
+    glLinkProgram(prog)
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+    if not glGetProgramiv(prog, GL_LINK_STATUS):
+        raise RuntimeError(glGetProgramInfoLog(prog).decode(errors="replace"))
+    return prog
+
+
+class SphereMesh:
+    def __init__(self, slices, stacks, instanced):
+        verts, idx = sphere_mesh(slices, stacks)
+        self.slices, self.stacks = slices, stacks
+        self.index_count = len(idx)
+        self.triangles = len(idx) // 3
+        self.index_type = GL_UNSIGNED_SHORT if idx.typecode == "H" else GL_UNSIGNED_INT
+        self.vbo = self.ibo = self.display_list = None
+        if instanced:
+            self.vbo, self.ibo = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, len(verts) * 4, verts.tobytes(), GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, len(idx) * idx.itemsize, idx.tobytes(), GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        else:
+            self.display_list = glGenLists(1)
+            glNewList(self.display_list, GL_COMPILE)
+            glBegin(GL_TRIANGLES)
+            for i in idx:
+                glVertex3f(verts[3*i], verts[3*i + 1], verts[3*i + 2])
+            glEnd()
+            glEndList()
+
+
+class SphereRenderer:
+    """Collects sphere instances for a frame and draws them per mesh."""
+
+    def __init__(self):
+        self.meshes = {}
+        self.batches = {}        # (slices, stacks) -> array of instance floats
+        self.instanced = None    # decided on first use, needs a GL context
+        self.program = None
+        self.instance_vbo = None
+        # per-frame stats, reset by begin()
+        self.draw_calls = 0
+        self.instances = 0
+        self.triangles = 0
+
+    def _init_gl(self):
+        self.instanced = bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)
+        if self.instanced:
+            try:
+                self.program = build_program()
+            except Exception:
+                self.instanced = False
+        if self.instanced:
+            self.instance_vbo = glGenBuffers(1)
+
+    def mesh(self, key):
+        m = self.meshes.get(key)
+        if m is None:
+            m = self.meshes[key] = SphereMesh(key[0], key[1], self.instanced)
+        return m
+
+    def begin(self):
+        for batch in self.batches.values():
+            del batch[:]
+        self.draw_calls = self.instances = self.triangles = 0
+
+    def add(self, key, x, y, z, radius, colour):
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = array("f")
+        batch.extend((x, y, z, radius, colour[0], colour[1], colour[2]))
+
+    def flush(self):
+        if self.instanced is None:
+            self._init_gl()
+        for key, batch in self.batches.items():
+            count = len(batch) // INSTANCE_FLOATS
+            if not count:
+                continue
+            mesh = self.mesh(key)
+            if self.instanced:
+                self._draw_instanced(mesh, batch, count)
+            else:
+                self._draw_lists(mesh, batch, count)
+            self.instances += count
+            self.triangles += mesh.triangles * count
+
+    def _draw_instanced(self, mesh, batch, count):
+        glUseProgram(self.program)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, len(batch) * 4, batch.tobytes(), GL_STREAM_DRAW)
+        stride = INSTANCE_FLOATS * 4
+        glEnableVertexAttribArray(ATTR_INST_POS)
+        glVertexAttribPointer(ATTR_INST_POS, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glVertexAttribDivisor(ATTR_INST_POS, 1)
+        glEnableVertexAttribArray(ATTR_INST_COLOR)
+        glVertexAttribPointer(ATTR_INST_COLOR, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(16))
+        glVertexAttribDivisor(ATTR_INST_COLOR, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, mesh.vbo)
+        glEnableVertexAttribArray(ATTR_POSITION)
+        glVertexAttribPointer(ATTR_POSITION, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, mesh.ibo)
+
+        glDrawElementsInstanced(GL_TRIANGLES, mesh.index_count, mesh.index_type, None, count)
+        self.draw_calls += 1
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glVertexAttribDivisor(ATTR_INST_POS, 0)
+        glVertexAttribDivisor(ATTR_INST_COLOR, 0)
+        for a in (ATTR_POSITION, ATTR_INST_POS, ATTR_INST_COLOR):
+            glDisableVertexAttribArray(a)
+        glUseProgram(0)
+
+    def _draw_lists(self, mesh, batch, count):
+        for i in range(0, count * INSTANCE_FLOATS, INSTANCE_FLOATS):
+            x, y, z, s, r, g, b = batch[i:i + INSTANCE_FLOATS]
+            glColor3f(r, g, b)
+            glPushMatrix()
+            glTranslatef(x, y, z)
+            glScalef(s, s, s)
+            glCallList(mesh.display_list)
+            glPopMatrix()
+            self.draw_calls += 1
@@ -0,0 +1,57 @@
+"""Cached GLUT bitmap text for the HUD.
+
+Each HUD line is a *slot* keyed by its screen position.  A slot compiles
+its string (colour, raster position and one ``glutBitmapCharacter`` per
+character) into a display list the first time, and only recompiles when
+the string at that position changes, e.g. when the score ticks up.  The
+2D projection is set up once per :meth:`TextCache.begin`/``end`` pair
+instead of once per line.
+"""
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18, glutBitmapCharacter
+
+
+class TextCache:
+    def __init__(self, width, height, font=GLUT_BITMAP_HELVETICA_18, colour=(1.0, 1.0, 1.0)):
+        self.width, self.height = width, height
+        self.font = font
+        self.colour = colour
+        self.slots = {}       # (x, y) -> [text, display list]
+        self.rebuilds = 0
+
+    def begin(self):
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, self.width, 0, self.height)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+    def end(self):
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+
+    def draw(self, x, y, text):
+        """Draw ``text`` at window position (x, y); call between begin() and end()."""
+        slot = self.slots.get((x, y))
+        if slot is None:
+            slot = self.slots[(x, y)] = [None, glGenLists(1)]
+        if slot[0] != text:
+            glNewList(slot[1], GL_COMPILE)
+            glColor3f(*self.colour)
+            glRasterPos2f(x, y)
+            for ch in text:
+                glutBitmapCharacter(self.font, ord(ch))
+            glEndList()
+            slot[0] = text
+            self.rebuilds += 1
+        glCallList(slot[1])
+
+    def release(self):
+        for _, lst in self.slots.values():
+            glDeleteLists(lst, 1)
+        self.slots.clear()
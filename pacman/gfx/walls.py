@@ -0,0 +1,131 @@
+"""Static maze walls baked into vertex buffers.
+
+Drawing every wall as its own ``glutSolidCube`` costs ~10 GL calls per
+wall per frame.  :func:`build_wall_quads` instead turns the wall cells of
+a block of the maze into a list of quads that is uploaded once and drawn
+with a single ``glDrawArrays`` (see :mod:`pacman.gfx.chunks`).
+
+While baking, faces hidden by an equal or taller neighbouring wall (and all
+bottom faces) are dropped, and coplanar faces of the same wall kind are
+merged into larger rectangles.  The alternating "brick" shading of the old
+per-cube code is kept by a 2x2 checker texture whose texels line up with
+maze cells, so merged faces still shade cell by cell.
+"""
+from array import array
+
+from OpenGL.GL import *
+
+# floats per vertex for GL_T2F_C3F_V3F
+STRIDE = 8
+
+
+def build_wall_quads(kinds, w, h, tile, rows=None, cols=None):
+    """Return the wall surface as quads of (s, t, r, g, b, x, y, z) vertices.
+
+    ``kinds`` maps each wall cell ``(r, c)`` to its ``(height, (r, g, b))``.
+    ``rows``/``cols`` restrict the output to a sub-rectangle of the maze
+    (neighbours outside it still hide faces), so ``kinds`` only needs to
+    cover the sub-rectangle and its border.
+    """
+    rows = range(h) if rows is None else rows
+    cols = range(w) if cols is None else cols
+    quads = []
+
+    def wx(c):
+        return (c - w / 2.0) * tile
+
+    def wy(r):
+        return (r - h / 2.0) * tile
+
+    def height(r, c):
+        k = kinds.get((r, c))
+        return k[0] if k else 0.0
+
+    # --- top faces: greedy rectangles of the same wall kind ---
+    used = set()
+    for r in rows:
+        for c in cols:
+            k = kinds.get((r, c))
+            if k is None or (r, c) in used:
+                continue
+            c1 = c
+            while c1 + 1 in cols and kinds.get((r, c1 + 1)) == k and (r, c1 + 1) not in used:
+                c1 += 1
+            r1 = r
+            while r1 + 1 in rows and all(kinds.get((r1 + 1, cc)) == k and (r1 + 1, cc) not in used
+                                          for cc in range(c, c1 + 1)):
+                r1 += 1
+            for rr in range(r, r1 + 1):
+                for cc in range(c, c1 + 1):
+                    used.add((rr, cc))
+            z, col = k
+            s0, s1, t0, t1 = c * 0.5, (c1 + 1) * 0.5, r * 0.5, (r1 + 1) * 0.5
+            x0, x1, y0, y1 = wx(c), wx(c1 + 1), wy(r), wy(r1 + 1)
+            quads.append(((s0, t0, *col, x0, y0, z), (s1, t0, *col, x1, y0, z),
+                          (s1, t1, *col, x1, y1, z), (s0, t1, *col, x0, y1, z)))
+
+    # --- side faces: only the part not covered by the neighbour, merged in runs ---
+    def side_runs(cells, neighbour):
+        run = None
+        for cell in cells:
+            k = kinds.get(cell)
+            face = None
+            if k is not None:
+                lo = height(*neighbour(cell))
+                if lo < k[0]:
+                    face = (lo, k[0], k[1])
+            if run is not None and face == run[0]:
+                run[2] = cell
+                continue
+            if run is not None:
+                yield run
+            run = [face, cell, cell] if face is not None else None
+        if run is not None:
+            yield run
+
+    # faces along x (east/west walls), runs go along rows
+    for c in cols:
+        column = [(r, c) for r in rows]
+        for dc, xe in ((1, wx(c + 1)), (-1, wx(c))):
+            s = c * 0.5 + 0.25
+            for (lo, hi, col), (r0, _), (r1, _) in side_runs(column, lambda rc: (rc[0], rc[1] + dc)):
+                y0, y1 = wy(r0), wy(r1 + 1)
+                t0, t1 = r0 * 0.5, (r1 + 1) * 0.5
+                quads.append(((s, t0, *col, xe, y0, lo), (s, t1, *col, xe, y1, lo),
+                              (s, t1, *col, xe, y1, hi), (s, t0, *col, xe, y0, hi)))
+
+    # faces along y (north/south walls), runs go along columns
+    for r in rows:
+        line = [(r, c) for c in cols]
+        for dr, ye in ((1, wy(r + 1)), (-1, wy(r))):
+            t = r * 0.5 + 0.25
+            for (lo, hi, col), (_, c0), (_, c1) in side_runs(line, lambda rc: (rc[0] + dr, rc[1])):
+                x0, x1 = wx(c0), wx(c1 + 1)
+                s0, s1 = c0 * 0.5, (c1 + 1) * 0.5
+                quads.append(((s0, t, *col, x0, ye, lo), (s1, t, *col, x1, ye, lo),
+                              (s1, t, *col, x1, ye, hi), (s0, t, *col, x0, ye, hi)))
+    return quads
+
+
+def pack_quads(quads):
+    data = array("f")
+    for q in quads:
+        for v in q:
+            data.extend(v)
+    return data
+
+
+def make_checker_texture(shades):
+    """2x2 luminance texture: texel (i, j) is ``shades[(i + j) % 2]``."""
+    even, odd = (int(round(min(1.0, s) * 255)) for s in shades)
+    pixels = bytes([even, odd, odd, even])
+    tex = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, tex)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_LUMINANCE, 2, 2, 0, GL_LUMINANCE, GL_UNSIGNED_BYTE, pixels)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return tex
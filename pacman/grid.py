@@ -0,0 +1,112 @@
+"""Flat array storage for the maze.
+
+The maze used to be a list of row lists, so every ``passable()`` call paid
+for ``world_to_grid``'s extra function call, float arithmetic and two
+levels of list indexing.  :class:`MazeGrid` keeps the cells in one signed
+byte array (row-major, ``i = r * w + c``) next to a ``bytearray`` that is
+1 for floor cells, so a point lookup is a couple of float ops and a single
+byte read.  :meth:`MazeGrid.passable_many` answers whole batches at once
+(vectorised when given NumPy arrays).
+"""
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# cell values
+FLOOR = 0
+WALL = 1
+RUBBLE = -1   # floor destroyed by a falling obstacle
+
+
+class MazeGrid:
+    def __init__(self, w, h, tile):
+        self.w, self.h, self.tile = w, h, tile
+        self.cells = array("b", bytes(w * h))
+        self.open = bytearray(b"\x01" * (w * h))   # 1 = passable floor
+        # same expressions (and float rounding) as sim.world_to_grid / grid_to_world
+        self.half_w = w / 2.0
+        self.half_h = h / 2.0
+
+    def get(self, r, c):
+        return self.cells[r * self.w + c]
+
+    def set(self, r, c, value):
+        i = r * self.w + c
+        self.cells[i] = value
+        self.open[i] = value == FLOOR
+
+    def fill(self, value):
+        n = self.w * self.h
+        self.cells = array("b", [value]) * n
+        self.open = bytearray([value == FLOOR]) * n
+
+    def find(self, value):
+        """(r, c) of every cell holding ``value``."""
+        w = self.w
+        return [divmod(i, w) for i, v in enumerate(self.cells) if v == value]
+
+    def cell_of(self, x, y):
+        """(r, c) of the cell containing world point (x, y); may lie outside the maze."""
+        return (int(round(y / self.tile + self.half_h - 0.5)),
+                int(round(x / self.tile + self.half_w - 0.5)))
+
+    def centre(self, r, c):
+        """World (x, y) of the middle of cell (r, c)."""
+        tile = self.tile
+        return (c - self.half_w) * tile + tile / 2.0, (r - self.half_h) * tile + tile / 2.0
+
+    def passable(self, x, y):
+        c = round(x / self.tile + self.half_w - 0.5)
+        r = round(y / self.tile + self.half_h - 0.5)
+        if 0 <= r < self.h and 0 <= c < self.w:
+            return self.open[r * self.w + c] == 1
+        return False
+
+    def line_of_sight(self, x0, y0, x1, y1):
+        """True if the segment between two world points crosses only floor cells.
+
+        Walks the cells the segment passes through in order (a grid DDA),
+        so the cost is the number of cells crossed, not the maze size.
+        """
+        tile = self.tile
+        u0, v0 = x0 / tile + self.half_w, y0 / tile + self.half_h   # cell = floor(u), floor(v)
+        u1, v1 = x1 / tile + self.half_w, y1 / tile + self.half_h
+        c, r = math.floor(u0), math.floor(v0)
+        du, dv = u1 - u0, v1 - v0
+        step_c = 1 if du > 0 else -1
+        step_r = 1 if dv > 0 else -1
+        t_c = ((c + (du > 0)) - u0) / du if du else math.inf
+        t_r = ((r + (dv > 0)) - v0) / dv if dv else math.inf
+        dt_c = abs(1.0 / du) if du else math.inf
+        dt_r = abs(1.0 / dv) if dv else math.inf
+        w, h, open_ = self.w, self.h, self.open
+        for _ in range(abs(math.floor(u1) - c) + abs(math.floor(v1) - r) + 1):
+            if not (0 <= r < h and 0 <= c < w) or not open_[r * w + c]:
+                return False
+            if t_c < t_r:
+                c += step_c
+                t_c += dt_c
+            else:
+                r += step_r
+                t_r += dt_r
+        return True
+
+    def open_array(self):
+        """Zero-copy (h, w) uint8 NumPy view of the passability bitmap."""
+        return np.frombuffer(self.open, dtype=np.uint8).reshape(self.h, self.w)
+
+    def passable_many(self, xs, ys):
+        """Batch ``passable``: NumPy arrays in, bool array out; otherwise a list."""
+        if np is not None and isinstance(xs, np.ndarray):
+            c = np.rint(xs / self.tile + self.half_w - 0.5).astype(np.intp)
+            r = np.rint(ys / self.tile + self.half_h - 0.5).astype(np.intp)
+            inside = (r >= 0) & (r < self.h) & (c >= 0) & (c < self.w)
+            out = np.zeros(xs.shape, dtype=bool)
+            out[inside] = self.open_array()[r[inside], c[inside]] == 1
+            return out
+        passable = self.passable
+        return [passable(x, y) for x, y in zip(xs, ys)]
@@ -0,0 +1,600 @@
+"""Authoritative game server and thin render client over a socket.
+
+    python -m pacman.net serve [--port 5555] [--seed N] [--size WxH]
+    python Project.py --connect 127.0.0.1:5555
+    python -m pacman.net bench [--ticks 600]      # loopback, prints metrics
+
+:class:`Server` owns the :class:`~pacman.sim.Game` and runs the headless
+tick loop.  After every batch of ticks it takes a
+:class:`~pacman.snapshot.RenderState`, quantizes it (positions to 1/16
+of a world unit) and sends each client the difference against the last
+state that client acknowledged:
+
+* entities are rows of ints compared index by index with the baseline's
+  rows of the same kind; a bitmask marks the rows that changed and only
+  those carry values, as zigzag varints of the difference;
+* the maze is sent whole (zlib) after a reset, otherwise only the cells
+  edited since the baseline.
+
+:class:`Client` decodes the stream on its own thread and publishes
+``RenderState`` snapshots into a :class:`~pacman.snapshot.SnapshotBuffer`,
+exactly like :class:`~pacman.snapshot.SimThread`, so ``Project.py`` draws
+a remote game the same way it draws a threaded local one.  Input goes back
+to the server, which applies it between ticks.
+
+Both ends keep ``bytes``/``encode_times``/``decode_times`` per tick for
+tuning.  Messages are length-prefixed (u32) frames over TCP.
+"""
+import selectors
+import socket
+import struct
+import threading
+import time
+import zlib
+
+from .clock import FixedStepClock
+from .replay import _get_varint, _put_varint, apply_event, format_summary
+from .snapshot import (HUD_FIELDS, BulletState, EnemyState, FallingState, LandedState, PacState,
+                       PowerState, RenderState, Snapshotter, SnapshotBuffer)
+
+Q = 16.0             # position quantization: 1/16 world unit
+YAW_Q = 100.0        # yaw: 1/100 degree
+HISTORY = 64         # states kept to delta against; older acks get a full state
+MAX_BACKLOG = 1 << 20   # unsent bytes after which a slow client skips states
+
+# message types
+STATE = 1            # server -> client
+ACK = 2              # client -> server: varint seq
+INPUT = 3            # client -> server: kind u8, code u8
+
+_FRAME = struct.Struct("<I")
+
+# entity kinds in wire order, and how many ints make a row of each
+KINDS = ("hud", "pac", "enemies", "bullets", "powerups", "obstacles")
+WIDTHS = {"hud": len(HUD_FIELDS), "pac": 7, "enemies": 4, "bullets": 4, "powerups": 2, "obstacles": 4}
+_HUD_FLAGS = frozenset(("paused", "game_over", "speed_boost_active", "auto_shoot_active", "auto_shoot_los"))
+
+
+class NetError(Exception):
+    pass
+
+
+# --- quantized rows ---
+
+def _q(v):
+    return int(round(v * Q))
+
+
+def state_rows(s):
+    """RenderState -> {kind: [int tuple, ...]}; prev positions go as offsets from the current."""
+    p = s.pac
+    x, y = _q(p.x), _q(p.y)
+    yaw = int(round(p.yaw * YAW_Q))
+    return {
+        "hud": [tuple(int(getattr(s, name)) for name in HUD_FIELDS)],
+        "pac": [(x, y, _q(p.z), yaw, x - _q(p.prev_x), y - _q(p.prev_y),
+                 yaw - int(round(p.prev_yaw * YAW_Q)))],
+        "enemies": [_mover(e) for e in s.enemies],
+        "bullets": [_mover(b) for b in s.bullets],
+        "powerups": [(_q(q.x), _q(q.y)) for q in s.powerups],
+        "obstacles": [(_q(o.x), _q(o.y), _q(o.z), _q(o.z) - _q(o.prev_z)) for o in s.obstacles],
+    }
+
+
+def _mover(e):
+    x, y = _q(e.x), _q(e.y)
+    return (x, y, x - _q(e.prev_x), y - _q(e.prev_y))
+
+
+def rows_state(rows, seq, maze, changes, now):
+    """Inverse of :func:`state_rows` (up to quantization)."""
+    hud = rows["hud"][0]
+    x, y, z, yaw, dpx, dpy, dyaw = rows["pac"][0]
+    return RenderState(
+        seq, now,
+        PacState(x / Q, y / Q, z / Q, yaw / YAW_Q, (x - dpx) / Q, (y - dpy) / Q, (yaw - dyaw) / YAW_Q),
+        tuple(EnemyState(x / Q, y / Q, (x - dx) / Q, (y - dy) / Q) for x, y, dx, dy in rows["enemies"]),
+        tuple(BulletState(x / Q, y / Q, (x - dx) / Q, (y - dy) / Q) for x, y, dx, dy in rows["bullets"]),
+        tuple(PowerState(x / Q, y / Q) for x, y in rows["powerups"]),
+        tuple(FallingState(x / Q, y / Q, z / Q, (z - dz) / Q) for x, y, z, dz in rows["obstacles"]),
+        *(bool(v) if name in _HUD_FLAGS else v for name, v in zip(HUD_FIELDS, hud)),
+        maze, changes)
+
+
+# --- varints ---
+
+def _put_signed(out, n):
+    _put_varint(out, (n << 1) if n >= 0 else ((-n) << 1) - 1)
+
+
+def _get_signed(data, i):
+    z, i = _get_varint(data, i)
+    return (z >> 1) if not z & 1 else -((z + 1) >> 1), i
+
+
+def encode_rows(out, rows, base):
+    """Append ``rows`` as a delta against ``base`` (rows of the same kind)."""
+    n = len(rows)
+    _put_varint(out, n)
+    mask = bytearray((n + 7) // 8)
+    body = bytearray()
+    nb = len(base)
+    for j, row in enumerate(rows):
+        ref = base[j] if j < nb else None
+        if row == ref:
+            continue
+        mask[j >> 3] |= 1 << (j & 7)
+        if ref is None:
+            for v in row:
+                _put_signed(body, v)
+        else:
+            for v, r in zip(row, ref):
+                _put_signed(body, v - r)
+    out += mask
+    out += body
+
+
+def decode_rows(data, i, base, width):
+    n, i = _get_varint(data, i)
+    mask = data[i:i + (n + 7) // 8]
+    i += (n + 7) // 8
+    rows = []
+    nb = len(base)
+    for j in range(n):
+        ref = base[j] if j < nb else None
+        if not mask[j >> 3] >> (j & 7) & 1:
+            rows.append(ref)
+            continue
+        row = []
+        for k in range(width):
+            d, i = _get_signed(data, i)
+            row.append(d if ref is None else ref[k] + d)
+        rows.append(tuple(row))
+    return rows, i
+
+
+
+# --- framing ---
+
+def _frame(kind, payload=b""):
+    return _FRAME.pack(len(payload) + 1) + bytes((kind,)) + payload
+
+
+class _Reader:
+    """Splits a byte stream into frames."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data):
+        self.buf += data
+        frames = []
+        buf = self.buf
+        i = 0
+        while len(buf) - i >= 4:
+            (n,) = _FRAME.unpack_from(buf, i)
+            if len(buf) - i - 4 < n:
+                break
+            frames.append(bytes(buf[i + 4:i + 4 + n]))
+            i += 4 + n
+        del buf[:i]
+        return frames
+
+
+# --- server ---
+
+class _History:
+    __slots__ = ("rows", "cells", "reset")
+
+    def __init__(self, rows, cells, reset):
+        self.rows = rows        # {kind: rows}
+        self.cells = cells      # cells edited since the previous state
+        self.reset = reset      # the maze was rebuilt since the previous state
+
+
+class _Peer:
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.reader = _Reader()
+        self.out = bytearray()
+        self.acked = 0          # newest state the client confirmed; 0 = none
+
+
+class Server:
+    """Runs ``game`` and streams it to every connected :class:`Client`.
+
+    ``handle(game, kind, code)`` applies client input (default:
+    :func:`pacman.replay.apply_event`).  ``bytes`` and ``encode_times``
+    get one entry per state sent (all clients together).
+    """
+
+    def __init__(self, game, host="127.0.0.1", port=0, handle=None):
+        self.game = game
+        self.handle = handle or apply_event
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.sel = selectors.DefaultSelector()
+        self.sel.register(self.listener, selectors.EVENT_READ)
+        self.peers = {}
+        self.snapshots = Snapshotter(game)
+        self.history = {}
+        self.seq = 0
+        self.bytes = []
+        self.encode_times = []
+        self.running = True
+
+    # --- network ---
+
+    def poll(self, timeout=0.0):
+        """Accept clients, read their acks/input and flush pending output."""
+        for key, events in self.sel.select(timeout):
+            sock = key.fileobj
+            if sock is self.listener:
+                conn, addr = sock.accept()
+                conn.setblocking(False)
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.peers[conn] = _Peer(conn, addr)
+                self.sel.register(conn, selectors.EVENT_READ)
+                continue
+            peer = self.peers.get(sock)
+            if peer is None:
+                continue
+            if events & selectors.EVENT_READ:
+                try:
+                    data = sock.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    data = None
+                except OSError:
+                    data = b""
+                if data == b"":
+                    self._drop(peer)
+                    continue
+                if data:
+                    self._receive(peer, data)
+            if events & selectors.EVENT_WRITE:
+                self._flush(peer)
+
+    def _receive(self, peer, data):
+        for msg in peer.reader.feed(data):
+            kind = msg[0]
+            if kind == ACK:
+                seq, _ = _get_varint(msg, 1)
+                peer.acked = max(peer.acked, seq)
+            elif kind == INPUT and len(msg) >= 3:
+                self.handle(self.game, msg[1], msg[2])
+
+    def _flush(self, peer):
+        if peer.out:
+            try:
+                n = peer.sock.send(peer.out)
+            except (BlockingIOError, InterruptedError):
+                n = 0
+            except OSError:
+                self._drop(peer)
+                return
+            del peer.out[:n]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if peer.out else 0)
+        self.sel.modify(peer.sock, events)
+
+    def _drop(self, peer):
+        self.sel.unregister(peer.sock)
+        peer.sock.close()
+        self.peers.pop(peer.sock, None)
+
+    def close(self):
+        for peer in list(self.peers.values()):
+            self._drop(peer)
+        self.sel.unregister(self.listener)
+        self.listener.close()
+        self.snapshots.close()
+
+    # --- state ---
+
+    def publish(self):
+        """Snapshot the game and send each client its delta."""
+        t0 = time.perf_counter()
+        state = self.snapshots.take()
+        self.seq = state.seq
+        rows = state_rows(state)
+        cells = frozenset((r, c) for r, c, _, _ in state.changes)
+        self.history[self.seq] = _History(rows, cells, state.maze is not None)
+        self.history.pop(self.seq - HISTORY, None)
+        sent = 0
+        payloads = {}   # clients with the same baseline get the same bytes
+        for peer in list(self.peers.values()):
+            if len(peer.out) > MAX_BACKLOG:
+                continue
+            base = peer.acked if peer.acked in self.history else 0
+            msg = payloads.get(base)
+            if msg is None:
+                msg = payloads[base] = _frame(STATE, self.encode(base))
+            peer.out += msg
+            sent += len(msg)
+            self._flush(peer)
+        self.encode_times.append(time.perf_counter() - t0)
+        self.bytes.append(sent)
+
+    def encode(self, base_seq):
+        """The current state as a delta against state ``base_seq`` (0: against nothing)."""
+        game, cur = self.game, self.history[self.seq]
+        out = bytearray()
+        _put_varint(out, self.seq)
+        _put_varint(out, base_seq)
+        base_rows = self.history[base_seq].rows if base_seq else {}
+
+        full = not base_seq
+        cells = set()
+        for s in range(base_seq + 1, self.seq + 1):
+            h = self.history[s]
+            if h.reset:
+                full = True
+                break
+            cells |= h.cells
+        maze, landed = game.maze, game.landed_obstacles
+        if full:
+            out.append(1)
+            _put_varint(out, game.walls_version)
+            _put_varint(out, maze.w)
+            _put_varint(out, maze.h)
+            _put_varint(out, _q(maze.tile))
+            packed = zlib.compress(maze.cells.tobytes(), 1)
+            _put_varint(out, len(packed))
+            out += packed
+            cells = landed.keys()
+        else:
+            out.append(0)
+        _put_varint(out, len(cells))
+        for r, c in cells:
+            _put_varint(out, r)
+            _put_varint(out, c)
+            o = landed.get((r, c))
+            out.append(maze.get(r, c) & 0xFF)
+            if o is None:
+                out.append(0)
+            else:
+                out.append(1)
+                _put_signed(out, _q(o.x))
+                _put_signed(out, _q(o.y))
+
+        for kind in KINDS:
+            encode_rows(out, cur.rows[kind], base_rows.get(kind, ()))
+        return bytes(out)
+
+    # --- loop ---
+
+    def run(self, clock=None, ticks=None):
+        """Tick in real time (``clock``) until :meth:`stop` or ``ticks`` ticks."""
+        clock = clock or FixedStepClock()
+        game = self.game
+        ran_total = 0
+        while self.running and (ticks is None or ran_total < ticks):
+            self.poll(clock.time_to_next_tick())
+            n = clock.advance()
+            if not n:
+                continue
+            game.step(n)
+            ran_total += n
+            self.publish()
+
+    def stop(self):
+        self.running = False
+
+
+# --- client ---
+
+class Client(threading.Thread):
+    """Receives a :class:`Server`'s stream and publishes ``RenderState`` snapshots.
+
+    Has :class:`~pacman.snapshot.SimThread`'s ``start``/``send``/``stop``
+    interface, so the renderer cannot tell a remote game from a threaded one.
+    """
+
+    def __init__(self, host, port, buffer=None, timeout=5.0):
+        super().__init__(name="net-client", daemon=True)
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+        self.send_lock = threading.Lock()
+        self.buffer = buffer or SnapshotBuffer()
+        self.reader = _Reader()
+        self.states = {}        # seq -> decoded rows, to delta the next states against
+        self.last_seq = 0
+        self.bytes = []
+        self.decode_times = []
+        self.running = True
+        self.error = None
+
+    def wait(self, timeout=5.0):
+        """Read until the first state arrives; call before :meth:`start`."""
+        self.sock.settimeout(timeout)
+        try:
+            while self.buffer.latest is None:
+                data = self.sock.recv(65536)
+                if not data:
+                    raise NetError("server closed the connection")
+                for msg in self.reader.feed(data):
+                    if msg[0] == STATE:
+                        self.receive(msg)
+        except socket.timeout:
+            raise NetError(f"no state from the server within {timeout}s") from None
+        finally:
+            self.sock.settimeout(None)
+
+    def send(self, kind, code):
+        """Send an input event to the server; safe to call from any thread."""
+        self._send(_frame(INPUT, bytes((kind, code))))
+
+    def _send(self, data):
+        with self.send_lock:
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                self.running = False
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+        self.sock.close()
+
+    def run(self):
+        try:
+            while self.running:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                for msg in self.reader.feed(data):
+                    if msg[0] == STATE:
+                        self.receive(msg)
+        except OSError:
+            pass
+        except NetError as exc:
+            self.error = exc
+        self.running = False
+
+    def receive(self, msg):
+        """Decode one STATE frame, publish it and acknowledge it."""
+        t0 = time.perf_counter()
+        state = self.decode(msg, 1)
+        self.decode_times.append(time.perf_counter() - t0)
+        self.bytes.append(len(msg) + _FRAME.size)
+        self.buffer.publish(state)
+        ack = bytearray()
+        _put_varint(ack, state.seq)
+        self._send(_frame(ACK, bytes(ack)))
+        return state
+
+    def decode(self, data, i=0):
+        seq, i = _get_varint(data, i)
+        base_seq, i = _get_varint(data, i)
+        if base_seq and base_seq not in self.states:
+            raise NetError(f"state {seq} is a delta against {base_seq}, which this client never had")
+        base = self.states.get(base_seq, {}) if base_seq else {}
+
+        maze = None
+        full = data[i]
+        i += 1
+        if full:
+            version, i = _get_varint(data, i)
+            w, i = _get_varint(data, i)
+            h, i = _get_varint(data, i)
+            tile, i = _get_varint(data, i)
+            n, i = _get_varint(data, i)
+            cells = zlib.decompress(data[i:i + n])
+            i += n
+        n, i = _get_varint(data, i)
+        changes = []
+        for _ in range(n):
+            r, i = _get_varint(data, i)
+            c, i = _get_varint(data, i)
+            value = data[i] - 256 if data[i] > 127 else data[i]
+            has_landed = data[i + 1]
+            i += 2
+            o = None
+            if has_landed:
+                x, i = _get_signed(data, i)
+                y, i = _get_signed(data, i)
+                o = LandedState(x / Q, y / Q)
+            changes.append((r, c, value, o))
+        if full:
+            maze = (version, w, h, tile / Q, cells, tuple((r, c, o) for r, c, _, o in changes))
+            changes = []
+
+        rows = {}
+        for kind in KINDS:
+            rows[kind], i = decode_rows(data, i, base.get(kind, ()), WIDTHS[kind])
+        if i != len(data):
+            raise NetError("trailing bytes in state message")
+        self.states[seq] = rows
+        for old in [s for s in self.states if s <= seq - HISTORY]:
+            del self.states[old]
+        self.last_seq = seq
+        return rows_state(rows, seq, maze, tuple(changes), time.perf_counter())
+
+
+def parse_address(text, default_port=5555):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def bench(ticks, seed, size, enemies, backend="objects"):
+    """Server and client over loopback as fast as possible; returns both for their metrics."""
+    from .sim import Game, spawn_enemy
+
+    game = Game(seed, backend, size)
+    game.god_mode = True
+    for _ in range(enemies):
+        spawn_enemy(game)
+    server = Server(game)
+    client = Client(*server.address)
+    client.start()
+    server.poll(0.5)     # accept
+    for t in range(ticks):
+        game.pac.mv = 1 if (t // 200) % 3 else -1
+        game.pac.turn = 1 if (t // 90) % 4 == 0 else 0
+        game.activate_auto_shoot()
+        game.tick()
+        server.publish()
+        server.poll(0.0)
+    # let the client catch up with the last state
+    deadline = time.perf_counter() + 5.0
+    while client.last_seq < server.seq and time.perf_counter() < deadline:
+        server.poll(0.01)
+    client.stop()
+    server.close()
+    return server, client
+
+
+def main(argv=None):
+    import argparse
+
+    from .sim import ENTITY_BACKENDS, Game, parse_size
+
+    ap = argparse.ArgumentParser(description="Pac-Man game server and loopback benchmark.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve", help="host a game; connect with Project.py --connect HOST:PORT")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=5555)
+    sp.add_argument("--seed", type=int, default=None)
+    sp.add_argument("--size", type=parse_size, default=None, metavar="WxH")
+    sp.add_argument("--backend", choices=ENTITY_BACKENDS, default="objects")
+    bp = sub.add_parser("bench", help="stream a scripted game over loopback and print metrics")
+    bp.add_argument("--ticks", type=int, default=600)
+    bp.add_argument("--seed", type=int, default=1)
+    bp.add_argument("--size", type=parse_size, default=None, metavar="WxH")
+    bp.add_argument("--enemies", type=int, default=100)
+    bp.add_argument("--backend", choices=ENTITY_BACKENDS, default="objects")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        server = Server(Game(args.seed, args.backend, args.size), args.host, args.port)
+        print(f"serving seed {server.game.seed} on {server.address[0]}:{server.address[1]}")
+        try:
+            server.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        return
+
+    server, client = bench(args.ticks, args.seed, args.size, args.enemies, args.backend)
+    sizes = sorted(server.bytes)
+    n = len(sizes)
+    print(f"{n} states, {sum(sizes)} bytes: p50 {sizes[n // 2]}  p95 {sizes[min(n - 1, n * 95 // 100)]}  "
+          f"max {sizes[-1]} bytes/tick, first {server.bytes[0]}")
+    print(format_summary("encode", server.encode_times))
+    print(format_summary("decode", client.decode_times))
+    if client.error is not None:
+        print(f"client error: {client.error}")
+
+
+if __name__ == "__main__":
+    main()
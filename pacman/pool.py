@@ -0,0 +1,80 @@
+"""Recycling pools for short-lived game entities.
+
+Bullets come and go several times a second under auto-shoot, and each
+one used to be a fresh instance plus a fresh list every tick to filter
+the dead ones out.  A :class:`Pool` hands back released instances
+(re-initialised through their ``reset()``) before it builds new ones, and
+:func:`sweep` drops dead entries from a list in place by swapping the
+last entry into the hole, so steady-state play allocates nothing.
+
+``created`` against ``acquired`` is the allocation metric: once the pools
+have warmed up, ``created`` stops growing.
+"""
+
+
+class Pool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0    # instances built with cls(...)
+        self.acquired = 0   # instances handed out, new or recycled
+        self.released = 0
+
+    def acquire(self, *args):
+        self.acquired += 1
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        self.released += 1
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        for obj in objs:
+            self.release(obj)
+
+    @property
+    def reused(self):
+        return self.acquired - self.created
+
+    def stats(self):
+        return {"created": self.created, "reused": self.reused, "free": len(self.free)}
+
+
+def sweep(items, pool=None, keep_order=False):
+    """Remove entries whose ``alive`` is false from the list ``items`` in place.
+
+    Dead entries are swap-removed (the last entry fills the hole), so the
+    order of the survivors is not preserved unless ``keep_order`` is set;
+    then survivors are slid down instead.  Removed objects go back to
+    ``pool`` if one is given.  Returns how many were removed.
+    """
+    if keep_order:
+        k = 0
+        for obj in items:
+            if obj.alive:
+                items[k] = obj
+                k += 1
+            elif pool is not None:
+                pool.release(obj)
+        removed = len(items) - k
+        del items[k:]
+        return removed
+
+    i, n = 0, len(items)
+    while i < n:
+        obj = items[i]
+        if obj.alive:
+            i += 1
+            continue
+        n -= 1
+        items[i] = items[n]
+        if pool is not None:
+            pool.release(obj)
+    removed = len(items) - n
+    del items[n:]
+    return removed
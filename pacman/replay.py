@@ -0,0 +1,232 @@
+"""Deterministic input recording and replay.
+
+Everything that changes a game comes from its seeded ``rng`` and from the
+player's input, so a seed plus the input events stamped with the tick
+they arrived before are enough to reproduce a whole session.
+:class:`Recorder` collects them while playing; :class:`Player` feeds
+them back at full speed, with or without rendering, and times every tick
+so builds can be compared on exactly the same run.
+
+File layout (little endian)::
+
+    b"PMRP" | version u8 | backend u8 | seed u64 | ticks u32 | count u32
+    maze width u16 | maze height u16          (version 2 on; 21x21 before)
+    count x (tick delta varint | kind u8 | code u8)
+
+Run ``python -m pacman.replay FILE`` for a headless replay, or
+``python Project.py --replay FILE`` to replay with rendering.
+"""
+import struct
+import time
+
+from .sim import ENTITY_BACKENDS, H, W, Game
+
+MAGIC = b"PMRP"
+VERSION = 2
+_HEADER = struct.Struct("<4sBBQII")
+_SIZE = struct.Struct("<HH")
+
+# event kinds; ``code`` is the key byte, GLUT special key or mouse button
+KEY_DOWN = 0
+KEY_UP = 1
+SPECIAL = 2      # arrow keys: camera only, ignored by headless replays
+MOUSE_DOWN = 3
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _put_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data, i):
+    n = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+class Recording:
+    def __init__(self, seed, backend="objects", ticks=0, events=None, size=(W, H)):
+        self.seed = seed
+        self.backend = backend
+        self.size = tuple(size)         # maze (w, h)
+        self.ticks = ticks              # ticks the recorded session ran
+        self.events = events or []      # (tick, kind, code), tick ascending
+
+    def to_bytes(self):
+        if not 0 <= self.seed < 2**64:
+            raise ReplayError(f"seed {self.seed} does not fit the replay header (u64)")
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, ENTITY_BACKENDS.index(self.backend),
+                                     self.seed, self.ticks, len(self.events)))
+        out += _SIZE.pack(*self.size)
+        last = 0
+        for tick, kind, code in self.events:
+            _put_varint(out, tick - last)
+            out.append(kind)
+            out.append(code)
+            last = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER.size:
+            raise ReplayError("truncated replay header")
+        magic, version, backend, seed, ticks, count = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if version not in (1, VERSION):
+            raise ReplayError(f"unsupported replay version {version}")
+        i, size = _HEADER.size, (W, H)
+        if version >= 2:
+            if len(data) < i + _SIZE.size:
+                raise ReplayError("truncated replay header")
+            size = _SIZE.unpack_from(data, i)
+            i += _SIZE.size
+        events = []
+        tick = 0
+        try:
+            for _ in range(count):
+                delta, i = _get_varint(data, i)
+                tick += delta
+                events.append((tick, data[i], data[i + 1]))
+                i += 2
+        except IndexError:
+            raise ReplayError("truncated replay events") from None
+        return cls(seed, ENTITY_BACKENDS[backend], ticks, events, size)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Stamps input events with the number of ticks run so far.
+
+    Call :meth:`advance` with what ``Game.step`` returned and
+    :meth:`event` for every input, then :meth:`save` at the end.
+    """
+
+    def __init__(self, game):
+        self.recording = Recording(game.seed, game.backend, size=(game.maze.w, game.maze.h))
+
+    def advance(self, ticks):
+        self.recording.ticks += ticks
+
+    def event(self, kind, code):
+        rec = self.recording
+        rec.events.append((rec.ticks, kind, code))
+
+    def save(self, path):
+        self.recording.save(path)
+
+
+def apply_event(game, kind, code):
+    """Feed one recorded event to the simulation."""
+    if kind == KEY_DOWN:
+        game.key_down(bytes((code,)))
+    elif kind == KEY_UP:
+        game.key_up(bytes((code,)))
+    elif kind == MOUSE_DOWN:
+        game.mouse_down(code)
+
+
+class Player:
+    """Steps a fresh game through a recording one tick at a time.
+
+    ``handle(kind, code)`` receives the events; the default only applies
+    them to the game, a renderer can pass its own to also move the
+    camera.  ``sim_times`` gets the wall time of every tick.
+    """
+
+    def __init__(self, recording, handle=None, backend=None):
+        self.recording = recording
+        self.game = Game(recording.seed, backend or recording.backend, recording.size)
+        self.handle = handle or (lambda kind, code: apply_event(self.game, kind, code))
+        self.ticks = 0
+        self.next_event = 0
+        self.sim_times = []
+
+    def advance(self):
+        """Apply the events due now and run one tick; ``False`` once the recording is over."""
+        events = self.recording.events
+        while self.next_event < len(events) and events[self.next_event][0] <= self.ticks:
+            _, kind, code = events[self.next_event]
+            self.handle(kind, code)
+            self.next_event += 1
+        if self.ticks >= self.recording.ticks:
+            return False
+
+        t0 = time.perf_counter()
+        ran = self.game.step(1)
+        self.sim_times.append(time.perf_counter() - t0)
+        self.ticks += ran
+        if not ran and (self.next_event >= len(events) or events[self.next_event][0] > self.ticks):
+            # paused or game over with no input left to get it going again
+            raise ReplayError(f"replay stalled at tick {self.ticks} of {self.recording.ticks}")
+        return True
+
+    def run(self):
+        while self.advance():
+            pass
+        return self
+
+
+def summarize(times):
+    """Count, mean and percentiles (ms) of a list of durations in seconds."""
+    if not times:
+        return {"n": 0}
+    s = sorted(times)
+    n = len(s)
+
+    def pct(p):
+        return s[min(n - 1, int(p / 100.0 * n))] * 1000.0
+    return {"n": n, "mean": sum(s) / n * 1000.0, "p50": pct(50), "p95": pct(95),
+            "p99": pct(99), "max": s[-1] * 1000.0}
+
+
+def format_summary(name, times):
+    st = summarize(times)
+    if not st["n"]:
+        return f"{name}: no samples"
+    return (f"{name}: n={st['n']} mean={st['mean']:.3f}ms p50={st['p50']:.3f}ms "
+            f"p95={st['p95']:.3f}ms p99={st['p99']:.3f}ms max={st['max']:.3f}ms")
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Replay a recorded session without a window.")
+    ap.add_argument("file")
+    ap.add_argument("--backend", choices=ENTITY_BACKENDS, default=None,
+                    help="override the entity backend the session was recorded with")
+    args = ap.parse_args(argv)
+
+    rec = Recording.load(args.file)
+    t0 = time.perf_counter()
+    player = Player(rec, backend=args.backend).run()
+    dt = time.perf_counter() - t0
+    game = player.game
+    print(f"seed={rec.seed} ticks={player.ticks} events={len(rec.events)} "
+          f"time={dt:.3f}s rate={player.ticks / max(dt, 1e-9):.0f} ticks/s")
+    print(format_summary("sim", player.sim_times))
+    print(f"score={game.score} lives={game.lives} missed={game.bullets_missed} "
+          f"pac=({game.pac.x:.3f}, {game.pac.y:.3f}) game_over={game.game_over}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Compact binary snapshots of a running :class:`~pacman.sim.Game`.
+
+:func:`save` packs everything the simulation needs to carry on exactly
+where it was -- maze cells, the free-cell index, every entity, counters,
+timers and ability state, Pac-Man and (optionally) the ``random.Random``
+state -- into one ``bytes`` object; :func:`restore` puts it back into a
+game of the same maze size.  Bulk data (cells, coordinates) is stored as
+raw little-endian arrays, so both directions are a handful of
+``struct``/``array`` calls plus one short loop per entity list.
+
+Things that are cheap to rebuild are not stored: the spatial hashes are
+re-bucketed.  Render caches notice a restore because it bumps
+``walls_version``/``maze_version``/``landed_version``.
+
+``Game.reset()`` uses this: the first reset builds the maze and keeps a
+snapshot of the result, later ones restore it (without the RNG, so a new
+round does not replay the last one).
+
+Layout (little endian)::
+
+    b"PMSV" | version u8 | sections u8 | backend u8 | w u16 | h u16 | seed u64
+    _STATE: counters, timers, flags, flow target, Pac-Man
+    [SETTINGS]  god mode u8 | auto-shoot LOS u8
+    [RNG]       625 x u32 | has gauss u8 | gauss f64
+    counts: bullets, enemies, powerups, falling, landed, free cells, flow cells (u32 each)
+    maze cells (w*h x i8) | free cells (i32 each) | free-cell slots (w*h x i32)
+    flow field, if it has a target: distances (w*h x i32) | cells reached (i32 each)
+    bullets   (x, y, dx, dy, prev_x, prev_y) f64 | life i32 | alive u8
+    enemies   (x, y, prev_x, prev_y) f64 | alive u8
+    powerups  (r, c) i32 | (x, y) f64
+    falling   (r, c) i32 | (x, y, z, vz, prev_z) f64 | landed u8
+    landed    same layout as falling
+"""
+import struct
+import sys
+from array import array
+
+from .sim import ENTITY_BACKENDS, PacMan
+from .spatial import SpatialHash
+
+MAGIC = b"PMSV"
+VERSION = 1
+
+# optional sections
+SETTINGS = 1     # god mode and the auto-shoot line-of-sight toggle: player choices, not game state
+RNG = 2          # the game's random.Random; leave it out to keep a run's random sequence going
+ALL = SETTINGS | RNG
+
+_HEADER = struct.Struct("<4sBBBHHQ")
+_STATE = struct.Struct("<13q6B2i7d2b")
+_SETTINGS = struct.Struct("<2B")
+_RNG_TAIL = struct.Struct("<Bd")
+_COUNTS = struct.Struct("<7I")
+_RNG_WORDS = 625
+
+_INTS = ("lives", "score", "bullets_missed", "frame", "enemy_spawn_cnt", "power_spawn_cnt",
+         "obstacle_spawn_cnt", "speed_frames_left", "speed_cd_left", "auto_frames_left",
+         "auto_cd_left", "auto_tick", "dead_enemies")
+_FLAGS = ("paused", "game_over", "speed_boost_active", "auto_shoot_active", "any_landed", "camera_mode")
+
+
+# cell byte -> MazeGrid.open value: only FLOOR (0) is passable
+_OPEN = bytes([1]) + bytes(255)
+
+
+class SaveStateError(ValueError):
+    pass
+
+
+def _le(arr):
+    # the file is little endian; swap on the rare big-endian host
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _take(data, i, typecode, n):
+    arr = array(typecode)
+    end = i + n * arr.itemsize
+    if end > len(data):
+        raise SaveStateError("truncated save state")
+    arr.frombytes(data[i:end])
+    return _le(arr), end
+
+
+def save(game, sections=ALL):
+    """Snapshot ``game`` as bytes; ``sections`` picks the optional parts (SETTINGS, RNG)."""
+    maze, pac, flow = game.maze, game.pac, game.flow
+    w, h = maze.w, maze.h
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, sections, ENTITY_BACKENDS.index(game.backend),
+                                 w, h, game.seed & (2**64 - 1)))
+    target = flow.target if flow.target is not None else (-1, -1)
+    out += _STATE.pack(*(getattr(game, name) for name in _INTS),
+                       *(getattr(game, name) for name in _FLAGS), *target,
+                       pac.x, pac.y, pac.z, pac.yaw, pac.prev_x, pac.prev_y, pac.prev_yaw,
+                       pac.mv, pac.turn)
+    if sections & SETTINGS:
+        out += _SETTINGS.pack(getattr(game, "god_mode", False), game.auto_shoot_los)
+    if sections & RNG:
+        _, words, gauss = game.rng.getstate()
+        out += _le(array("I", words)).tobytes()
+        out += _RNG_TAIL.pack(gauss is not None, gauss or 0.0)
+
+    bullets, enemies = list(game.bullets), list(game.enemies)
+    powerups, falling, landed = game.powerups, game.obstacles, list(game.landed_obstacles.values())
+    free = game.free_cells
+    touched = flow.touched if flow.target is not None else ()
+    out += _COUNTS.pack(len(bullets), len(enemies), len(powerups), len(falling), len(landed),
+                        len(free.cells), len(touched))
+    out += maze.cells.tobytes()
+    out += _le(array("i", free.cells)).tobytes()
+    out += _le(array("i", free.slot)).tobytes()
+    if flow.target is not None:
+        # a BFS over the maze costs far more than copying its result
+        out += _le(array("i", flow.dist)).tobytes()
+        out += _le(array("i", touched)).tobytes()
+
+    out += _le(array("d", [v for b in bullets
+                           for v in (b.x, b.y, b.dx, b.dy, b.prev_x, b.prev_y)])).tobytes()
+    out += _le(array("i", [b.life for b in bullets])).tobytes()
+    out += bytes(bool(b.alive) for b in bullets)
+    out += _le(array("d", [v for e in enemies for v in (e.x, e.y, e.prev_x, e.prev_y)])).tobytes()
+    out += bytes(bool(e.alive) for e in enemies)
+    out += _le(array("i", [v for p in powerups for v in (p.r, p.c)])).tobytes()
+    out += _le(array("d", [v for p in powerups for v in (p.x, p.y)])).tobytes()
+    for obs in (falling, landed):
+        out += _le(array("i", [v for o in obs for v in (o.r, o.c)])).tobytes()
+        out += _le(array("d", [v for o in obs for v in (o.x, o.y, o.z, o.vz, o.prev_z)])).tobytes()
+        out += bytes(bool(o.landed) for o in obs)
+    return bytes(out)
+
+
+def _release_entities(game):
+    """Hand every entity back to its pool (as Game.reset does) and empty the lists."""
+    if game.backend == "numpy":
+        from .soa import BulletStore, EnemyStore
+        game.bullets = BulletStore(pool=game.bullet_pool)
+        game.enemies = EnemyStore(pool=game.enemy_pool)
+    else:
+        game.bullet_pool.release_all(game.bullets)
+        game.enemy_pool.release_all(game.enemies)
+        game.bullets = []
+        game.enemies = []
+    game.power_pool.release_all(game.powerups)
+    game.obstacle_pool.release_all(game.obstacles)
+    game.obstacle_pool.release_all(game.landed_obstacles.values())
+    game.powerups = []
+    game.obstacles = []
+    game.landed_obstacles = {}
+
+
+def restore(game, data):
+    """Load a :func:`save` snapshot into ``game``, which must have the same maze size.
+
+    Optional sections missing from ``data`` leave the game's own values
+    alone.  The entity backend may differ from the one that saved.
+    """
+    data = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise SaveStateError("truncated save state")
+    magic, version, sections, _, w, h, seed = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveStateError("not a save state")
+    if version != VERSION:
+        raise SaveStateError(f"unsupported save state version {version}")
+    maze = game.maze
+    if (w, h) != (maze.w, maze.h):
+        raise SaveStateError(f"save state is for a {w}x{h} maze, this game's is {maze.w}x{maze.h}")
+    try:
+        i = _HEADER.size
+        state = _STATE.unpack_from(data, i)
+        i += _STATE.size
+        settings = None
+        if sections & SETTINGS:
+            settings = _SETTINGS.unpack_from(data, i)
+            i += _SETTINGS.size
+        rng = None
+        if sections & RNG:
+            words, i = _take(data, i, "I", _RNG_WORDS)
+            has_gauss, gauss = _RNG_TAIL.unpack_from(data, i)
+            i += _RNG_TAIL.size
+            rng = (3, tuple(words), gauss if has_gauss else None)
+        nb, ne, np_, nf, nl, nfree, nflow = _COUNTS.unpack_from(data, i)
+        i += _COUNTS.size
+    except struct.error:
+        raise SaveStateError("truncated save state") from None
+
+    cells, i = _take(data, i, "b", w * h)
+    free_cells, i = _take(data, i, "i", nfree)
+    free_slot, i = _take(data, i, "i", w * h)
+    tr, tc = state[len(_INTS) + len(_FLAGS):][:2]
+    if tr >= 0:
+        flow_dist, i = _take(data, i, "i", w * h)
+        flow_touched, i = _take(data, i, "i", nflow)
+    bxy, i = _take(data, i, "d", nb * 6)
+    blife, i = _take(data, i, "i", nb)
+    balive, i = _take(data, i, "B", nb)
+    exy, i = _take(data, i, "d", ne * 4)
+    ealive, i = _take(data, i, "B", ne)
+    prc, i = _take(data, i, "i", np_ * 2)
+    pxy, i = _take(data, i, "d", np_ * 2)
+    obstacles = []
+    for n in (nf, nl):
+        orc, i = _take(data, i, "i", n * 2)
+        oxyz, i = _take(data, i, "d", n * 5)
+        olanded, i = _take(data, i, "B", n)
+        obstacles.append((n, orc, oxyz, olanded))
+    if i != len(data):
+        raise SaveStateError("trailing bytes after save state")
+
+    # --- everything parsed: now change the game ---
+    _release_entities(game)
+    k = len(_INTS)
+    for name, v in zip(_INTS, state):
+        setattr(game, name, v)
+    for name, v in zip(_FLAGS, state[k:]):
+        setattr(game, name, v if name == "camera_mode" else bool(v))
+    k += len(_FLAGS)
+    px, py, pz, yaw, ppx, ppy, pyaw, mv, turn = state[k + 2:]
+    pac = game.pac = PacMan(px, py)
+    pac.z, pac.yaw, pac.prev_x, pac.prev_y, pac.prev_yaw = pz, yaw, ppx, ppy, pyaw
+    pac.mv, pac.turn = mv, turn
+    if settings is not None:
+        game.god_mode, game.auto_shoot_los = bool(settings[0]), bool(settings[1])
+    if rng is not None:
+        game.seed = seed
+        game.rng.setstate(rng)
+
+    maze.cells = cells
+    maze.open = bytearray(cells.tobytes().translate(_OPEN))
+    game.free_cells.cells = free_cells
+    game.free_cells.slot = free_slot
+
+    acquire = game.bullet_pool.acquire
+    for j in range(nb):
+        x, y, dx, dy, ppx, ppy = bxy[j * 6:j * 6 + 6]
+        b = acquire(x, y, dx, dy)
+        b.prev_x, b.prev_y, b.life, b.alive = ppx, ppy, blife[j], bool(balive[j])
+        game.bullets.append(b)
+    acquire = game.enemy_pool.acquire
+    for j in range(ne):
+        x, y, ppx, ppy = exy[j * 4:j * 4 + 4]
+        e = acquire(x, y)
+        e.prev_x, e.prev_y, e.alive = ppx, ppy, bool(ealive[j])
+        game.enemies.append(e)
+    acquire = game.power_pool.acquire
+    game.powerups = [acquire(prc[2 * j], prc[2 * j + 1], pxy[2 * j], pxy[2 * j + 1])
+                     for j in range(np_)]
+    acquire = game.obstacle_pool.acquire
+    for (n, orc, oxyz, olanded), landed in zip(obstacles, (False, True)):
+        out = []
+        for j in range(n):
+            x, y, z, vz, pz = oxyz[j * 5:j * 5 + 5]
+            o = acquire(orc[2 * j], orc[2 * j + 1], x, y)
+            o.z, o.vz, o.prev_z, o.landed = z, vz, pz, bool(olanded[j])
+            out.append(o)
+        if landed:
+            game.landed_obstacles = {(o.r, o.c): o for o in out}
+        else:
+            game.obstacles = out
+
+    # rebuilt rather than stored
+    game.enemy_hash = SpatialHash(maze.cell_of, game.enemy_hash.cell_size)
+    if game.backend != "numpy":     # the numpy store answers its own queries
+        game.enemy_hash.rebuild(game.enemies)
+    game.power_hash = SpatialHash(maze.cell_of, game.power_hash.cell_size)
+    for p in game.powerups:
+        game.power_hash.insert(p)
+    flow = game.flow
+    if tr >= 0:
+        flow.dist = flow_dist.tolist()
+        flow.touched = flow_touched.tolist()
+        flow.target = (tr, tc)
+        flow.version += 1
+    else:
+        flow.target = None
+        flow.rebuild()           # just forgets the old distances
+    game.walls_version += 1
+    game.maze_version += 1
+    game.landed_version += 1
@@ -0,0 +1,845 @@
+"""Headless 3D Pac-Man simulation.
+
+Everything that advances the game lives here so it can be stepped without
+a window or GL context.  ``Project.py`` owns the GLUT window and only reads
+the state kept on :class:`Game`.
+
+Run ``python -m pacman.sim --ticks 100000`` for a quick soak test.
+"""
+import math
+import random
+
+from .flowfield import FlowField
+from .freecells import FreeCellIndex
+from .grid import FLOOR, RUBBLE, WALL, MazeGrid
+from .pool import Pool, sweep
+from .profiler import NULL_PROFILER
+from .spatial import SpatialHash
+
+# =====================
+#game constants
+# =====================
+TILE = 40.0
+
+W, H = 21, 21  # default grid cells; Game(size=(w, h)) builds other sizes
+MAX_MAZE_SIDE = 4096
+
+# camera modes
+CAM_TOP = 0
+CAM_THIRD = 1
+CAM_FIRST = 2
+
+MOVE_STEP = 3.0          # Pac-Man forward/back per frame
+TURN_STEP = 2.5          # degrees per frame
+ENEMY_STEP = 2.2         # per frame
+BULLET_STEP = 9.0
+BULLET_RADIUS = 3.0
+ENEMY_RADIUS = 10.0
+PAC_RADIUS = 10.0
+POWER_RADIUS = 6.0
+
+BULLET_LIFE_FRAMES = 120
+ENEMY_SPAWN_FRAMES = 240
+POWER_SPAWN_FRAMES = 420
+OBSTACLE_SPAWN_FRAMES = 300  # 5 seconds at 60fps
+AUTO_SHOOT_RATE_FRAMES = 18
+
+SPEED_BOOST_FRAMES = 300  # 5 seconds
+AUTO_SHOOT_FRAMES = 300   # 5 seconds
+SPEED_COOLDOWN_FRAMES = 600
+AUTO_COOLDOWN_FRAMES = 720
+
+# dead enemies are compacted away once there are at least this many and
+# they make up a quarter of the list, so the cost is O(1) per kill
+ENEMY_COMPACT_MIN = 16
+
+# mouse buttons, same values as GLUT_LEFT_BUTTON / GLUT_RIGHT_BUTTON
+MOUSE_LEFT = 0
+MOUSE_RIGHT = 2
+
+ENTITY_BACKENDS = ("objects", "numpy")
+
+# enemies path-find to Pac-Man within this many steps and walk straight at
+# him from further away, so the flow field's cost does not grow with the maze
+FLOW_RADIUS = 128
+
+# =====================
+# Maze helpers
+# =====================
+def build_cross_maze(maze):
+
+    W, H = maze.w, maze.h
+
+    # Clear maze
+    maze.fill(FLOOR)
+
+    #outer borders (walls)
+    for r in range(H):
+        maze.set(r, 0, WALL)
+        maze.set(r, W-1, WALL)
+    for c in range(W):
+        maze.set(0, c, WALL)
+        maze.set(H-1, c, WALL)
+
+    #cross pattern
+    mr, mc = H//2, W//2
+    for r in range(1, H-1):
+        maze.set(r, mc, WALL)
+    for c in range(1, W-1):
+        maze.set(mr, c, WALL)
+
+    #openings in the cross
+    for d in (-2, 2):
+        if 0 < mc+d < W-1:
+            maze.set(mr, mc+d, FLOOR)
+        if 0 < mr+d < H-1:
+            maze.set(mr+d, mc, FLOOR)
+
+    #inner blocks for complexity
+    for r in range(3, H-3, 4):
+        for c in range(3, W-3, 6):
+            if maze.get(r, c) == FLOOR:
+                maze.set(r, c, WALL)
+                if c+1 < W-1:
+                    maze.set(r, c+1, WALL)
+
+def grid_to_world(rc, w=W, h=H):
+
+    r, c = rc
+    x = (c - w/2.0) * TILE + TILE/2.0
+    y = (r - h/2.0) * TILE + TILE/2.0
+    return x, y
+
+def world_to_grid(x, y, w=W, h=H):
+
+    c = int(round(x / TILE + w/2.0 - 0.5))
+    r = int(round(y / TILE + h/2.0 - 0.5))
+    return r, c
+
+def collide2d(x1, y1, r1, x2, y2, r2):
+
+    return (x1-x2)**2 + (y1-y2)**2 <= (r1+r2)**2
+
+# =====================
+#game Classes
+# =====================
+class PacMan:
+    __slots__ = ("x", "y", "z", "yaw", "mv", "turn", "prev_x", "prev_y", "prev_yaw")
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+        self.z = PAC_RADIUS
+        self.yaw = 0.0
+        self.mv = 0     # -1 back, 0 idle, +1 forward
+        self.turn = 0   # -1 left, 0 idle, +1 right
+        self.prev_x, self.prev_y, self.prev_yaw = self.x, self.y, self.yaw
+
+    def update(self, game):
+        self.prev_x, self.prev_y, self.prev_yaw = self.x, self.y, self.yaw
+
+        # Turning
+        self.yaw += self.turn * TURN_STEP
+
+        # Forward vector (XY plane, Z is up)
+        rad = math.radians(self.yaw)
+        fx, fy = math.cos(rad), math.sin(rad)
+
+        # Speed boost multiplier
+        speed_mult = 1.75 if game.speed_boost_active else 1.0
+        step = MOVE_STEP * speed_mult
+
+        # Calculate new position
+        nx = self.x + fx * step * self.mv
+        ny = self.y + fy * step * self.mv
+
+        # Collision detection
+        if game.passable(nx, self.y):
+            self.x = nx
+        if game.passable(self.x, ny):
+            self.y = ny
+
+    def fire(self, game, target=None):
+
+        rad = math.radians(self.yaw)
+        dx, dy = math.cos(rad), math.sin(rad)
+
+        if target is not None:
+            tx, ty = target
+            L = math.hypot(tx, ty) + 1e-6
+            dx, dy = tx / L, ty / L
+
+        bx = self.x + dx * (PAC_RADIUS + 4)
+        by = self.y + dy * (PAC_RADIUS + 4)
+        game.bullets.append(game.bullet_pool.acquire(bx, by, dx, dy))
+
+# entities have __slots__ and a reset() taking the constructor's arguments
+# so pool.Pool can recycle them
+
+class Bullet:
+    __slots__ = ("x", "y", "z", "dx", "dy", "life", "alive", "prev_x", "prev_y")
+
+    def __init__(self, x, y, dx, dy):
+        self.reset(x, y, dx, dy)
+
+    def reset(self, x, y, dx, dy):
+        self.x, self.y = x, y
+        self.z = PAC_RADIUS
+        self.dx, self.dy = dx, dy
+        self.life = BULLET_LIFE_FRAMES
+        self.alive = True
+        self.prev_x, self.prev_y = x, y
+
+    def update(self, game):
+        if not self.alive:
+            return
+        self.prev_x, self.prev_y = self.x, self.y
+
+        self.x += self.dx * BULLET_STEP
+        self.y += self.dy * BULLET_STEP
+
+        if not game.passable(self.x, self.y):
+            self.alive = False
+
+        self.life -= 1
+        if self.life <= 0 and self.alive:
+            self.alive = False
+            game.bullets_missed += 1
+
+class Enemy:
+    __slots__ = ("x", "y", "z", "alive", "prev_x", "prev_y")
+
+    def __init__(self, x, y):
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.x, self.y = x, y
+        self.z = ENEMY_RADIUS
+        self.alive = True
+        self.prev_x, self.prev_y = self.x, self.y
+
+    def update(self, game):
+        if not self.alive:
+            return
+        self.prev_x, self.prev_y = self.x, self.y
+
+        #chasing Pac-Man: head for the next cell on the shared flow field,
+        #or straight at him once in his cell (or if he is unreachable)
+        tx, ty = game.pac.x, game.pac.y
+        maze = game.maze
+        nxt = game.flow.next_cell(*maze.cell_of(self.x, self.y))
+        if nxt is not None:
+            tx, ty = maze.centre(*nxt)
+        dx = tx - self.x
+        dy = ty - self.y
+        L = math.hypot(dx, dy) + 1e-6
+        vx = (dx / L) * ENEMY_STEP
+        vy = (dy / L) * ENEMY_STEP
+
+        nx, ny = self.x + vx, self.y + vy
+        if game.passable(nx, self.y):
+            self.x = nx
+        if game.passable(self.x, ny):
+            self.y = ny
+
+class PowerUp:
+    __slots__ = ("r", "c", "x", "y")
+
+    def __init__(self, r, c, x, y):
+        self.reset(r, c, x, y)
+
+    def reset(self, r, c, x, y):
+        self.r, self.c = r, c
+        self.x, self.y = x, y
+
+    def update(self, game):
+        pass
+
+class FallingObstacle:
+    __slots__ = ("r", "c", "x", "y", "z", "vz", "landed", "prev_z")
+
+    def __init__(self, r, c, x, y):
+        self.reset(r, c, x, y)
+
+    def reset(self, r, c, x, y):
+        self.r, self.c = r, c
+        self.x, self.y = x, y
+        self.z = 220.0
+        self.vz = 0.0
+        self.landed = False
+        self.prev_z = self.z
+
+    def update(self, game):
+        if self.landed:
+            return
+        self.prev_z = self.z
+
+        self.vz -= 2.5
+        self.z += self.vz
+
+        if self.z <= 0.0:
+            self.z = 0.0
+            self.landed = True
+
+            if game.maze.get(self.r, self.c) == FLOOR:
+                game.set_cell(self.r, self.c, RUBBLE)
+            game.obstacle_landed(self)
+
+# =====================
+#spawning
+# =====================
+SPAWN_CLEARANCE = TILE * 2.0  # nothing spawns this close to Pac-Man
+
+def cells_near_pac(game):
+    """Flat indices of cells whose centre is within SPAWN_CLEARANCE of Pac-Man."""
+    maze = game.maze
+    w, h = maze.w, maze.h
+    px, py = game.pac.x, game.pac.y
+    pr, pc = maze.cell_of(px, py)
+    span = int(SPAWN_CLEARANCE // TILE) + 1
+    for r in range(max(0, pr - span), min(h, pr + span + 1)):
+        for c in range(max(0, pc - span), min(w, pc + span + 1)):
+            gx, gy = maze.centre(r, c)
+            if (px-gx)**2 + (py-gy)**2 <= SPAWN_CLEARANCE**2:
+                yield r * w + c
+
+def random_floor_cell(game):
+    """Uniformly random free floor cell away from Pac-Man, or None if there is none."""
+    i = game.free_cells.sample(game.rng, cells_near_pac(game))
+    if i is None:
+        return None
+    return divmod(i, game.maze.w)
+
+def spawn_enemy(game):
+    cell = random_floor_cell(game)
+    if cell is None:
+        return None
+    game.enemies.append(game.enemy_pool.acquire(*game.maze.centre(*cell)))
+    e = game.enemies[-1]   # the numpy store copies the enemy and recycles it
+    if game.backend != "numpy":
+        game.enemy_hash.insert(e)   # so auto-shoot can target it before the next rebuild
+    return e
+
+def spawn_power(game):
+    cell = random_floor_cell(game)
+    if cell is None:
+        return None
+    p = game.power_pool.acquire(*cell, *game.maze.centre(*cell))
+    game.powerups.append(p)
+    game.power_hash.insert(p)
+    return p
+
+def spawn_obstacle(game):
+    cell = random_floor_cell(game)
+    if cell is None:
+        return None
+    o = game.obstacle_pool.acquire(*cell, *game.maze.centre(*cell))
+    game.obstacles.append(o)
+    return o
+
+# =====================
+# Game State
+# =====================
+class Game:
+    """All state for one running game.
+
+    ``seed`` feeds the game's own ``random.Random`` so runs can be
+    repeated; ``None`` draws a fresh seed from the OS (kept in ``self.seed``).
+    ``backend`` picks how bullets and enemies are stored: ``"objects"``
+    (plain lists of instances) or ``"numpy"`` (see :mod:`pacman.soa`).
+    ``size`` is the maze's (columns, rows), 21x21 by default.
+    """
+
+    def __init__(self, seed=None, backend="objects", size=None):
+        if backend not in ENTITY_BACKENDS:
+            raise ValueError(f"unknown entity backend {backend!r}; expected one of {ENTITY_BACKENDS}")
+        w, h = size or (W, H)
+        if not (5 <= w <= MAX_MAZE_SIDE and 5 <= h <= MAX_MAZE_SIDE):
+            raise ValueError(f"maze size {w}x{h} out of range (5..{MAX_MAZE_SIDE} per side)")
+        if seed is None:
+            # pick one we can report, so any run can be recorded and replayed
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.backend = backend
+        self.rng = random.Random(seed)
+        self.maze = MazeGrid(w, h, TILE)
+        # hottest call in the simulation: bind the grid's lookup directly
+        self.passable = self.maze.passable
+        self.maze_version = 0
+        self.walls_version = 0
+        self.flow = FlowField(self.maze, w, h, FLOW_RADIUS)
+        self.free_cells = FreeCellIndex(w, h)
+        self.bullet_pool = Pool(Bullet)
+        self.enemy_pool = Pool(Enemy)
+        self.power_pool = Pool(PowerUp)
+        self.obstacle_pool = Pool(FallingObstacle)
+        self.bullets, self.enemies, self.powerups, self.obstacles = [], [], [], []
+        self.landed_obstacles = {}
+        self.landed_version = 0
+        # auto-shoot only targets enemies with a clear line through the maze
+        self.auto_shoot_los = False
+        # per-phase tick timings; swap in a profiler.Profiler to measure
+        self.profiler = NULL_PROFILER
+        # called as listener(r, c) after set_cell() or a new landed obstacle,
+        # e.g. to refresh cached render geometry for that cell
+        self.cell_listeners = []
+        # savestate snapshot of a freshly reset game, taken on the first reset
+        self.fresh_state = None
+        # QA rewind point set with '[' and restored with ']'
+        self.quick_save = None
+        self.reset()
+
+    def reset(self):
+        if self.fresh_state is not None:
+            # same as the build below, without regenerating the maze
+            from . import savestate
+            savestate.restore(self, self.fresh_state)
+            return
+
+        self.lives = 3
+        self.score = 0
+        self.bullets_missed = 0
+        self.paused = False
+        self.game_over = False
+        self.camera_mode = CAM_THIRD
+
+        self.pac = PacMan(*self.maze.centre(self.maze.h - 2, 1))
+        if self.backend == "numpy":
+            from .soa import BulletStore, EnemyStore
+            self.bullets = BulletStore(pool=self.bullet_pool)
+            self.enemies = EnemyStore(pool=self.enemy_pool)
+        else:
+            self.bullet_pool.release_all(self.bullets)
+            self.enemy_pool.release_all(self.enemies)
+            self.bullets = []
+            self.enemies = []
+        self.dead_enemies = 0
+        self.power_pool.release_all(self.powerups)
+        self.obstacle_pool.release_all(self.obstacles)
+        self.obstacle_pool.release_all(self.landed_obstacles.values())
+        self.powerups = []
+        self.obstacles = []       # still falling
+        # landed obstacles never move again: one per cell, drawn as a static
+        # batch that is rebuilt when landed_version changes
+        self.landed_obstacles = {}
+        self.landed_version += 1
+        self.any_landed = False
+
+        # collision broadphase: enemies are re-bucketed every tick,
+        # power-ups never move so they are added/removed as they come and go
+        self.enemy_hash = SpatialHash(self.maze.cell_of, TILE)
+        self.power_hash = SpatialHash(self.maze.cell_of, TILE)
+
+        self.frame = 0
+        self.enemy_spawn_cnt = 0
+        self.power_spawn_cnt = 0
+        self.obstacle_spawn_cnt = 0
+
+        # Special Abilities
+        self.speed_boost_active = False
+        self.speed_frames_left = 0
+        self.speed_cd_left = 0
+
+        self.auto_shoot_active = False
+        self.auto_frames_left = 0
+        self.auto_cd_left = 0
+        self.auto_tick = 0
+
+        # Rebuild maze
+        build_cross_maze(self.maze)
+        self.walls_version += 1
+        self.maze_version += 1
+        self.flow.target = None
+        self.free_cells.rebuild(self.maze, FLOOR)
+
+        from . import savestate
+        # no RNG or settings: later rounds keep the run's random sequence and god mode
+        self.fresh_state = savestate.save(self, sections=0)
+
+    def alloc_stats(self):
+        """Per entity type: instances built so far, recycled, and waiting in the pool."""
+        return {"bullets": self.bullet_pool.stats(), "enemies": self.enemy_pool.stats(),
+                "powerups": self.power_pool.stats(), "obstacles": self.obstacle_pool.stats()}
+
+    def kill_enemy(self, e):
+        if e.alive:
+            e.alive = False
+            self.dead_enemies += 1
+
+    def obstacle_landed(self, o):
+        """Move a landed obstacle out of the falling list into the static set."""
+        self.any_landed = True
+        cell = (o.r, o.c)
+        if cell in self.landed_obstacles:
+            # one already rests here and looks the same
+            self.obstacle_pool.release(o)
+            return
+        self.landed_obstacles[cell] = o
+        self.landed_version += 1
+        for listener in self.cell_listeners:
+            listener(o.r, o.c)
+
+    def nearest_enemy(self):
+        """Closest live enemy to Pac-Man, honouring ``auto_shoot_los``; ``None`` if none.
+
+        Uses ``enemy_hash``, which holds every enemy as of the last
+        collision pass plus those spawned since, so it must be asked
+        before enemies move in this tick.  The numpy store answers from
+        its arrays instead.
+        """
+        pac = self.pac
+        accept = None
+        if self.auto_shoot_los:
+            los = self.maze.line_of_sight
+            def accept(e):
+                return los(pac.x, pac.y, e.x, e.y)
+        if self.backend == "numpy":
+            return self.enemies.nearest(pac.x, pac.y, accept)
+        return self.enemy_hash.nearest(pac.x, pac.y, accept)
+
+    def compact_enemies(self):
+        """Drop killed enemies once enough have piled up (see ENEMY_COMPACT_MIN)."""
+        dead = self.dead_enemies
+        if dead < ENEMY_COMPACT_MIN or dead * 4 < len(self.enemies):
+            return
+        if self.backend == "numpy":
+            self.enemies.compact()
+        else:
+            sweep(self.enemies, self.enemy_pool, keep_order=True)
+        self.dead_enemies = 0
+
+    def set_cell(self, r, c, value):
+        """Change one maze cell; all runtime maze edits go through here."""
+        self.maze.set(r, c, value)
+        self.maze_version += 1
+        self.flow.cell_changed(r, c)
+        if value == FLOOR:
+            self.free_cells.add(r * self.maze.w + c)
+        else:
+            self.free_cells.discard(r * self.maze.w + c)
+        for listener in self.cell_listeners:
+            listener(r, c)
+
+    def activate_speed_boost(self):
+        if (not self.speed_boost_active) and self.speed_cd_left == 0:
+            self.speed_boost_active = True
+            self.speed_frames_left = SPEED_BOOST_FRAMES
+
+    def activate_auto_shoot(self):
+        if (not self.auto_shoot_active) and self.auto_cd_left == 0:
+            self.auto_shoot_active = True
+            self.auto_frames_left = AUTO_SHOOT_FRAMES
+            self.auto_tick = 0
+
+    # =====================
+    # Input: the front end forwards keys and clicks here so that recorded
+    # input (see pacman.replay) drives the game exactly like live input
+    # =====================
+    def key_down(self, key):
+        """Handle a key press; ``key`` is a one-byte ``bytes`` like GLUT passes."""
+        if self.game_over:
+            if key in (b'r', b'R'):
+                self.reset()
+            return
+
+        # Pac-Man movement controls
+        if key in (b'w', b'W'):
+            self.pac.mv = 1
+        elif key in (b's', b'S'):
+            self.pac.mv = -1
+        elif key in (b'a', b'A'):
+            self.pac.turn = -1
+        elif key in (b'd', b'D'):
+            self.pac.turn = 1
+
+        # Game controls
+        elif key in (b'p', b'P'):
+            self.paused = not self.paused
+        elif key in (b'1',):
+            self.camera_mode = CAM_TOP
+        elif key in (b'2',):
+            self.camera_mode = CAM_THIRD
+
+        # Special abilities
+        elif key == b' ':  # Space for speed boost
+            self.activate_speed_boost()
+        elif key in (b'c', b'C'):  # C for auto shoot
+            self.activate_auto_shoot()
+        elif key in (b't', b'T'):  # T: auto shoot only at enemies in line of sight
+            self.auto_shoot_los = not self.auto_shoot_los
+
+        # Restart
+        elif key in (b'r', b'R'):
+            self.reset()
+
+        # Cheats
+        elif key in (b'l', b'L'):
+            self.lives = min(9, self.lives + 1)
+        elif key in (b'k', b'K'):
+            # eliminate all enemies
+            for e in self.enemies:
+                self.kill_enemy(e)
+        elif key in (b'g', b'G'):
+            # toggle god mode (no life loss)
+            self.god_mode = not getattr(self, 'god_mode', False)
+        elif key in (b'+',):
+            self.score += 50
+        elif key in (b'e', b'E'):
+            spawn_enemy(self)
+        elif key in (b'u', b'U'):
+            spawn_power(self)
+        elif key in (b'o', b'O'):
+            spawn_obstacle(self)
+        elif key in (b'x', b'X'):
+            # clear destroyed paths
+            for r, c in self.maze.find(RUBBLE):
+                self.set_cell(r, c, FLOOR)
+
+        # QA: snapshot this moment / rewind to it (see pacman.savestate)
+        elif key == b'[':
+            from . import savestate
+            self.quick_save = savestate.save(self)
+        elif key == b']':
+            if self.quick_save is not None:
+                from . import savestate
+                savestate.restore(self, self.quick_save)
+
+    def key_up(self, key):
+        if key in (b'w', b'W', b's', b'S'):
+            self.pac.mv = 0
+        if key in (b'a', b'A', b'd', b'D'):
+            self.pac.turn = 0
+
+    def mouse_down(self, button):
+        if button == MOUSE_LEFT:
+            self.pac.fire(self, None)
+        # Right mouse button cycles to first-person view
+        elif button == MOUSE_RIGHT:
+            self.camera_mode = CAM_FIRST
+
+    def step(self, n=1):
+        """Advance the simulation ``n`` ticks; returns the ticks actually run."""
+        ran = 0
+        for _ in range(n):
+            if self.paused or self.game_over:
+                break
+            self.tick()
+            ran += 1
+        return ran
+
+    def tick(self):
+        if self.paused or self.game_over:
+            return
+
+        prof = self.profiler
+        with prof.scope("tick"):
+            with prof.scope("spawn"):
+                self.spawn_due()
+            with prof.scope("abilities"):
+                self.update_abilities()
+            with prof.scope("update"):
+                self.update_entities()
+            with prof.scope("collide"):
+                # first, so collide() never re-buckets enemies that are being dropped
+                self.compact_enemies()
+                self.collide()
+
+        self.frame += 1
+
+    def spawn_due(self):
+        # Spawning system
+        self.enemy_spawn_cnt += 1
+        self.power_spawn_cnt += 1
+        self.obstacle_spawn_cnt += 1
+
+        if self.enemy_spawn_cnt >= ENEMY_SPAWN_FRAMES:
+            spawn_enemy(self)
+            self.enemy_spawn_cnt = 0
+        if self.power_spawn_cnt >= POWER_SPAWN_FRAMES:
+            spawn_power(self)
+            self.power_spawn_cnt = 0
+        if self.obstacle_spawn_cnt >= OBSTACLE_SPAWN_FRAMES:
+            spawn_obstacle(self)
+            self.obstacle_spawn_cnt = 0
+
+    def update_abilities(self):
+        # Special abilities management
+        if self.speed_boost_active:
+            self.speed_frames_left -= 1
+            if self.speed_frames_left <= 0:
+                self.speed_boost_active = False
+                self.speed_cd_left = SPEED_COOLDOWN_FRAMES
+        elif self.speed_cd_left > 0:
+            self.speed_cd_left -= 1
+
+        if self.auto_shoot_active:
+            self.auto_frames_left -= 1
+            self.auto_tick -= 1
+            if self.auto_tick <= 0:
+                # auto shoot toward nearest enemy
+                target_dir = None
+                nearest = self.nearest_enemy()
+                if nearest is not None:
+                    pac = self.pac
+                    target_dir = (nearest.x - pac.x, nearest.y - pac.y)
+                self.pac.fire(self, target_dir)
+                self.auto_tick = AUTO_SHOOT_RATE_FRAMES
+            if self.auto_frames_left <= 0:
+                self.auto_shoot_active = False
+                self.auto_cd_left = AUTO_COOLDOWN_FRAMES
+        elif self.auto_cd_left > 0:
+            self.auto_cd_left -= 1
+
+    def update_entities(self):
+        # Update all game objects
+        self.pac.update(self)
+        self.flow.retarget(*self.maze.cell_of(self.pac.x, self.pac.y))
+
+        if self.backend == "numpy":
+            self.bullets.update(self)
+            self.bullets.compact()
+            self.enemies.update(self)
+        else:
+            for b in self.bullets:
+                b.update(self)
+            sweep(self.bullets, self.bullet_pool)
+
+            for e in self.enemies:
+                e.update(self)
+        for p in self.powerups:
+            p.update(self)
+        for o in self.obstacles:
+            o.update(self)
+        if self.any_landed:
+            self.obstacles = [o for o in self.obstacles if not o.landed]
+            self.any_landed = False
+
+    def collide(self):
+        if self.backend == "numpy":
+            self.collide_arrays()
+        else:
+            self.collide_objects()
+
+        # Pac-Man vs power-ups
+        pac = self.pac
+        for p in list(self.power_hash.query(pac.x, pac.y, PAC_RADIUS + POWER_RADIUS + 2)):
+            if collide2d(pac.x, pac.y, PAC_RADIUS, p.x, p.y, POWER_RADIUS + 2):
+                self.lives = min(5, self.lives + 1)
+                self.powerups.remove(p)
+                self.power_hash.remove(p)
+                self.power_pool.release(p)
+
+    def collide_objects(self):
+        enemy_hash = self.enemy_hash
+        enemy_hash.rebuild(self.enemies)
+
+        # Bullets vs enemies
+        reach = BULLET_RADIUS + ENEMY_RADIUS
+        for b in self.bullets:
+            if not b.alive:
+                continue
+            for e in enemy_hash.query(b.x, b.y, reach):
+                if not e.alive:
+                    continue
+                if collide2d(b.x, b.y, BULLET_RADIUS, e.x, e.y, ENEMY_RADIUS):
+                    b.alive = False
+                    self.kill_enemy(e)
+                    self.score += 10
+
+        # Pac-Man vs enemies
+        pac = self.pac
+        for e in enemy_hash.query(pac.x, pac.y, PAC_RADIUS + ENEMY_RADIUS):
+            if not e.alive:
+                continue
+            if collide2d(pac.x, pac.y, PAC_RADIUS, e.x, e.y, ENEMY_RADIUS):
+                self.kill_enemy(e)
+                if not getattr(self, 'god_mode', False):
+                    self.lives -= 1
+                if self.lives <= 0:
+                    self.game_over = True
+
+    def collide_arrays(self):
+        # the numpy backend: same rules as collide_objects, on the store arrays
+        enemies = self.enemies
+        kills = self.bullets.collide(enemies)
+        self.dead_enemies += kills
+        self.score += 10 * kills
+
+        pac = self.pac
+        hits = enemies.hits(pac.x, pac.y, PAC_RADIUS + ENEMY_RADIUS)
+        if len(hits):
+            enemies.alive[hits] = False
+            self.dead_enemies += len(hits)
+            if not getattr(self, 'god_mode', False):
+                self.lives -= len(hits)
+            if self.lives <= 0:
+                self.game_over = True
+
+# =====================
+# Headless runner
+# =====================
+def run_headless(ticks, seed=None, god_mode=False, auto_shoot=False, game=None, backend="objects"):
+    """Step a game ``ticks`` times with no window.
+
+    ``auto_shoot`` re-arms the auto-shoot ability whenever its cooldown
+    allows, which keeps bullets and collisions busy for soak tests.
+    Returns the game so callers can inspect the final state.
+    """
+    if game is None:
+        game = Game(seed, backend)
+    game.god_mode = god_mode
+    for _ in range(ticks):
+        if game.game_over:
+            break
+        if auto_shoot:
+            game.activate_auto_shoot()
+        game.tick()
+    return game
+
+def parse_size(text):
+    """``"WxH"`` (or a single number for a square maze) -> (w, h)."""
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h or w)
+
+def main(argv=None):
+    import argparse
+    import gc
+    import time
+
+    ap = argparse.ArgumentParser(description="Run the Pac-Man simulation without a window.")
+    ap.add_argument("--ticks", type=int, default=10000)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--god", action="store_true", help="no life loss, so the run never ends early")
+    ap.add_argument("--auto-shoot", action="store_true", help="keep auto-shoot active whenever it is off cooldown")
+    ap.add_argument("--los", action="store_true", help="auto-shoot only at enemies in line of sight")
+    ap.add_argument("--backend", choices=ENTITY_BACKENDS, default="objects")
+    ap.add_argument("--size", type=parse_size, default=(W, H), metavar="WxH", help="maze columns x rows")
+    ap.add_argument("--profile", action="store_true", help="print per-phase tick percentiles")
+    ap.add_argument("--trace", metavar="FILE", help="write a Chrome trace of every tick's phases")
+    args = ap.parse_args(argv)
+
+    gc0 = gc.get_stats()[0]["collections"]
+    game = Game(args.seed, args.backend, args.size)
+    game.auto_shoot_los = args.los
+    if args.profile or args.trace:
+        from .profiler import Profiler
+        game.profiler = Profiler(window=max(args.ticks, 1))
+        if args.trace:
+            game.profiler.start_trace()
+    t0 = time.perf_counter()
+    run_headless(args.ticks, god_mode=args.god, auto_shoot=args.auto_shoot, game=game)
+    dt = time.perf_counter() - t0
+    gc_runs = gc.get_stats()[0]["collections"] - gc0
+    print(f"ticks={game.frame} time={dt:.3f}s rate={game.frame / max(dt, 1e-9):.0f} ticks/s")
+    print(f"score={game.score} lives={game.lives} missed={game.bullets_missed} "
+          f"enemies={sum(1 for e in game.enemies if e.alive)} bullets={len(game.bullets)} "
+          f"game_over={game.game_over}")
+    allocs = "  ".join(f"{name} {s['created']} new/{s['reused']} reused"
+                       for name, s in game.alloc_stats().items())
+    print(f"allocs: {allocs}  gc gen0 runs={gc_runs}")
+    for line in game.profiler.report_lines():
+        print(line)
+    if args.trace:
+        game.profiler.save_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Running the simulation on its own thread, handing frames immutable snapshots.
+
+Drawing straight from a :class:`~pacman.sim.Game` means the renderer and
+the simulation take turns: a long collision tick delays the next frame and
+a long frame delays the next tick.  With :class:`SimThread` the game
+lives on a thread of its own.  After every batch of ticks it publishes a
+:class:`RenderState` -- a frozen copy of what a frame needs (entity
+positions, HUD counters, maze edits) -- into a :class:`SnapshotBuffer`,
+and the render thread draws whatever the latest complete snapshot is.
+
+:class:`RenderState` has the attribute names the drawing code already
+reads from a ``Game`` (``pac``, ``enemies``, ``lives`` ...), so a frame can
+be drawn from either.  The maze is too big to copy on every tick, so a
+snapshot carries only the cells changed since the one before, and a
+:class:`MazeMirror` on the render side replays those edits into its own
+``MazeGrid``.  The mirror looks like a ``Game`` to
+:class:`pacman.gfx.chunks.MazeChunks`.
+
+Input from the window goes through :meth:`SimThread.send` and is applied
+on the simulation thread between ticks, so recordings stay exact.
+"""
+import queue
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from .clock import FixedStepClock
+from .grid import FLOOR, MazeGrid
+from .sim import ENEMY_RADIUS, PAC_RADIUS
+
+# --- frozen entities (only live ones are captured) ---
+
+PacState = namedtuple("PacState", "x y z yaw prev_x prev_y prev_yaw")
+
+
+class BulletState(namedtuple("BulletState", "x y prev_x prev_y")):
+    __slots__ = ()
+    z = PAC_RADIUS
+    alive = True
+
+
+class EnemyState(namedtuple("EnemyState", "x y prev_x prev_y")):
+    __slots__ = ()
+    z = ENEMY_RADIUS
+    alive = True
+
+
+PowerState = namedtuple("PowerState", "x y")
+FallingState = namedtuple("FallingState", "x y z prev_z")
+LandedState = namedtuple("LandedState", "x y")
+
+# counters and flags copied as they are (the HUD reads these)
+HUD_FIELDS = ("frame", "lives", "score", "bullets_missed", "paused", "game_over", "camera_mode",
+              "speed_boost_active", "speed_frames_left", "speed_cd_left",
+              "auto_shoot_active", "auto_frames_left", "auto_cd_left", "auto_shoot_los")
+
+RenderState = namedtuple("RenderState", (
+    "seq",         # publish counter, increases by one per snapshot
+    "time",        # perf_counter() when the newest tick in it finished
+    "pac", "enemies", "bullets", "powerups", "obstacles",
+) + HUD_FIELDS + (
+    "maze",        # None, or (walls_version, w, h, tile, cells bytes, landed) after a reset
+    "changes",     # ((r, c, value, LandedState or None), ...) edits since the previous snapshot
+))
+
+
+class Snapshotter:
+    """Builds :class:`RenderState` snapshots of one game, on the game's thread."""
+
+    def __init__(self, game):
+        self.game = game
+        self.seq = 0
+        self.walls_version = None
+        self.changed = {}      # (r, c) -> None, insertion ordered
+        game.cell_listeners.append(self._cell_changed)
+
+    def _cell_changed(self, r, c):
+        self.changed[(r, c)] = None
+
+    def close(self):
+        if self._cell_changed in self.game.cell_listeners:
+            self.game.cell_listeners.remove(self._cell_changed)
+
+    def take(self, now=None):
+        game = self.game
+        maze, landed = game.maze, game.landed_obstacles
+        full = None
+        if self.walls_version != game.walls_version:
+            # reset (or first snapshot): send the whole maze once
+            full = (game.walls_version, maze.w, maze.h, maze.tile, maze.cells.tobytes(),
+                    tuple((r, c, LandedState(o.x, o.y)) for (r, c), o in landed.items()))
+            self.walls_version = game.walls_version
+            changes = ()
+        else:
+            get = maze.get
+            changes = []
+            for r, c in self.changed:
+                o = landed.get((r, c))
+                changes.append((r, c, get(r, c), None if o is None else LandedState(o.x, o.y)))
+            changes = tuple(changes)
+        self.changed.clear()
+
+        p = game.pac
+        self.seq += 1
+        return RenderState(
+            self.seq, time.perf_counter() if now is None else now,
+            PacState(p.x, p.y, p.z, p.yaw, p.prev_x, p.prev_y, p.prev_yaw),
+            _movers(game.enemies, EnemyState),
+            _movers(game.bullets, BulletState),
+            tuple(PowerState(q.x, q.y) for q in game.powerups),
+            tuple(FallingState(o.x, o.y, o.z, o.prev_z) for o in game.obstacles),
+            *(getattr(game, name) for name in HUD_FIELDS),
+            full, changes)
+
+
+def _movers(items, cls):
+    alive = getattr(items, "alive", None)
+    if alive is not None and not isinstance(alive, bool):
+        # numpy store: read the columns instead of going through views
+        n = items.n
+        live = alive[:n]
+        cols = (items.x[:n][live], items.y[:n][live], items.prev_x[:n][live], items.prev_y[:n][live])
+        return tuple(map(cls._make, zip(*(c.tolist() for c in cols))))
+    return tuple(cls(e.x, e.y, e.prev_x, e.prev_y) for e in items if e.alive)
+
+
+class SnapshotBuffer:
+    """Latest-wins hand-over of snapshots between two threads (triple buffering).
+
+    The writer builds its next snapshot privately, :meth:`publish` swaps it
+    in as the latest, and the reader keeps the one it is drawing until it
+    asks for a newer one -- so neither side waits on the other and the
+    reader never sees a half-built state.  Snapshots are immutable, so the
+    three "buffers" are just three references and nothing is copied.
+
+    A snapshot the reader never picked up still holds maze edits the
+    mirror needs; :meth:`publish` folds them into the next one.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = None
+        self.taken = True
+        self.published = 0
+        self.skipped = 0       # snapshots replaced before the reader saw them
+
+    def publish(self, state):
+        with self.lock:
+            old = self.latest
+            if old is not None and not self.taken:
+                self.skipped += 1
+                if state.maze is None:
+                    state = state._replace(maze=old.maze, changes=old.changes + state.changes)
+            self.latest = state
+            self.taken = False
+            self.published += 1
+
+    def take(self):
+        """The newest snapshot, or ``None`` if nothing new arrived since the last call."""
+        with self.lock:
+            if self.taken:
+                return None
+            self.taken = True
+            return self.latest
+
+
+class MazeMirror:
+    """Render-side copy of a game's maze, kept current from snapshots.
+
+    Has the ``maze``/``landed_obstacles``/``walls_version``/``cell_listeners``
+    attributes :class:`pacman.gfx.chunks.MazeChunks` reads from a game.
+    """
+
+    def __init__(self):
+        self.maze = None
+        self.landed_obstacles = {}
+        self.walls_version = None
+        self.cell_listeners = []
+
+    def apply(self, state):
+        if state.maze is not None:
+            version, w, h, tile, cells, landed = state.maze
+            maze = MazeGrid(w, h, tile)
+            maze.cells = array("b", cells)
+            maze.open = bytearray(v == FLOOR for v in maze.cells)
+            self.maze = maze
+            self.landed_obstacles = {(r, c): o for r, c, o in landed}
+            self.walls_version = version
+        maze, landed = self.maze, self.landed_obstacles
+        for r, c, value, o in state.changes:
+            maze.set(r, c, value)
+            if o is None:
+                landed.pop((r, c), None)
+            else:
+                landed[(r, c)] = o
+            for listener in self.cell_listeners:
+                listener(r, c)
+
+
+class SimThread(threading.Thread):
+    """Ticks ``game`` at the clock's rate and publishes a snapshot after each batch.
+
+    ``handle(game, kind, code)`` applies an input event sent with
+    :meth:`send` (default: :func:`pacman.replay.apply_event`); a
+    ``recorder`` gets every event and tick, as in the single-threaded loop.
+    """
+
+    def __init__(self, game, buffer=None, clock=None, handle=None, recorder=None):
+        super().__init__(name="simulation", daemon=True)
+        if handle is None:
+            from .replay import apply_event as handle
+        self.game = game
+        self.buffer = buffer or SnapshotBuffer()
+        self.clock = clock or FixedStepClock()
+        self.handle = handle
+        self.recorder = recorder
+        self.snapshots = Snapshotter(game)
+        self.inbox = queue.SimpleQueue()
+        self.running = True
+        self.buffer.publish(self.snapshots.take())
+
+    def send(self, kind, code):
+        """Queue an input event; safe to call from any thread."""
+        self.inbox.put((kind, code))
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        self.inbox.put(None)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        game, clock, inbox = self.game, self.clock, self.inbox
+        prof = game.profiler
+        while self.running:
+            changed = False
+            try:
+                # sleep until the next tick is due or input arrives
+                event = inbox.get(timeout=clock.time_to_next_tick())
+                while event is not None:
+                    self._apply(*event)
+                    changed = True
+                    event = inbox.get_nowait()
+            except queue.Empty:
+                pass
+            if not self.running:
+                break
+            n = clock.advance()
+            if n:
+                with prof.scope("sim"):
+                    ran = game.step(n)
+                if self.recorder is not None:
+                    self.recorder.advance(ran)
+                changed = changed or ran > 0
+            if changed:
+                with prof.scope("snapshot"):
+                    self.buffer.publish(self.snapshots.take())
+        self.snapshots.close()
+
+    def _apply(self, kind, code):
+        if self.recorder is not None:
+            self.recorder.event(kind, code)
+        self.handle(self.game, kind, code)
@@ -0,0 +1,408 @@
+"""Structure-of-arrays entity storage backed by NumPy.
+
+``Game(backend="numpy")`` keeps bullets and enemies in contiguous arrays
+and moves them with one batch of array operations per tick instead of one
+``update()`` call per object.  The stores still look like the lists they
+replace: ``append()`` takes a :class:`~pacman.sim.Bullet` / ``Enemy``,
+iterating yields light views with the usual ``x``/``y``/``alive``
+attributes, so spawning and drawing code do not change.  Reading a view's
+fields is slow, though, so the per-tick work -- moving, bullet and
+Pac-Man collisions (:meth:`BulletStore.collide`, :meth:`EnemyStore.hits`) and
+auto-shoot's target (:meth:`EnemyStore.nearest`) -- runs on the arrays.
+
+Below ``SCALAR_MAX`` entities NumPy's per-call overhead costs more than
+the batching saves, so small stores loop over their slots instead,
+passing each through the object backend's own ``update()``.
+
+Views index into the arrays by slot, and :meth:`EntityStore.compact` moves
+slots around, so views must not be held across ticks.
+
+NumPy is optional; the default object backend does not need it.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .flowfield import INF
+from .sim import (TILE, ENEMY_STEP, BULLET_STEP, BULLET_RADIUS, ENEMY_RADIUS, PAC_RADIUS,
+                  Bullet, Enemy)
+
+COPY_CELLS = 1 << 14   # flow fields up to which DistGrid copies the whole field on a change
+SCALAR_MAX = 16        # slots up to which the stores loop in Python rather than batch
+BRUTE_PAIRS = 4096     # bullet x enemy pairs up to which BulletStore.collide tests all of them
+_KEY_STRIDE = 1 << 24  # broadphase cells per row in the packed key
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("the numpy entity backend needs NumPy installed (pip install numpy)")
+
+
+class DistGrid:
+    """The flow field's distances around the enemies' cells.
+
+    Fields of up to ``COPY_CELLS`` cells are copied whole into an
+    INF-padded array whenever their version changes.  Bigger ones would
+    hitch on that copy, so only the distinct cells asked for are read
+    from ``flow.dist``.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.padded = None
+
+    def around(self, flow, r, c):
+        """Distances of cells (r, c) and their four neighbours, INF off the grid.
+
+        Returns ``(cand, here)``: a (4, n) array in ``NEIGHBOUR_DR``/``DC``
+        order and the cells' own distances.
+        """
+        h, w = flow.h, flow.w
+        if h * w > COPY_CELLS:
+            return self._sample(flow, r, c)
+        if self.version != flow.version or self.padded is None:
+            d = np.full((h + 2, w + 2), INF, dtype=np.int64)
+            d[1:-1, 1:-1] = np.asarray(flow.dist, dtype=np.int64).reshape(h, w)
+            self.padded = d
+            self.version = flow.version
+        d = self.padded
+        r, c = r + 1, c + 1
+        return np.stack([d[r, c - 1], d[r, c + 1], d[r - 1, c], d[r + 1, c]]), d[r, c]
+
+    def _sample(self, flow, r, c):
+        w, h = flow.w, flow.h
+        cells, inv = np.unique(r * w + c, return_inverse=True)
+        cr, cc = np.divmod(cells, w)
+        idx = np.stack([cells - 1, cells + 1, cells - w, cells + w, cells])
+        ok = np.stack([cc > 0, cc < w - 1, cr > 0, cr < h - 1, np.ones(len(cells), dtype=bool)])
+        want = idx[ok].tolist()
+        d = np.full(idx.shape, INF, dtype=np.int64)
+        d[ok] = np.fromiter(map(flow.dist.__getitem__, want), dtype=np.int64, count=len(want))
+        d = d[:, inv]
+        return d[:4], d[4]
+
+
+# neighbour order matches FlowField._neighbours so ties break the same way
+NEIGHBOUR_DR = None
+NEIGHBOUR_DC = None
+if np is not None:
+    NEIGHBOUR_DR = np.array([0, 0, -1, 1])
+    NEIGHBOUR_DC = np.array([-1, 1, 0, 0])
+
+
+class EntityStore:
+    fields = ()   # (name, dtype) pairs
+    view = None
+
+    def __init__(self, capacity=64, pool=None):
+        require_numpy()
+        self.n = 0
+        self.pool = pool   # append() copies an entity's fields, then hands it back here
+        for name, dtype in self.fields:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def _reserve(self):
+        cap = len(self.alive)
+        if self.n < cap:
+            return
+        for name, _ in self.fields:
+            old = getattr(self, name)
+            new = np.zeros(cap * 2, dtype=old.dtype)
+            new[:cap] = old
+            setattr(self, name, new)
+
+    def _push(self, obj, **values):
+        self._reserve()
+        i = self.n
+        for name, v in values.items():
+            getattr(self, name)[i] = v
+        self.n += 1
+        if self.pool is not None:
+            self.pool.release(obj)
+        return i
+
+    def compact(self):
+        """Drop dead slots, keeping live ones contiguous and in order."""
+        n = self.n
+        if n <= SCALAR_MAX and all(self.alive[:n].tolist()):
+            return
+        keep = np.flatnonzero(self.alive[:n])
+        k = len(keep)
+        if k == n:
+            return
+        for name, _ in self.fields:
+            arr = getattr(self, name)
+            arr[:k] = arr[keep]
+        self.n = k
+
+    def __len__(self):
+        return self.n
+
+    def __bool__(self):
+        return self.n > 0
+
+    def __iter__(self):
+        view = self.view
+        for i in range(self.n):
+            yield view(self, i)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return self.view(self, i)
+
+
+def _field(name):
+    def get(self):
+        return getattr(self._s, name)[self._i].item()
+
+    def set(self, v):
+        getattr(self._s, name)[self._i] = v
+    return property(get, set)
+
+
+class BulletView:
+    __slots__ = ("_s", "_i")
+    z = PAC_RADIUS
+
+    def __init__(self, store, i):
+        self._s, self._i = store, i
+
+    x, y, dx, dy = _field("x"), _field("y"), _field("dx"), _field("dy")
+    prev_x, prev_y = _field("prev_x"), _field("prev_y")
+    life, alive = _field("life"), _field("alive")
+
+
+class EnemyView:
+    __slots__ = ("_s", "_i")
+    z = ENEMY_RADIUS
+
+    def __init__(self, store, i):
+        self._s, self._i = store, i
+
+    x, y = _field("x"), _field("y")
+    prev_x, prev_y = _field("prev_x"), _field("prev_y")
+    alive = _field("alive")
+
+
+class BulletStore(EntityStore):
+    fields = (("x", "f8"), ("y", "f8"), ("dx", "f8"), ("dy", "f8"),
+              ("prev_x", "f8"), ("prev_y", "f8"), ("life", "i4"), ("alive", "?"))
+    view = BulletView
+
+    def __init__(self, capacity=64, pool=None):
+        super().__init__(capacity, pool)
+        self._scratch = Bullet(0.0, 0.0, 0.0, 0.0)   # carries one slot through Bullet.update
+
+    def append(self, b):
+        self._push(b, x=b.x, y=b.y, dx=b.dx, dy=b.dy, prev_x=b.prev_x, prev_y=b.prev_y,
+                   life=b.life, alive=b.alive)
+
+    def update(self, game):
+        n = self.n
+        if not n:
+            return
+        if n <= SCALAR_MAX:
+            self._update_scalar(game)
+            return
+        m = self.alive[:n].copy()
+        if not m.any():
+            return
+        x, y, life = self.x[:n], self.y[:n], self.life[:n]
+        self.prev_x[:n][m] = x[m]
+        self.prev_y[:n][m] = y[m]
+        x[m] += self.dx[:n][m] * BULLET_STEP
+        y[m] += self.dy[:n][m] * BULLET_STEP
+
+        alive = self.alive[:n]
+        alive[m] = game.maze.passable_many(x[m], y[m])
+
+        life[m] -= 1
+        expired = alive & (life <= 0)
+        game.bullets_missed += int(np.count_nonzero(expired))
+        alive[expired] = False
+
+    def _update_scalar(self, game):
+        b = self._scratch
+        x, y, life, alive = self.x, self.y, self.life, self.alive
+        for i in range(self.n):
+            if not alive.item(i):
+                continue
+            b.x, b.y, b.dx, b.dy = x.item(i), y.item(i), self.dx.item(i), self.dy.item(i)
+            b.life, b.alive = life.item(i), True
+            b.update(game)
+            self.prev_x[i], self.prev_y[i] = b.prev_x, b.prev_y
+            x[i], y[i], life[i], alive[i] = b.x, b.y, b.life, b.alive
+
+    def collide(self, enemies):
+        """Bullets vs enemies on the arrays; returns how many enemies died.
+
+        Same outcome as ``Game.collide_objects``: bullets
+        in slot order each kill every live enemy they touch, so an enemy
+        goes to the first bullet that reaches it, and a bullet dies if it
+        killed anything.  Small batches test every pair; bigger ones bucket
+        enemies by ``TILE`` cells and test each bullet against its 3x3 block
+        (the reach is smaller than a cell).
+        """
+        if self.n <= SCALAR_MAX and enemies.n <= SCALAR_MAX:
+            return self._collide_scalar(enemies)
+        bi = np.flatnonzero(self.alive[:self.n])
+        ei = np.flatnonzero(enemies.alive[:enemies.n])
+        nb, ne = len(bi), len(ei)
+        if not nb or not ne:
+            return 0
+        bx, by = self.x[bi], self.y[bi]
+        ex, ey = enemies.x[ei], enemies.y[ei]
+        reach2 = (BULLET_RADIUS + ENEMY_RADIUS) ** 2
+
+        if nb * ne <= BRUTE_PAIRS:
+            pb, pe = np.nonzero((bx[:, None] - ex[None, :]) ** 2 + (by[:, None] - ey[None, :]) ** 2 <= reach2)
+        else:
+            ekey = np.floor(ey / TILE).astype(np.int64) * _KEY_STRIDE + np.floor(ex / TILE).astype(np.int64)
+            order = np.argsort(ekey, kind="stable")
+            ekey = ekey[order]
+            bkey = np.floor(by / TILE).astype(np.int64) * _KEY_STRIDE + np.floor(bx / TILE).astype(np.int64)
+            pbs, pes = [], []
+            for off in (-_KEY_STRIDE - 1, -_KEY_STRIDE, -_KEY_STRIDE + 1, -1, 0, 1,
+                        _KEY_STRIDE - 1, _KEY_STRIDE, _KEY_STRIDE + 1):
+                k = bkey + off
+                lo = np.searchsorted(ekey, k, "left")
+                cnt = np.searchsorted(ekey, k, "right") - lo
+                total = int(cnt.sum())
+                if not total:
+                    continue
+                # one (bullet, enemy) pair per enemy in each bullet's bucket
+                first = np.cumsum(cnt) - cnt
+                pbs.append(np.repeat(np.arange(nb), cnt))
+                pes.append(order[np.repeat(lo - first, cnt) + np.arange(total)])
+            if not pbs:
+                return 0
+            pb, pe = np.concatenate(pbs), np.concatenate(pes)
+            near = (bx[pb] - ex[pe]) ** 2 + (by[pb] - ey[pe]) ** 2 <= reach2
+            pb, pe = pb[near], pe[near]
+        if not len(pb):
+            return 0
+
+        # each enemy falls to the first bullet (in slot order) that reaches it
+        killer = np.full(ne, nb, dtype=np.intp)
+        np.minimum.at(killer, pe, pb)
+        dead = killer < nb
+        enemies.alive[ei[dead]] = False
+        self.alive[bi[killer[dead]]] = False
+        return int(np.count_nonzero(dead))
+
+    def _collide_scalar(self, enemies):
+        bx, by, b_alive = self.x, self.y, self.alive
+        ex, ey, e_alive = enemies.x, enemies.y, enemies.alive
+        reach2 = (BULLET_RADIUS + ENEMY_RADIUS) ** 2
+        kills = 0
+        for i in range(self.n):
+            if not b_alive.item(i):
+                continue
+            x, y = bx.item(i), by.item(i)
+            for j in range(enemies.n):
+                if e_alive.item(j) and (x - ex.item(j)) ** 2 + (y - ey.item(j)) ** 2 <= reach2:
+                    e_alive[j] = False
+                    b_alive[i] = False
+                    kills += 1
+        return kills
+
+
+class EnemyStore(EntityStore):
+    fields = (("x", "f8"), ("y", "f8"), ("prev_x", "f8"), ("prev_y", "f8"), ("alive", "?"))
+    view = EnemyView
+
+    def __init__(self, capacity=64, pool=None):
+        super().__init__(capacity, pool)
+        self.dist_grid = DistGrid()
+        self._scratch = Enemy(0.0, 0.0)   # carries one slot through Enemy.update
+
+    def append(self, e):
+        self._push(e, x=e.x, y=e.y, prev_x=e.prev_x, prev_y=e.prev_y, alive=e.alive)
+
+    def update(self, game):
+        n = self.n
+        if not n:
+            return
+        if n <= SCALAR_MAX:
+            self._update_scalar(game)
+            return
+        idx = np.flatnonzero(self.alive[:n])
+        if not len(idx):
+            return
+        x, y = self.x[idx], self.y[idx]
+        self.prev_x[idx] = x
+        self.prev_y[idx] = y
+
+        #chasing Pac-Man along the flow field, one axis at a time like Enemy.update
+        W, H = game.maze.w, game.maze.h
+        r = np.clip(np.rint(y / TILE + H/2.0 - 0.5).astype(np.intp), 0, H - 1)
+        c = np.clip(np.rint(x / TILE + W/2.0 - 0.5).astype(np.intp), 0, W - 1)
+        cand, here = self.dist_grid.around(game.flow, r, c)
+        k = np.argmin(cand, axis=0)
+        move = cand[k, np.arange(len(k))] < here
+        tx = np.where(move, (c + NEIGHBOUR_DC[k] - W/2.0) * TILE + TILE/2.0, game.pac.x)
+        ty = np.where(move, (r + NEIGHBOUR_DR[k] - H/2.0) * TILE + TILE/2.0, game.pac.y)
+
+        dx = tx - x
+        dy = ty - y
+        L = np.hypot(dx, dy) + 1e-6
+        nx = x + (dx / L) * ENEMY_STEP
+        ny = y + (dy / L) * ENEMY_STEP
+        maze = game.maze
+        x = np.where(maze.passable_many(nx, y), nx, x)
+        y = np.where(maze.passable_many(x, ny), ny, y)
+        self.x[idx] = x
+        self.y[idx] = y
+
+    def _update_scalar(self, game):
+        e = self._scratch
+        x, y, alive = self.x, self.y, self.alive
+        for i in range(self.n):
+            if not alive.item(i):
+                continue
+            e.x, e.y = x.item(i), y.item(i)
+            e.update(game)
+            self.prev_x[i], self.prev_y[i] = e.prev_x, e.prev_y
+            x[i], y[i] = e.x, e.y
+
+    def hits(self, x, y, reach):
+        """Slots of live enemies within ``reach`` of (x, y), as ``sim.collide2d`` decides."""
+        n = self.n
+        if n <= SCALAR_MAX:
+            ex, ey, alive = self.x, self.y, self.alive
+            return [i for i in range(n)
+                    if alive.item(i) and (x - ex.item(i)) ** 2 + (y - ey.item(i)) ** 2 <= reach ** 2]
+        idx = np.flatnonzero(self.alive[:n])
+        d2 = (x - self.x[idx]) ** 2 + (y - self.y[idx]) ** 2
+        return idx[d2 <= reach ** 2]
+
+    def nearest(self, x, y, accept=None):
+        """View of the live enemy closest to (x, y), or ``None``; see SpatialHash.nearest."""
+        n = self.n
+        if n <= SCALAR_MAX:
+            return self._nearest_scalar(x, y, accept)
+        idx = np.flatnonzero(self.alive[:n])
+        if not len(idx):
+            return None
+        d2 = (self.x[idx] - x) ** 2 + (self.y[idx] - y) ** 2
+        if accept is None:
+            return self.view(self, int(idx[np.argmin(d2)]))
+        for i in idx[np.argsort(d2, kind="stable")].tolist():
+            e = self.view(self, i)
+            if accept(e):
+                return e
+        return None
+
+    def _nearest_scalar(self, x, y, accept):
+        ex, ey, alive = self.x, self.y, self.alive
+        live = sorted(((ex.item(i) - x) ** 2 + (ey.item(i) - y) ** 2, i)
+                      for i in range(self.n) if alive.item(i))
+        for _, i in live:
+            e = self.view(self, i)
+            if accept is None or accept(e):
+                return e
+        return None
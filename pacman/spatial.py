@@ -0,0 +1,162 @@
+"""Uniform-grid spatial hash for collision broadphase.
+
+Buckets are the maze cells themselves (``TILE`` sized, addressed through
+the maze's ``cell_of``), so a query only has to look at the handful
+of cells that overlap the search circle instead of every entity in the
+game.
+:meth:`SpatialHash.nearest` searches the same buckets in growing rings
+around a point, so finding the closest object only looks at the cells
+between the point and that object.
+"""
+import heapq
+
+KEY_STRIDE = 1 << 20  # cells per row in the packed (r, c) key; rows may be negative
+
+
+class SpatialHash:
+    def __init__(self, to_cell, cell_size=None):
+        self.to_cell = to_cell  # (x, y) -> (r, c), normally the game's maze.cell_of
+        self.cell_size = cell_size  # world size of one bucket; needed by nearest()
+        self.cells = {}
+        self.count = 0
+        self.bounds = None  # (r0, c0, r1, c1) covering every bucket used since clear()
+
+    def clear(self):
+        self.cells.clear()
+        self.count = 0
+        self.bounds = None
+
+    def _grow(self, r, c):
+        b = self.bounds
+        if b is None:
+            self.bounds = (r, c, r, c)
+        elif not (b[0] <= r <= b[2] and b[1] <= c <= b[3]):
+            self.bounds = (min(b[0], r), min(b[1], c), max(b[2], r), max(b[3], c))
+
+    def insert(self, obj):
+        r, c = self.to_cell(obj.x, obj.y)
+        key = r * KEY_STRIDE + c
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [obj]
+            self._grow(r, c)
+        else:
+            bucket.append(obj)
+        self.count += 1
+
+    def remove(self, obj):
+        r, c = self.to_cell(obj.x, obj.y)
+        key = r * KEY_STRIDE + c
+        bucket = self.cells.get(key)
+        if bucket is not None and obj in bucket:
+            bucket.remove(obj)
+            if not bucket:
+                del self.cells[key]
+            self.count -= 1
+
+    def rebuild(self, objs):
+        """Re-bucket every live object; cheaper than tracking moves for things that move each tick."""
+        self.clear()
+        cells = self.cells
+        to_cell = self.to_cell
+        for o in objs:
+            if not o.alive:
+                continue
+            r, c = to_cell(o.x, o.y)
+            key = r * KEY_STRIDE + c
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [o]
+                self._grow(r, c)
+            else:
+                bucket.append(o)
+            self.count += 1
+
+    def query(self, x, y, radius):
+        """Yield objects whose centre may lie within ``radius`` of (x, y).
+
+        ``radius`` should already include the radius of the stored objects;
+        callers still do the exact distance test.
+        """
+        to_cell = self.to_cell
+        r0, c0 = to_cell(x - radius, y - radius)
+        r1, c1 = to_cell(x + radius, y + radius)
+        cells = self.cells
+        for r in range(r0, r1 + 1):
+            base = r * KEY_STRIDE
+            for c in range(c0, c1 + 1):
+                bucket = cells.get(base + c)
+                if bucket:
+                    yield from bucket
+
+    def nearest(self, x, y, accept=None):
+        """The live object closest to (x, y), or ``None``.
+
+        Rings of buckets are searched outwards from the one holding
+        (x, y); anything in ring k+1 or beyond is at least k buckets away,
+        so candidates nearer than that are settled in order of distance.
+        ``accept(obj)``, if given, can reject candidates (e.g. ones behind
+        a wall); it is asked about them nearest first and the first one
+        it accepts is the answer.  Once the rings would cover more buckets
+        than there are objects (sparse hashes, or every near candidate
+        rejected), one pass over the stored objects is cheaper.
+        """
+        if not self.count:
+            return None
+        r, c = self.to_cell(x, y)
+        r0, c0, r1, c1 = self.bounds
+        last = max(r - r0, r1 - r, c - c0, c1 - c, 0)
+        cells = self.cells
+        size = self.cell_size
+        heap = []      # (d2, order, obj) seen but not yet settled
+        order = 0
+        for k in range(last + 1):
+            if (2 * k + 1) ** 2 > self.count:
+                return self._nearest_linear(x, y, accept)
+            bound = ((k - 1) * size) ** 2 if k > 0 else -1.0
+            while heap and heap[0][0] <= bound:
+                o = heapq.heappop(heap)[2]
+                if accept is None or accept(o):
+                    return o
+            for rr, cc in (((r, c),) if k == 0 else _ring(r, c, k)):
+                bucket = cells.get(rr * KEY_STRIDE + cc)
+                if not bucket:
+                    continue
+                for o in bucket:
+                    if o.alive:
+                        heapq.heappush(heap, ((o.x - x) ** 2 + (o.y - y) ** 2, order, o))
+                        order += 1
+        # every bucket searched
+        while heap:
+            o = heapq.heappop(heap)[2]
+            if accept is None or accept(o):
+                return o
+        return None
+
+    def _nearest_linear(self, x, y, accept):
+        found = [((o.x - x) ** 2 + (o.y - y) ** 2, o)
+                 for bucket in self.cells.values() for o in bucket if o.alive]
+        if accept is None:
+            return min(found, key=_first, default=(None, None))[1]
+        found.sort(key=_first)
+        for _, o in found:
+            if accept(o):
+                return o
+        return None
+
+    def __len__(self):
+        return self.count
+
+
+def _first(item):
+    return item[0]
+
+
+def _ring(r, c, k):
+    """Cells at Chebyshev distance exactly ``k`` from (r, c)."""
+    for cc in range(c - k, c + k + 1):
+        yield r - k, cc
+        yield r + k, cc
+    for rr in range(r - k + 1, r + k):
+        yield rr, c - k
+        yield rr, c + k
@@ -0,0 +1,247 @@
+"""Parameter sweeps over headless games, fanned out across a process pool.
+
+    python -m pacman.sweep --param ENEMY_STEP=1.8,2.2,2.6 \\
+                           --param ENEMY_SPAWN_FRAMES=120:360:60 \\
+                           --seeds 50 --ticks 20000 --out sweep.json
+
+Every combination of the ``--param`` values is played with each of
+``--seeds`` seeds, as separate jobs on a :class:`ProcessPoolExecutor`
+(one worker per core by default).  A job sets its constants on
+:mod:`pacman.sim` (and :mod:`pacman.soa`, which copies some of them) inside
+the worker, runs one game like :func:`sim.run_headless`, and puts the
+defaults back, so workers can take any job in any order.  Only the
+gameplay constants in ``TUNABLES`` can be swept (``--list`` shows them).
+
+With no input, Pac-Man stands still; ``--auto-shoot`` keeps the
+auto-shoot ability armed as the player's stand-in.  Results are written as
+one columnar JSON file: ``{"meta": {...}, "columns": {name: [...]}}``
+with one entry per run in every column (loads directly into
+``pandas.DataFrame(doc["columns"])``).
+"""
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import sim
+
+# per-run outcome columns, in output order
+OUTCOMES = ("score", "lives_lost", "ticks", "game_over", "bullets_missed", "enemies_left", "seconds")
+
+
+class SweepError(ValueError):
+    pass
+
+
+# the gameplay constants a sweep may set: all read from pacman.sim (or soa)
+# at run time.  Layout, camera, input and cell-code constants are not
+# here -- overriding TILE, say, would leave the values derived from it stale.
+TUNABLES = (
+    "MOVE_STEP", "TURN_STEP", "ENEMY_STEP", "BULLET_STEP",
+    "BULLET_RADIUS", "ENEMY_RADIUS", "PAC_RADIUS", "POWER_RADIUS",
+    "BULLET_LIFE_FRAMES", "ENEMY_SPAWN_FRAMES", "POWER_SPAWN_FRAMES", "OBSTACLE_SPAWN_FRAMES",
+    "AUTO_SHOOT_RATE_FRAMES", "SPEED_BOOST_FRAMES", "AUTO_SHOOT_FRAMES",
+    "SPEED_COOLDOWN_FRAMES", "AUTO_COOLDOWN_FRAMES", "FLOW_RADIUS",
+)
+
+DEFAULTS = {name: getattr(sim, name) for name in TUNABLES}
+
+
+def _convert(name, text):
+    kind = type(DEFAULTS[name])
+    try:
+        return kind(text)
+    except ValueError:
+        raise SweepError(f"{name} takes {kind.__name__} values, not {text!r}") from None
+
+
+def parse_param(spec):
+    """``"NAME=1,2,3"`` or ``"NAME=start:stop:step"`` (stop included) -> (name, values)."""
+    name, sep, values = spec.partition("=")
+    name = name.strip()
+    if not sep or not values:
+        raise SweepError(f"expected NAME=values, got {spec!r}")
+    if name not in DEFAULTS:
+        raise SweepError(f"{name} cannot be swept; see --list for the constants that can")
+    if ":" in values:
+        start, stop, step = (_convert(name, v) for v in values.split(":"))
+        if step <= 0:
+            raise SweepError(f"{name}: step must be positive")
+        out, k = [], 0
+        while start + k * step <= stop + step * 1e-9:
+            out.append(start + k * step)
+            k += 1
+        if type(DEFAULTS[name]) is float:
+            out = [round(v, 9) for v in out]
+        return name, out
+    return name, [_convert(name, v) for v in values.split(",")]
+
+
+def make_jobs(params, seeds, first_seed=0):
+    """One ``(run, overrides, seed)`` per parameter combination and seed."""
+    names = [name for name, _ in params]
+    jobs = []
+    for combo in itertools.product(*(values for _, values in params)):
+        overrides = dict(zip(names, combo))
+        for s in range(seeds):
+            jobs.append((len(jobs), overrides, first_seed + s))
+    return jobs
+
+
+def _set_constants(values):
+    soa = sys.modules.get(__package__ + ".soa")   # only there once a numpy game ran
+    for name, value in values.items():
+        setattr(sim, name, value)
+        if soa is not None and hasattr(soa, name):
+            setattr(soa, name, value)
+
+
+def run_job(job, ticks, auto_shoot=False, los=False, backend="objects", size=None):
+    """Play one game with the job's constants; returns its outcome tuple (see OUTCOMES)."""
+    _, overrides, seed = job
+    _set_constants(overrides)
+    try:
+        t0 = time.perf_counter()
+        game = sim.Game(seed, backend, size)
+        game.auto_shoot_los = los
+        lives, lost = game.lives, 0
+        for _ in range(ticks):
+            if game.game_over:
+                break
+            if auto_shoot:
+                game.activate_auto_shoot()
+            game.tick()
+            if game.lives < lives:
+                lost += lives - game.lives
+            lives = game.lives
+        return (game.score, lost, game.frame, game.game_over, game.bullets_missed,
+                sum(1 for e in game.enemies if e.alive), time.perf_counter() - t0)
+    finally:
+        _set_constants({name: DEFAULTS[name] for name in overrides})
+
+
+def _run_chunk(args):
+    jobs, options = args
+    return [(job[0], run_job(job, **options)) for job in jobs]
+
+
+def run_sweep(jobs, ticks, workers=None, auto_shoot=False, los=False, backend="objects",
+              size=None, chunk=None, progress=None):
+    """Run ``jobs`` across ``workers`` processes; returns outcomes in job order.
+
+    ``progress(done, total)`` is called as chunks of jobs finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    options = {"ticks": ticks, "auto_shoot": auto_shoot, "los": los, "backend": backend, "size": size}
+    # a few chunks per worker keeps every core busy to the end without
+    # paying a round trip per game
+    chunk = chunk or max(1, len(jobs) // (workers * 8))
+    chunks = [(jobs[i:i + chunk], options) for i in range(0, len(jobs), chunk)]
+    results = [None] * len(jobs)
+    if workers == 1:
+        return _collect(map(_run_chunk, chunks), results, progress)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _collect(pool.map(_run_chunk, chunks), results, progress)
+
+
+def _collect(batches, results, progress):
+    done = 0
+    for batch in batches:
+        for run, outcome in batch:
+            results[run] = outcome
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(results))
+    return results
+
+
+def to_columns(jobs, results, params):
+    """Columnar dict: run, seed, one column per swept constant, then OUTCOMES."""
+    cols = {"run": [job[0] for job in jobs], "seed": [job[2] for job in jobs]}
+    for name, _ in params:
+        cols[name] = [job[1][name] for job in jobs]
+    for k, name in enumerate(OUTCOMES):
+        cols[name] = [r[k] for r in results]
+    return cols
+
+
+def summary_lines(jobs, results, params):
+    """Mean score / lives lost / ticks survived per parameter combination."""
+    groups = {}
+    for job, r in zip(jobs, results):
+        groups.setdefault(tuple(job[1].items()), []).append(r)
+    lines = []
+    for key, rs in groups.items():
+        n = len(rs)
+        label = "  ".join(f"{k}={v}" for k, v in key) or "defaults"
+        lines.append(f"{label:<48} score {sum(r[0] for r in rs) / n:8.1f}  "
+                     f"lives lost {sum(r[1] for r in rs) / n:5.2f}  "
+                     f"ticks {sum(r[2] for r in rs) / n:9.1f}  over {sum(r[3] for r in rs)}/{n}")
+    return lines
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Sweep pacman.sim constants over many headless games.")
+    ap.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                    help="constant and values, 'a,b,c' or 'start:stop:step' (repeatable)")
+    ap.add_argument("--seeds", type=int, default=10, help="games per combination")
+    ap.add_argument("--first-seed", type=int, default=0)
+    ap.add_argument("--ticks", type=int, default=10000, help="tick limit per game")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: every core)")
+    ap.add_argument("--auto-shoot", action="store_true", help="keep auto-shoot armed")
+    ap.add_argument("--los", action="store_true", help="auto-shoot only at enemies in line of sight")
+    ap.add_argument("--backend", choices=sim.ENTITY_BACKENDS, default="objects")
+    ap.add_argument("--size", type=sim.parse_size, default=None, metavar="WxH")
+    ap.add_argument("--out", metavar="FILE", default="sweep.json")
+    ap.add_argument("--list", action="store_true", help="list the constants that can be swept")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        for name, value in DEFAULTS.items():
+            print(f"{name:<24} {value}")
+        return
+    try:
+        params = [parse_param(p) for p in args.param]
+    except SweepError as exc:
+        ap.error(str(exc))
+    jobs = make_jobs(params, args.seeds, args.first_seed)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{len(jobs)} games on {workers} processes")
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    t0 = time.perf_counter()
+    results = run_sweep(jobs, args.ticks, workers, args.auto_shoot, args.los, args.backend,
+                        args.size, progress=progress)
+    dt = time.perf_counter() - t0
+    print(f"\r{len(jobs)} games in {dt:.1f}s ({sum(r[2] for r in results) / dt:.0f} ticks/s overall)")
+    for line in summary_lines(jobs, results, params):
+        print(line)
+
+    doc = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ticks": args.ticks,
+            "seeds": args.seeds,
+            "first_seed": args.first_seed,
+            "auto_shoot": args.auto_shoot,
+            "los": args.los,
+            "backend": args.backend,
+            "size": list(args.size) if args.size else [sim.W, sim.H],
+            "workers": workers,
+            "params": {name: values for name, values in params},
+            "defaults": DEFAULTS,
+        },
+        "columns": to_columns(jobs, results, params),
+    }
+    with open(args.out, "w") as f:
+        json.dump(doc, f)
+
+
+if __name__ == "__main__":
+    main()